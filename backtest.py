@@ -0,0 +1,416 @@
+"""
+변동성 돌파 전략 오프라인 백테스터 (NumPy)
+
+test.py 실매매 루프와 같은 규칙을 과거 캔들로 재생:
+- 09:00(KST) 리셋: 전량 매도 → 24h 거래대금 상위 CANDIDATE_SIZE 개로 후보 교체
+- 매수: 봉 고가가 목표가(이번 봉 시가 + 직전 봉 (고가-저가)*K) 이상이면 목표가에 매수
+        (시가가 이미 목표가 위면 시가), 후보 순위 순으로 빈 슬롯만큼
+- 매수금액: calculate_buy_amount 와 동일 (잔고*0.999/남은슬롯, MAX_BUY_AMOUNT 상한)
+- 매도: 평단 대비 +TP 익절 / -SL 손절 (같은 봉에서 둘 다 닿으면 손절 우선, 갭은 시가 체결)
+- 쿨다운: 매수/매도 후 COOLDOWN_SECONDS 동안 같은 종목 재거래 금지(봉 단위 올림)
+
+신호(목표가, 돌파, 후보, 리셋)는 마켓x봉 행렬로 한 번에 계산하고,
+상태 전이는 봉마다 전 마켓 배열 연산으로 처리 (마켓/틱 단위 파이썬 루프 없음)
+
+    python backtest.py synthetic --markets 120 --bars 8760
+    python backtest.py download --top 100 --bars 8760 --out hist.npz
+    python backtest.py run hist.npz --k 0.2 --tp 0.03
+"""
+import os
+import json
+import math
+import time
+import argparse
+import dataclasses
+import datetime
+
+import numpy as np
+
+KST_OFFSET = 9 * 3600
+FIELDS = ("open", "high", "low", "close", "value")
+
+
+@dataclasses.dataclass
+class StrategyParams:
+    # ✅ 기본값 = test.py 실매매 설정
+    k: float = 0.15
+    stop_loss_pct: float = 0.02
+    take_profit_pct: float = 0.02
+    max_holdings: int = 5
+    max_buy_amount: float = 15000
+    candidate_size: int = 20
+    cooldown_seconds: float = 180
+    reset_hour: int = 9
+    min_order_krw: float = 5000
+    fee: float = 0.0005            # 업비트 KRW 마켓 수수료(편도)
+    initial_krw: float = 100000
+
+
+# ==========================================
+# 데이터셋
+# ==========================================
+class Dataset:
+    """
+    times: (T,) 봉 시작 epoch(초, UTC)
+    markets: (M,) 마켓 코드
+    open/high/low/close/value: (M, T) float64, 상장 전/누락은 NaN
+    """
+
+    def __init__(self, times, markets, **cols):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.markets = np.asarray(markets)
+        for f in FIELDS:
+            setattr(self, f, np.asarray(cols[f], dtype=np.float64))
+
+    @property
+    def bar_seconds(self):
+        return int(np.median(np.diff(self.times))) if len(self.times) > 1 else 3600
+
+    def save(self, path: str):
+        np.savez_compressed(path, times=self.times, markets=self.markets,
+                            **{f: getattr(self, f) for f in FIELDS})
+
+    def save_columnar(self, path: str):
+        """
+        디렉터리에 필드별 .npy (비압축) + meta.json 저장
+        → load_dataset 이 mmap 으로 열어서 여러 프로세스가 같은 페이지를 공유
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "times.npy"), self.times)
+        for f in FIELDS:
+            np.save(os.path.join(path, f"{f}.npy"), np.ascontiguousarray(getattr(self, f)))
+        with open(os.path.join(path, "meta.json"), "w") as fp:
+            json.dump({"markets": [str(m) for m in self.markets], "fields": list(FIELDS)}, fp)
+
+
+def load_dataset(path: str):
+    """
+    .npz 파일 또는 save_columnar 디렉터리(읽기 전용 mmap) 로드
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, "meta.json")) as fp:
+            meta = json.load(fp)
+        cols = {f: np.load(os.path.join(path, f"{f}.npy"), mmap_mode="r") for f in FIELDS}
+        times = np.load(os.path.join(path, "times.npy"), mmap_mode="r")
+        return Dataset(times, meta["markets"], **cols)
+    with np.load(path, allow_pickle=False) as z:
+        return Dataset(z["times"], z["markets"], **{f: z[f] for f in FIELDS})
+
+
+def synthetic_dataset(n_markets: int = 120, n_bars: int = 8760, seed: int = 0, bar_seconds: int = 3600):
+    """
+    기하 브라운 운동 기반 합성 캔들 (벤치마크/검증용)
+    """
+    rng = np.random.default_rng(seed)
+    start = (int(time.time()) // 86400 - n_bars * bar_seconds // 86400 - 1) * 86400
+    times = start + np.arange(n_bars, dtype=np.int64) * bar_seconds
+
+    vol = rng.uniform(0.005, 0.03, size=(n_markets, 1))
+    rets = rng.normal(0, 1, size=(n_markets, n_bars)) * vol
+    close = 1000 * rng.uniform(0.1, 100, size=(n_markets, 1)) * np.exp(np.cumsum(rets, axis=1))
+    open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    wick = np.abs(rng.normal(0, 1, size=(2, n_markets, n_bars))) * vol * 0.7
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    value = close * rng.lognormal(10, 1, size=(n_markets, n_bars)) * rng.uniform(0.1, 10, size=(n_markets, 1))
+
+    markets = np.array([f"KRW-S{i:03d}" for i in range(n_markets)])
+    return Dataset(times, markets, open=open_, high=high, low=low, close=close, value=value)
+
+
+def download_dataset(markets, n_bars: int, interval: str = "minute60", max_workers: int = 8):
+    """
+    업비트에서 markets 의 최근 n_bars 개 캔들을 200개씩 거슬러 받아 Dataset 으로 합침
+    """
+    from upbit_api import get_candles, fetch_concurrently
+
+    def fetch(market):
+        rows, to = [], None
+        while len(rows) < n_bars:
+            chunk = get_candles(market, interval, count=min(200, n_bars - len(rows)), to=to)
+            if not chunk:
+                break
+            rows = chunk + rows
+            to = datetime.datetime.fromtimestamp(chunk[0]["start"], datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            if len(chunk) < 200 and len(rows) < n_bars:
+                break
+        return rows
+
+    results, errors = fetch_concurrently(markets, fetch, max_workers=max_workers)
+    if errors:
+        print(f"download errors: {errors}")
+
+    times = sorted({c["start"] for rows in results.values() for c in rows})
+    col = {t: i for i, t in enumerate(times)}
+    names = [m for m in markets if results.get(m)]
+    cols = {f: np.full((len(names), len(times)), np.nan) for f in FIELDS}
+    for i, m in enumerate(names):
+        for c in results[m]:
+            j = col[c["start"]]
+            for f in FIELDS:
+                cols[f][i, j] = c[f]
+    return Dataset(times, names, **cols)
+
+
+# ==========================================
+# 신호 (전부 벡터 연산)
+# ==========================================
+def rolling_sum_prev(x, window: int):
+    """x[:, t-window .. t-1] 합 (NaN=0, 현재 봉 제외 → 미래 참조 없음)"""
+    x = np.nan_to_num(x, nan=0.0)
+    cs = np.concatenate([np.zeros((x.shape[0], 1)), np.cumsum(x, axis=1)], axis=1)
+    t = np.arange(x.shape[1])
+    lo = np.maximum(t - window, 0)
+    return cs[:, t] - cs[:, lo]
+
+
+def ffill(x):
+    """행(마켓)별 NaN 을 직전 값으로 채움"""
+    mask = np.isnan(x)
+    idx = np.where(~mask, np.arange(x.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return x[np.arange(x.shape[0])[:, None], idx]
+
+
+def compute_signals(ds: Dataset, p: StrategyParams):
+    M, T = ds.close.shape
+    bar = ds.bar_seconds
+
+    # 목표가 = 이번 봉 시가 + 직전 봉 범위 * K
+    prev_range = np.full((M, T), np.nan)
+    prev_range[:, 1:] = ds.high[:, :-1] - ds.low[:, :-1]
+    target = ds.open + prev_range * p.k
+    entry_price = np.maximum(target, ds.open)
+    breakout = np.isfinite(target) & (ds.high >= target)
+
+    # 09:00 KST 리셋 봉: KST 기준 (리셋시각 기준) 날짜가 바뀌는 첫 봉
+    day_key = (ds.times + KST_OFFSET - p.reset_hour * 3600) // 86400
+    reset = np.zeros(T, dtype=bool)
+    reset[0] = True
+    reset[1:] = day_key[1:] != day_key[:-1]
+    day_id = np.cumsum(reset) - 1
+    reset_idx = np.flatnonzero(reset)
+
+    # 후보: 리셋 시점 직전 24h 거래대금 상위 N (순위가 곧 매수 우선순위)
+    window = max(1, int(round(86400 / bar)))
+    v24 = rolling_sum_prev(ds.value, window)[:, reset_idx]
+    v24[:, 0] = np.nan_to_num(ds.value[:, 0])      # 시작 구간은 과거가 없으니 첫 봉 거래대금
+    order = np.argsort(-v24, axis=0, kind="stable")
+    rank_day = np.empty_like(order)
+    rank_day[order, np.arange(order.shape[1])] = np.arange(M)[:, None]
+    rank_day = np.where(rank_day < p.candidate_size, rank_day, M)      # M = 후보 아님
+    rank = rank_day[:, day_id]
+
+    return {
+        "target": target,
+        "entry_price": entry_price,
+        "breakout": breakout & (rank < M),
+        "rank": rank,
+        "reset": reset,
+        "mark": ffill(ds.close),
+        "cooldown_bars": max(1, math.ceil(p.cooldown_seconds / bar)),
+    }
+
+
+# ==========================================
+# 시뮬레이션
+# ==========================================
+def run_backtest(ds: Dataset, p: StrategyParams = None, signals: dict = None):
+    p = p or StrategyParams()
+    sig = signals or compute_signals(ds, p)
+    M, T = ds.close.shape
+
+    open_, high, low = ds.open, ds.high, ds.low
+    entry_price, breakout, rank, reset, mark = (
+        sig["entry_price"], sig["breakout"], sig["rank"], sig["reset"], sig["mark"]
+    )
+    cd_bars = sig["cooldown_bars"]
+    fee = p.fee
+
+    cash = float(p.initial_krw)
+    qty = np.zeros(M)
+    avg = np.zeros(M)
+    cool_until = np.zeros(M, dtype=np.int64)
+    equity = np.empty(T)
+
+    # 체결 기록 (이벤트 발생 시에만 추가)
+    t_side, t_bar, t_mkt, t_price, t_qty, t_reason, t_ret = [], [], [], [], [], [], []
+
+    def record_sells(idx, price, t, reason):
+        nonlocal cash
+        proceeds = qty[idx] * price * (1 - fee)
+        cost = qty[idx] * avg[idx] * (1 + fee)
+        cash += float(proceeds.sum())
+        t_side.extend(["SELL"] * len(idx))
+        t_bar.extend([t] * len(idx))
+        t_mkt.extend(idx.tolist())
+        t_price.extend(price.tolist())
+        t_qty.extend(qty[idx].tolist())
+        t_reason.extend([reason] * len(idx))
+        t_ret.extend((proceeds / cost - 1).tolist())
+        qty[idx] = 0.0
+        avg[idx] = 0.0
+        cool_until[idx] = t + cd_bars
+
+    for t in range(T):
+        # 1) 09:00 리셋: 시가 전량 매도 + 쿨다운 초기화
+        if reset[t] and t > 0:
+            held = np.flatnonzero(qty > 0)
+            if held.size:
+                px = np.where(np.isfinite(open_[held, t]), open_[held, t], mark[held, t])
+                record_sells(held, px, t, "SELL_ALL")
+            cool_until[:] = 0
+
+        # 2) 익절/손절 (쿨다운 지난 보유분)
+        held = np.flatnonzero((qty > 0) & (cool_until <= t) & np.isfinite(low[:, t]))
+        if held.size:
+            sl = avg[held] * (1 - p.stop_loss_pct)
+            tp = avg[held] * (1 + p.take_profit_pct)
+            o = open_[held, t]
+            sl_hit = low[held, t] <= sl
+            tp_hit = (high[held, t] >= tp) & ~sl_hit
+            if sl_hit.any():
+                record_sells(held[sl_hit], np.minimum(o[sl_hit], sl[sl_hit]), t, "STOP_LOSS")
+            if tp_hit.any():
+                record_sells(held[tp_hit], np.maximum(o[tp_hit], tp[tp_hit]), t, "TAKE_PROFIT")
+
+        # 3) 돌파 매수: 후보 순위 순으로 빈 슬롯만큼
+        n_held = int(np.count_nonzero(qty > 0))
+        slots = p.max_holdings - n_held
+        if slots > 0:
+            elig = np.flatnonzero(breakout[:, t] & (qty == 0) & (cool_until <= t))
+            if elig.size:
+                elig = elig[np.argsort(rank[elig, t], kind="stable")][:slots]
+                for m in elig:
+                    remaining = p.max_holdings - n_held
+                    amount = cash * 0.999 / remaining
+                    if amount < p.min_order_krw:
+                        break
+                    amount = min(amount, p.max_buy_amount)
+                    px = entry_price[m, t]
+                    qty[m] = amount / px
+                    avg[m] = px
+                    cash -= amount * (1 + fee)
+                    cool_until[m] = t + cd_bars
+                    n_held += 1
+                    t_side.append("BUY"); t_bar.append(t); t_mkt.append(int(m))
+                    t_price.append(float(px)); t_qty.append(float(qty[m]))
+                    t_reason.append("BREAKOUT_BUY"); t_ret.append(np.nan)
+
+        equity[t] = cash + float(np.dot(qty, np.nan_to_num(mark[:, t])))
+
+    trades = {
+        "side": np.array(t_side), "bar": np.array(t_bar, dtype=np.int64),
+        "market": np.array(t_mkt, dtype=np.int64), "price": np.array(t_price),
+        "qty": np.array(t_qty), "reason": np.array(t_reason), "ret": np.array(t_ret),
+    }
+    return {"equity": equity, "trades": trades, "stats": summarize(equity, trades, p, ds.bar_seconds)}
+
+
+def max_drawdown(equity):
+    peak = np.maximum.accumulate(equity)
+    return float(np.max((peak - equity) / peak)) if equity.size else 0.0
+
+
+def summarize(equity, trades, p: StrategyParams, bar_seconds: int = 3600):
+    sells = trades["side"] == "SELL"
+    rets = trades["ret"][sells]
+    wins = rets[rets > 0]
+    losses = rets[rets <= 0]
+    bar_rets = np.diff(equity) / equity[:-1] if equity.size > 1 else np.zeros(0)
+    per_year = 365 * 86400 / bar_seconds
+    sharpe = float(bar_rets.mean() / bar_rets.std() * math.sqrt(per_year)) if bar_rets.size and bar_rets.std() > 0 else 0.0
+
+    reasons = {}
+    for r in trades["reason"][sells]:
+        reasons[str(r)] = reasons.get(str(r), 0) + 1
+
+    final = float(equity[-1]) if equity.size else p.initial_krw
+    return {
+        "final_krw": final,
+        "pnl_krw": final - p.initial_krw,
+        "total_return": final / p.initial_krw - 1,
+        "max_drawdown": max_drawdown(equity),
+        "sharpe": sharpe,
+        "buys": int(np.count_nonzero(trades["side"] == "BUY")),
+        "sells": int(sells.sum()),
+        "win_rate": float(len(wins) / len(rets)) if len(rets) else 0.0,
+        "avg_trade_return": float(rets.mean()) if len(rets) else 0.0,
+        "profit_factor": float(wins.sum() / -losses.sum()) if len(losses) and losses.sum() < 0 else float("inf"),
+        "exit_reasons": reasons,
+    }
+
+
+def print_stats(stats: dict):
+    print(f"  최종자산     {stats['final_krw']:>14,.0f} KRW  (손익 {stats['pnl_krw']:+,.0f})")
+    print(f"  수익률       {stats['total_return']*100:>13.2f} %")
+    print(f"  최대낙폭     {stats['max_drawdown']*100:>13.2f} %")
+    print(f"  샤프         {stats['sharpe']:>13.2f}")
+    print(f"  매수/매도    {stats['buys']:>7} / {stats['sells']}")
+    print(f"  승률         {stats['win_rate']*100:>13.1f} %  (평균 {stats['avg_trade_return']*100:+.2f}%/거래)")
+    print(f"  손익비       {stats['profit_factor']:>13.2f}")
+    print(f"  청산사유     {stats['exit_reasons']}")
+
+
+def add_param_args(ap):
+    d = StrategyParams()
+    ap.add_argument("--k", type=float, default=d.k)
+    ap.add_argument("--sl", type=float, default=d.stop_loss_pct)
+    ap.add_argument("--tp", type=float, default=d.take_profit_pct)
+    ap.add_argument("--max-holdings", type=int, default=d.max_holdings)
+    ap.add_argument("--candidates", type=int, default=d.candidate_size)
+    ap.add_argument("--cooldown", type=float, default=d.cooldown_seconds)
+    ap.add_argument("--initial", type=float, default=d.initial_krw)
+
+
+def params_from_args(args):
+    return StrategyParams(
+        k=args.k, stop_loss_pct=args.sl, take_profit_pct=args.tp, max_holdings=args.max_holdings,
+        candidate_size=args.candidates, cooldown_seconds=args.cooldown, initial_krw=args.initial,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="변동성 돌파 전략 백테스트")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("run", help="저장된 데이터셋(.npz)으로 백테스트")
+    a.add_argument("data")
+    add_param_args(a)
+
+    a = sub.add_parser("synthetic", help="합성 데이터로 백테스트(속도 확인)")
+    a.add_argument("--markets", type=int, default=120)
+    a.add_argument("--bars", type=int, default=8760)
+    a.add_argument("--seed", type=int, default=0)
+    add_param_args(a)
+
+    a = sub.add_parser("download", help="업비트 과거 캔들 받아서 저장")
+    a.add_argument("--top", type=int, default=100, help="24h 거래대금 상위 N 개 KRW 마켓")
+    a.add_argument("--bars", type=int, default=8760)
+    a.add_argument("--interval", default="minute60")
+    a.add_argument("--out", default="hist.npz")
+
+    args = ap.parse_args()
+
+    if args.cmd == "download":
+        from upbit_api import get_krw_markets, get_ticker_rows
+        rows = get_ticker_rows(get_krw_markets(), timeout=7)
+        rows.sort(key=lambda x: x.get("acc_trade_price_24h", 0), reverse=True)
+        markets = [r["market"] for r in rows[:args.top]]
+        ds = download_dataset(markets, args.bars, args.interval)
+        ds.save(args.out)
+        print(f"saved {args.out}: {len(ds.markets)} markets x {len(ds.times)} bars")
+        return
+
+    t0 = time.perf_counter()
+    ds = load_dataset(args.data) if args.cmd == "run" else synthetic_dataset(args.markets, args.bars, args.seed)
+    t1 = time.perf_counter()
+    res = run_backtest(ds, params_from_args(args))
+    t2 = time.perf_counter()
+
+    print(f"{len(ds.markets)} markets x {len(ds.times)} bars  (load {t1-t0:.2f}s, backtest {t2-t1:.2f}s)")
+    print_stats(res["stats"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+매매 루프 전체 벤치마크 - 모의 거래소(시세/계좌/주문/디스코드) 상대로 실제 TradingEngine.tick() 반복
+
+- 시계는 가상 시간: 틱마다 --step 초씩 진행 (time.time / now_kst 교체)
+  → 봉 경계 재계산, 09:00 리셋, 24h/12h 기록 만료까지 몇 시간 분량을 빠르게 재생
+- HTTP 는 실제로 로컬 모의 서버에 보냄 (요청 수/지연 그대로 측정)
+- 결과: ticks/sec, 틱당 API 호출 수(엔드포인트별), 틱(판단) 지연 p50/p99, 가상 1시간당 메모리 증가
+
+    python bench_loop.py --hours 6 --markets 100
+    python bench_loop.py --hours 2 --latency 0.01 --respect-rate-limit
+"""
+import os
+import time
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+
+import upbit_api
+import engine as engine_mod
+from upbit_api import client, TokenBucket
+from metrics import metrics
+from mock_upbit import MockExchange, PricePath, start_http_server
+
+
+class SimClock:
+    """time.time 을 가상 시간으로 교체 (perf_counter/monotonic/sleep 은 실제 시간 그대로)"""
+
+    def __init__(self, start: float):
+        self.now = start
+        self._real_time = time.time
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+    def install(self):
+        time.time = self
+        engine_mod.now_kst = lambda: datetime.datetime.fromtimestamp(self.now, engine_mod.KST)
+        return self
+
+    def uninstall(self):
+        time.time = self._real_time
+
+
+def rss_mb():
+    """현재 RSS(MB) - /proc 없으면 최대 RSS"""
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def percentile(values, q: float):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def total_calls():
+    return {k: v["calls"] for k, v in client.stats().items()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="매매 루프 전체 벤치마크 (모의 거래소 + 가상 시계)")
+    ap.add_argument("--hours", type=float, default=2.0, help="재생할 가상 시간")
+    ap.add_argument("--step", type=float, default=engine_mod.LOOP_INTERVAL_SECONDS, help="틱당 가상 시간(초)")
+    ap.add_argument("--start", default=None, help="가상 시작 시각 KST 'YYYY-MM-DD HH:MM' (기본: 오늘 08:30)")
+    ap.add_argument("--markets", type=int, default=100, help="모의 KRW 마켓 수")
+    ap.add_argument("--latency", type=float, default=0.0, help="모의 API 요청당 지연(초)")
+    ap.add_argument("--vol", type=float, default=0.002, help="시세 조회당 가격 변동성")
+    ap.add_argument("--krw", type=float, default=1_000_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--respect-rate-limit", action="store_true",
+                    help="업비트 초당 한도 버킷 유지 (기본은 꺼서 루프 자체 처리량만 측정)")
+    ap.add_argument("--tracemalloc", action="store_true", help="파이썬 힙 증가도 측정 (느려짐)")
+    ap.add_argument("--report-every", type=float, default=1.0, help="중간 결과 출력 간격(가상 시간)")
+    args = ap.parse_args()
+
+    if args.start:
+        start = datetime.datetime.strptime(args.start, "%Y-%m-%d %H:%M").replace(tzinfo=engine_mod.KST)
+    else:
+        start = datetime.datetime.now(engine_mod.KST).replace(hour=8, minute=30, second=0, microsecond=0)
+
+    clock = SimClock(start.timestamp()).install()
+    ex = MockExchange(n_markets=args.markets, latency=args.latency, rate_limit=0,
+                      path=PricePath(vol=args.vol, seed=args.seed), krw=args.krw)
+    server, base_url = start_http_server(0, ex)
+    upbit_api.API_URL = base_url
+    if not args.respect_rate_limit:
+        client.buckets = {g: TokenBucket(1e6, capacity=1e6) for g in client.buckets}
+
+    workdir = tempfile.mkdtemp(prefix="bench_loop_")
+    config = engine_mod.EngineConfig(
+        upbit_access="bench", upbit_secret="bench-secret-" + "0" * 32,
+        discord_webhook=f"{base_url}/api/webhooks/0/bench",
+        journal_path=os.path.join(workdir, "trades.db"),
+        state_dir=os.path.join(workdir, "state"),
+        metrics_port=0,
+        record_dir=os.path.join(workdir, "recordings"),     # replay.py --record-dir 로 재생 가능
+    )
+    eng = engine_mod.TradingEngine(config)
+    eng.executor.poll_interval = 0.0
+
+    print(f"mock api {base_url}  markets={args.markets}  latency={args.latency}s  "
+          f"rate-limit={'on' if args.respect_rate_limit else 'off'}  start={start:%Y-%m-%d %H:%M} KST")
+
+    t0 = time.perf_counter()
+    eng.start()
+    eng.universe.stop()     # 백그라운드 재순위는 실제 시간 기준이라 → 가상 시간으로 직접 호출
+    print(f"start(): {time.perf_counter() - t0:.2f}s  candidates={len(eng.candidates)}")
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    n_ticks = int(args.hours * 3600 / args.step)
+    ticks_per_report = max(int(args.report_every * 3600 / args.step), 1)
+    next_scan = clock.now + eng.universe.interval
+    calls_before = total_calls()
+    rss_start = rss_mb()
+    heap_start = tracemalloc.get_traced_memory()[0] if args.tracemalloc else 0
+    durations = []
+    memory = []
+
+    print(f"{'sim':>16} {'ticks':>7} {'ticks/s':>8} {'p50ms':>7} {'p99ms':>7} {'rssMB':>7} {'orders':>7}")
+    bench_t0 = time.perf_counter()
+    for i in range(1, n_ticks + 1):
+        clock.advance(args.step)
+        if clock.now >= next_scan:
+            eng.universe.scan()
+            next_scan = clock.now + eng.universe.interval
+
+        t = time.perf_counter()
+        eng.tick()
+        durations.append(time.perf_counter() - t)
+
+        if i % ticks_per_report == 0 or i == n_ticks:
+            window = durations[-ticks_per_report:]
+            elapsed = time.perf_counter() - bench_t0
+            memory.append((i * args.step / 3600, rss_mb()))
+            print(f"{datetime.datetime.fromtimestamp(clock.now, engine_mod.KST):%m-%d %H:%M:%S} {i:>7} "
+                  f"{i / elapsed:>8.1f} {percentile(window, 0.5) * 1000:>7.2f} {percentile(window, 0.99) * 1000:>7.2f} "
+                  f"{memory[-1][1]:>7.1f} {len(ex.orders):>7}")
+
+    elapsed = time.perf_counter() - bench_t0
+    calls_after = total_calls()
+    end_equity = ex.equity()
+    held = [cur for cur, a in ex.accounts.items() if cur != "KRW" and a["balance"] > 0]
+    heap_end = tracemalloc.get_traced_memory()[0] if args.tracemalloc else 0
+    eng.close()
+    clock.uninstall()
+    server.shutdown()
+
+    sim_hours = n_ticks * args.step / 3600
+    print()
+    print(f"ticks           {n_ticks}  ({sim_hours:.1f}h simulated in {elapsed:.1f}s, x{sim_hours * 3600 / elapsed:.0f})")
+    print(f"ticks/sec       {n_ticks / elapsed:.1f}")
+    print(f"tick latency    p50 {percentile(durations, 0.5) * 1000:.2f}ms  p99 {percentile(durations, 0.99) * 1000:.2f}ms"
+          f"  max {max(durations) * 1000:.2f}ms")
+    print(f"memory          rss {rss_start:.1f} → {rss_mb():.1f} MB "
+          f"({(memory[-1][1] - rss_start) / max(sim_hours, 1e-9):+.2f} MB/sim-hour)")
+    if args.tracemalloc:
+        print(f"python heap     {(heap_end - heap_start) / 1e6:+.2f} MB")
+    print(f"recordings      {config.record_dir}")
+    print(f"orders          {len(ex.orders)}  rejected {sum(ex.rejected.values())} "
+          f"{' '.join(f'{k}={v}' for k, v in sorted(ex.rejected.items()))}  "
+          f"webhook msgs {len(ex.webhooks)}  webhook 429s {ex.webhook_throttled}")
+    print(f"equity          {args.krw:,.0f} → {end_equity:,.0f} KRW ({(end_equity - args.krw) / args.krw * 100:+.2f}%)"
+          f"  holding {len(held)}")
+    print("api calls/tick")
+    for name in sorted(calls_after):
+        n = calls_after[name] - calls_before.get(name, 0)
+        if n:
+            print(f"  {name:<40} {n / n_ticks:>8.3f}")
+
+    stages = [h for h in metrics.snapshot()["histograms"] if h["name"] == "engine_stage_seconds"]
+    print("stage latency (ms)")
+    for h in sorted(stages, key=lambda h: -h["avg_ms"]):
+        print(f"  {h['labels']:<24} avg {h['avg_ms']:>7.2f}  p99 {h['p99_ms']:>7.2f}  n {h['count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+목표가 계산(build_target_prices) 벤치마크 - 로컬 모의 API 상대로 순차 vs 병렬 비교
+
+    python bench_targets.py --latency 0.2 --sizes 20 200
+    python bench_targets.py --compute --sizes 20 200 1000   # 캐시된 캔들로 목표가 재계산만 (고정 K vs 적응형 K/ATR)
+"""
+import time
+import argparse
+
+import numpy as np
+
+import upbit_api
+from upbit_api import get_candles, fetch_concurrently
+from mock_upbit import MockExchange, start_http_server
+from candles import CandleStore
+
+TARGET_INTERVAL = "minute60"
+
+
+def run_sequential(markets):
+    results, errors = {}, {}
+    for m in markets:
+        try:
+            results[m] = get_candles(m, TARGET_INTERVAL, count=2)
+        except Exception as e:
+            errors[m] = str(e)
+    return results, errors
+
+
+def run_concurrent(markets, workers):
+    return fetch_concurrently(markets, lambda m: get_candles(m, TARGET_INTERVAL, count=2), max_workers=workers)
+
+
+def synthetic_store(n_markets: int, bars: int, seed: int = 0):
+    """합성 랜덤워크 캔들로 채운 CandleStore (마지막 봉 = 현재 봉)"""
+    rng = np.random.default_rng(seed)
+    store = CandleStore(TARGET_INTERVAL, warmup=bars)
+    bar = store.bar_start()
+    markets = [f"KRW-S{i:04d}" for i in range(n_markets)]
+    for m in markets:
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        wick = np.abs(rng.normal(0, 0.005, (2, bars))) * close
+        ring = store.ring(m)
+        for i in range(bars):
+            ring.append({"start": bar - (bars - 1 - i) * store.seconds, "open": open_[i],
+                         "high": max(open_[i], close[i]) + wick[0, i], "low": min(open_[i], close[i]) - wick[1, i],
+                         "close": close[i], "volume": 1.0})
+    return store, markets
+
+
+def run_compute(sizes, noise_window: int, atr_window: int, repeat: int = 50):
+    print(f"targets() recompute  (noise_window={noise_window}, atr_window={atr_window}, {repeat} runs)")
+    print(f"{'markets':>8} {'mode':>9} {'ms':>8} {'targets':>8}")
+    bars = max(noise_window + 1, atr_window + 2)
+    for n in sizes:
+        store, markets = synthetic_store(n, bars)
+        for mode, nw, aw in (("fixed", 0, 0), ("adaptive", noise_window, atr_window)):
+            dts = []
+            for _ in range(repeat):
+                store.version += 1    # 매번 행렬부터 다시 (틱마다 체결로 현재 봉이 바뀌는 경우)
+                t0 = time.perf_counter()
+                targets = store.targets(markets, 0.2, nw, aw)
+                dts.append(time.perf_counter() - t0)
+            print(f"{n:>8} {mode:>9} {np.median(dts) * 1000:>8.3f} {len(targets):>8}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.2, help="모의 API 요청당 지연(초)")
+    ap.add_argument("--rate-limit", type=int, default=10, help="모의 API 초당 허용 요청 수")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 200])
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--compute", action="store_true", help="API 없이 목표가 계산 시간만")
+    ap.add_argument("--noise-window", type=int, default=20)
+    ap.add_argument("--atr-window", type=int, default=14)
+    args = ap.parse_args()
+
+    if args.compute:
+        run_compute(args.sizes, args.noise_window, args.atr_window)
+        return
+
+    ex = MockExchange(n_markets=max(args.sizes), latency=args.latency, rate_limit=args.rate_limit)
+    server, base_url = start_http_server(0, ex)
+    upbit_api.API_URL = base_url
+
+    print(f"mock api {base_url}  latency={args.latency}s  limit={args.rate_limit}/s  workers={args.workers}")
+    print(f"{'markets':>8} {'mode':>11} {'seconds':>8} {'ok':>5} {'errors':>6} {'429s':>5}")
+    for n in args.sizes:
+        markets = ex.markets[:n]
+        for mode in ("sequential", "concurrent"):
+            time.sleep(1.1)   # 이전 측정의 초당 한도 창 비우기
+            throttled_before = ex.throttled
+            t0 = time.perf_counter()
+            if mode == "sequential":
+                results, errors = run_sequential(markets)
+            else:
+                results, errors = run_concurrent(markets, args.workers)
+            dt = time.perf_counter() - t0
+            print(f"{n:>8} {mode:>11} {dt:>8.2f} {len(results):>5} {len(errors):>6} {ex.throttled - throttled_before:>5}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
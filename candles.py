@@ -0,0 +1,396 @@
+import time
+import threading
+from array import array
+
+import numpy as np
+
+from upbit_api import get_candles, fetch_concurrently
+
+FIELDS = ("start", "open", "high", "low", "close", "volume")
+WEEK_OFFSET = 4 * 86400     # 업비트 주봉은 월요일 UTC 00:00(= KST 09:00) 시작, epoch 0 은 목요일
+
+
+def interval_seconds(interval: str):
+    """minute60 → 3600, day → 86400 (업비트 일봉은 UTC 00:00 = KST 09:00 시작)"""
+    if interval.startswith("minute"):
+        return int(interval[len("minute"):]) * 60
+    if interval in ("day", "days"):
+        return 86400
+    if interval in ("week", "weeks"):
+        return 7 * 86400
+    raise ValueError(f"지원하지 않는 interval: {interval}")
+
+
+def bar_start(interval: str, ts: float = None):
+    """ts(기본 지금)가 속한 봉의 시작 epoch (주봉은 월요일 KST 09:00 기준)"""
+    seconds = interval_seconds(interval)
+    offset = WEEK_OFFSET if interval in ("week", "weeks") else 0
+    ts = time.time() if ts is None else ts
+    return int((ts - offset) // seconds) * seconds + offset
+
+
+class CandleRing:
+    """
+    고정 크기 배열 기반 링버퍼 (필드별 array('d'))
+    - append: 같은 봉(start 동일)이면 덮어쓰기, 더 새 봉이면 추가, 과거 봉은 무시
+    - 같은 메모리를 NumPy 배열로도 봄(복사 없음) → CandleStore.matrix() 가 최근 n봉을 한 번에 꺼냄
+    """
+
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self._cols = {f: array("d", bytes(8 * capacity)) for f in FIELDS}
+        self._views = {f: np.frombuffer(self._cols[f], dtype=np.float64) for f in FIELDS}
+        self._head = 0      # 다음에 쓸 위치
+        self.size = 0
+
+    def _idx(self, i: int):
+        """i: 0=가장 오래된 봉 ... size-1=최신 봉"""
+        return (self._head - self.size + i) % self.capacity
+
+    def last_start(self):
+        if not self.size:
+            return None
+        return self._cols["start"][self._idx(self.size - 1)]
+
+    def append(self, c: dict):
+        start = float(c["start"])
+        last = self.last_start()
+        if last is not None and start < last:
+            return
+        if last is not None and start == last:
+            pos = self._idx(self.size - 1)
+        else:
+            pos = self._head
+            self._head = (self._head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+        for f in FIELDS:
+            self._cols[f][pos] = float(c.get(f, 0) or 0)
+
+    def update_last(self, price: float, volume: float = 0.0):
+        """스트리밍 체결로 최신 봉 고가/저가/종가/거래량 갱신"""
+        if not self.size:
+            return
+        pos = self._idx(self.size - 1)
+        cols = self._cols
+        if price > cols["high"][pos]:
+            cols["high"][pos] = price
+        if price < cols["low"][pos]:
+            cols["low"][pos] = price
+        cols["close"][pos] = price
+        cols["volume"][pos] += volume
+
+    def last(self, n: int = 1):
+        """최근 n개 봉 → 오래된 것부터 dict 리스트"""
+        n = min(n, self.size)
+        out = []
+        for i in range(self.size - n, self.size):
+            pos = self._idx(i)
+            out.append({f: self._cols[f][pos] for f in FIELDS})
+        return out
+
+    def positions(self, n: int):
+        """최근 n개 봉의 배열 위치 (오래된 것부터)"""
+        n = min(n, self.size)
+        return (self._head - n + np.arange(n)) % self.capacity
+
+    def column(self, field: str, n: int = None):
+        """최근 n개 봉의 필드 값(오래된 것부터) 리스트"""
+        n = self.size if n is None else min(n, self.size)
+        col = self._cols[field]
+        return [col[self._idx(i)] for i in range(self.size - n, self.size)]
+
+
+class CandleStore:
+    """
+    ✅ 마켓별 캔들 캐시 (증분 갱신)
+    - sync(): 마켓별로 마지막 봉 이후 새 봉만 REST 로 가져옴(마지막 봉은 확정값으로 재조회)
+    - on_trade(): WebSocket 체결로 현재 봉을 직접 만들어 감 → 봉 전체를 체결로 본 마켓은
+      다음 봉 경계에서 REST 조회 생략
+    - roll(): 봉 경계를 지났으면 한 번에 전 후보 동기화 후 True
+      (새 봉이 아직 안 생긴 마켓은 retry_seconds 마다 그 마켓만 재조회)
+    """
+
+    def __init__(self, interval: str = "minute60", capacity: int = 200, warmup: int = 2,
+                 max_workers: int = 8, retry_seconds: float = 10.0, fetch=None):
+        self.interval = interval
+        self.seconds = interval_seconds(interval)
+        self.capacity = capacity
+        self.warmup = max(2, warmup)       # 처음 받는 봉 수 (적응형 K/ATR 창 길이만큼)
+        self.max_workers = max_workers
+        self.retry_seconds = retry_seconds
+        self.fetch = fetch or get_candles   # (market, interval, count) → 캔들 리스트 (리플레이는 기록에서)
+
+        self._lock = threading.RLock()      # 링 변경(WS 스레드 on_trade / 루프 sync)과 행렬 읽기 사이
+        self._rings = {}         # market -> CandleRing
+        self._stream_from = {}   # market -> 체결로 온전히 관측한 첫 봉 시작(epoch)
+        self._bar = None         # 마지막으로 동기화한 봉 시작
+        self._pending = set()    # 이번 봉이 아직 없는 마켓
+        self._synced_at = 0.0
+        self.fetch_count = 0
+        self.version = 0         # 캐시 내용이 바뀔 때마다 증가 (matrix 캐시 무효화)
+        self._matrix = (None, None)
+
+    def bar_start(self, ts: float = None):
+        return bar_start(self.interval, ts)
+
+    def ring(self, market: str):
+        with self._lock:
+            r = self._rings.get(market)
+            if r is None:
+                r = self._rings[market] = CandleRing(self.capacity)
+            return r
+
+    # ------------------------------------------
+    # REST 증분 동기화
+    # ------------------------------------------
+    def _needed(self, market: str, bar: int):
+        """이번 봉 기준 가져와야 할 캔들 수 (0 = 체결로 충분)"""
+        r = self.ring(market)
+        last = r.last_start()
+        if last is None or r.size < self.warmup:
+            return self.warmup
+        stream_from = self._stream_from.get(market)
+        if last >= bar and stream_from is not None and stream_from <= bar - self.seconds:
+            return 0
+        missing = int((bar - last) // self.seconds) + 1   # 새 봉 + 직전 봉 확정값
+        return max(1, min(missing, self.capacity))
+
+    def sync(self, markets, ts: float = None):
+        """
+        반환: errors{market: 사유}
+        """
+        bar = self.bar_start(ts)
+        plan = {m: self._needed(m, bar) for m in markets}
+        todo = [m for m, n in plan.items() if n > 0]
+
+        results, errors = fetch_concurrently(
+            todo, lambda m: self.fetch(m, self.interval, count=plan[m]), max_workers=self.max_workers
+        )
+        self.fetch_count += len(todo)
+        with self._lock:
+            for m, rows in results.items():
+                r = self.ring(m)
+                for c in rows:
+                    if c.get("start") is not None:
+                        r.append(c)
+        if self._bar != bar:
+            self._pending = set()
+        self._bar = bar
+        self._synced_at = time.time()
+        self.version += 1
+        self._pending |= {m for m in markets if self.ring(m).last_start() != bar}
+        self._pending -= {m for m in markets if self.ring(m).last_start() == bar}
+        return errors
+
+    def roll(self, markets, ts: float = None):
+        """
+        봉 경계를 새로 넘었거나, 새 봉이 없던 마켓의 재시도 시점이면 sync 후 (True, errors)
+        아니면 (False, {})
+        """
+        bar = self.bar_start(ts)
+        if self._bar is None or bar > self._bar:
+            return True, self.sync(markets, ts)
+
+        # 스트리밍 체결로 새 봉이 생긴 마켓은 재시도 대상에서 제외
+        self._pending = {m for m in self._pending if self.ring(m).last_start() != bar}
+        pending = [m for m in markets if m in self._pending]
+        if pending and time.time() - self._synced_at >= self.retry_seconds:
+            return True, self.sync(pending, ts)
+        return False, {}
+
+    # ------------------------------------------
+    # 체크포인트 (재시작 시 REST 재조회 생략)
+    # ------------------------------------------
+    def export(self, markets, n: int = None):
+        """{"bar": 마지막 동기화 봉, "markets": {market: 최근 n봉(기본 warmup)}}"""
+        n = n or self.warmup
+        with self._lock:
+            return {
+                "bar": self._bar,
+                "markets": {m: self._rings[m].last(n) for m in markets if m in self._rings and self._rings[m].size},
+            }
+
+    def restore(self, data: dict):
+        """export() 결과를 캐시에 다시 넣음 (같은 봉이면 다음 roll 까지 재조회 없음)"""
+        with self._lock:
+            for m, rows in (data.get("markets") or {}).items():
+                r = self.ring(m)
+                for c in rows:
+                    r.append(c)
+            self.version += 1
+        bar = data.get("bar")
+        if bar is not None:
+            self._bar = bar
+            self._synced_at = time.time()
+            self._pending = {m for m in data.get("markets") or {} if self.ring(m).last_start() != bar}
+
+    # ------------------------------------------
+    # 스트리밍 체결로 봉 만들기
+    # ------------------------------------------
+    def on_trade(self, market: str, price: float, volume: float = 0.0, ts: float = None):
+        """WS 스레드에서 호출 → 링 변경은 락 안에서 (루프의 sync/matrix 와 겹치지 않게)"""
+        ts = time.time() if ts is None else ts
+        bar = self.bar_start(ts)
+        with self._lock:
+            r = self.ring(market)
+            last = r.last_start()
+            if last is None:
+                # 첫 체결: 이번 봉은 중간부터라 불완전 → 다음 봉부터 신뢰
+                self._stream_from.setdefault(market, bar + self.seconds)
+                return
+            if bar > last:
+                # ✅ 봉 마감/새 봉 시작일 때만 version 증가 (체결마다 올리면 matrix 캐시가 매번 무효화)
+                r.append({"start": bar, "open": price, "high": price, "low": price, "close": price, "volume": volume})
+                self.version += 1
+                if bar - last > self.seconds:
+                    # 봉이 비었음(체결 누락 가능) → 다음 봉부터 다시 신뢰
+                    self._stream_from[market] = bar + self.seconds
+            elif bar == last:
+                r.update_last(price, volume)
+            if market not in self._stream_from:
+                self._stream_from[market] = bar + self.seconds
+
+    # ------------------------------------------
+    # 목표가 (전 후보 행렬 연산)
+    # ------------------------------------------
+    def matrix(self, markets, n: int):
+        """
+        최근 n봉 행렬 {field: (M, n)} (오래된 것부터, 마지막 열 = 최신 봉, 봉이 모자라면 앞쪽 NaN)
+        캐시 내용(version)과 마켓 목록이 같으면 직전 결과 재사용
+        (진행 중인 봉의 고가/저가/종가/거래량은 봉이 바뀔 때까지 캐시 시점 값 - 목표가는 이번 봉 시가만 씀)
+        """
+        with self._lock:
+            key = (tuple(markets), n, self.version)
+            if self._matrix[0] == key:
+                return self._matrix[1]
+            out = {f: np.full((len(key[0]), n), np.nan) for f in FIELDS}
+            for i, m in enumerate(key[0]):
+                r = self._rings.get(m)
+                if r is None or not r.size:
+                    continue
+                pos = r.positions(n)
+                k = len(pos)
+                for f, view in r._views.items():
+                    out[f][i, n - k:] = view[pos]
+            self._matrix = (key, out)
+            return out
+
+    def targets(self, markets, k: float, noise_window: int = 0, atr_window: int = 0):
+        """
+        ✅ 전 후보 한 번에: 목표가 = 이번 봉 시가 + 범위 * K
+        (기본: 범위 = 직전 봉 고가-저가, K = 고정값 → 기존 전략과 동일)
+        이번 봉(현재 시각 기준)이 아직 없는 마켓은 제외
+        """
+        markets = list(markets)
+        if not markets:
+            return {}
+        n = max(2, noise_window + 1, atr_window + 2)
+        mat = self.matrix(markets, n)
+        target = breakout_targets(mat, k, noise_window, atr_window)
+        ok = (mat["start"][:, -1] == self.bar_start()) & np.isfinite(mat["start"][:, -2]) & np.isfinite(target)
+        return {markets[i]: float(target[i]) for i in np.flatnonzero(ok)}
+
+
+def breakout_targets(mat: dict, k: float, noise_window: int = 0, atr_window: int = 0):
+    """
+    matrix() 결과 → (M,) 목표가 (마지막 열 = 이번 봉, 그 앞은 확정된 봉)
+    - noise_window > 0: 마켓별 K = 직전 N봉 평균 노이즈 비율 (1 - |종가-시가| / (고가-저가)),
+      계산 불가(봉 부족/고가=저가)면 고정 k
+    - atr_window > 0: 범위 = 직전 N봉 ATR (True Range 평균), 아니면 직전 봉 고가-저가
+    """
+    o, h, l, c = mat["open"], mat["high"], mat["low"], mat["close"]
+    rng = h[:, :-1] - l[:, :-1]
+
+    def row_mean(x):
+        """행별 NaN 제외 평균 (전부 NaN 이면 NaN)"""
+        ok = np.isfinite(x)
+        n = ok.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(n > 0, np.where(ok, x, 0.0).sum(axis=1) / n, np.nan)
+
+    kk = k
+    if noise_window > 0:
+        w = slice(-noise_window - 1, -1)
+        span = rng[:, -noise_window:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            noise = 1 - np.abs(c[:, w] - o[:, w]) / np.where(span > 0, span, np.nan)
+        kk = row_mean(noise)
+        kk = np.where(np.isfinite(kk), kk, k)
+
+    if atr_window > 0:
+        hw, lw = h[:, -atr_window - 1:-1], l[:, -atr_window - 1:-1]
+        pc = c[:, -atr_window - 2:-2]
+        tr = np.fmax(hw - lw, np.fmax(np.abs(hw - pc), np.abs(lw - pc)))
+        span = row_mean(tr)
+    else:
+        span = rng[:, -1]
+    return o[:, -1] + span * kk
+
+
+class MultiCandleStore:
+    """
+    ✅ 여러 봉 간격 캔들 캐시 묶음 (CandleStore 와 같은 인터페이스, 예: minute15 + minute60 + day)
+    - 첫 간격이 기본 (ring/export/bar_start/리플레이 기록은 기본 간격 기준)
+    - targets(): 간격별 목표가를 combine 으로 합침
+      max = 모든 간격에서 돌파해야 매수, min = 하나라도 돌파하면 매수
+    - 목표가는 모든 간격에 이번 봉이 있는 마켓만
+    """
+
+    def __init__(self, intervals, combine: str = "max", **kw):
+        self.stores = [CandleStore(iv, **kw) for iv in intervals]
+        self.primary = self.stores[0]
+        self.interval = self.primary.interval
+        self.seconds = self.primary.seconds
+        self.combine = np.fmax if combine == "max" else np.fmin
+        self.fetch = self.primary.fetch
+
+    @property
+    def fetch_count(self):
+        return sum(s.fetch_count for s in self.stores)
+
+    def bar_start(self, ts: float = None):
+        return self.primary.bar_start(ts)
+
+    def ring(self, market: str):
+        return self.primary.ring(market)
+
+    def _merge_errors(self, results):
+        errors = {}
+        for store, errs in zip(self.stores, results):
+            for m, e in errs.items():
+                errors[m] = f"{store.interval}: {e}"
+        return errors
+
+    def sync(self, markets, ts: float = None):
+        markets = list(markets)
+        return self._merge_errors([s.sync(markets, ts) for s in self.stores])
+
+    def roll(self, markets, ts: float = None):
+        markets = list(markets)
+        results = [s.roll(markets, ts) for s in self.stores]
+        return any(r for r, _ in results), self._merge_errors([e for _, e in results])
+
+    def on_trade(self, market: str, price: float, volume: float = 0.0, ts: float = None):
+        for s in self.stores:
+            s.on_trade(market, price, volume, ts)
+
+    def export(self, markets, n: int = None):
+        out = self.primary.export(markets, n)
+        out["intervals"] = {s.interval: s.export(markets, n) for s in self.stores[1:]}
+        return out
+
+    def restore(self, data: dict):
+        self.primary.restore(data)
+        for s in self.stores[1:]:
+            sub = (data.get("intervals") or {}).get(s.interval)
+            if sub:
+                s.restore(sub)
+
+    def targets(self, markets, k: float, noise_window: int = 0, atr_window: int = 0):
+        per = [s.targets(markets, k, noise_window, atr_window) for s in self.stores]
+        out = {}
+        for m in per[0]:
+            levels = [p.get(m) for p in per]
+            if all(v is not None for v in levels):
+                out[m] = float(self.combine.reduce(np.array(levels)))
+        return out
@@ -0,0 +1,47 @@
+import os
+import json
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoint:
+    """
+    ✅ 엔진 재시작용 상태 파일 (state/checkpoint.json)
+    - 쿨다운/리셋 날짜/리포트 키/후보/목표가/최근 캔들처럼 작은 상태만 저장
+    - 내용이 바뀌었을 때만 임시파일 → fsync → os.replace (중간에 죽어도 이전 파일 그대로)
+    - load(): 없거나 깨졌거나 형식 버전이 다르면 None
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._last = None
+        self.saves = 0
+
+    def save(self, state: dict):
+        """바뀐 내용이 있으면 쓰고 True"""
+        data = json.dumps({"checkpoint_version": CHECKPOINT_VERSION, **state},
+                          ensure_ascii=False, sort_keys=True, default=str)
+        if data == self._last:
+            return False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.path)
+        self._last = data
+        self.saves += 1
+        return True
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                data = fp.read()
+            state = json.loads(data)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("checkpoint_version") != CHECKPOINT_VERSION:
+            return None
+        self._last = data
+        return state
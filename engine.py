@@ -0,0 +1,1280 @@
+"""
+자동매매 엔진 (Streamlit 없이 단독 실행)
+
+- 매매 루프/주문/알림/기록은 전부 이 프로세스에서 실행
+- 화면용 상태(보유/목표가/손익/최근 거래)는 StateStore 스냅샷(state/state.json)으로 내보냄
+  → Streamlit(test.py)은 그 파일만 읽는 대시보드 (화면 작업이 주문 판단을 늦추지 않음)
+- 대시보드의 전량매도 버튼은 state/commands/ 에 명령 파일을 넣고, 엔진이 루프 사이에 처리
+
+    python engine.py                                # .streamlit/secrets.toml 사용
+    python engine.py --secrets my.toml --state-dir state
+    python engine.py sell-all                       # 엔진 없이 전량매도만 1회
+    python engine.py --secrets strategies/a.toml --feed coin_feed   # feed.py 공유 시세로 (전략 워커)
+"""
+import os
+import sys
+import time
+import signal
+import datetime
+import argparse
+import dataclasses
+from concurrent.futures import Future, ThreadPoolExecutor
+from zoneinfo import ZoneInfo  # ✅ KST
+
+from upbit_api import client, UpbitPrivate, get_price_snapshot
+from portfolio import PortfolioState
+from candles import CandleStore, MultiCandleStore
+from journal import TradeJournal
+from trade_window import RecordWindow
+from notifier import DiscordNotifier, HIGH, LOW
+from state_store import StateStore
+from checkpoint import Checkpoint
+from executor import Fill, Order, OrderExecutor
+from universe import UniverseScanner
+from metrics import metrics, serve_metrics
+from triggers import TriggerBook, UP, DOWN, breakout_strength
+from recorder import MarketRecorder
+
+# ✅ 한국시간(KST) 고정
+KST = ZoneInfo("Asia/Seoul")
+
+def now_kst():
+    return datetime.datetime.now(KST)
+
+def fmt_kst(dt: datetime.datetime):
+    return dt.astimezone(KST).strftime("%Y-%m-%d %H:%M:%S")
+
+def fmt_ts(ts: float):
+    # epoch(초) → KST 문자열
+    return fmt_kst(datetime.datetime.fromtimestamp(ts, KST))
+
+ENGINE_VERSION = "V3.4"
+
+# ------------------------------------------
+# [전략 설정]  (✅ 기존 기준 유지)
+# ------------------------------------------
+TARGET_INTERVAL = "minute60"
+K_VALUE = 0.15
+
+STOP_LOSS_PCT = 0.02
+TAKE_PROFIT_PCT = 0.02
+MAX_HOLDINGS = 5
+MAX_BUY_AMOUNT = 15000
+CANDIDATE_SIZE = 20
+UNIVERSE_SCAN_SECONDS = 60      # 전 마켓 거래대금 재조회 주기 (후보가 바뀌면 루프에 반영)
+TARGET_FETCH_WORKERS = 8
+CANDLE_RETRY_SECONDS = 10       # 새 봉이 아직 없던 마켓 캔들 재조회 간격
+
+RESET_HOUR = 9
+RESET_WINDOW_MINUTES = 5
+RESET_PREWARM_MINUTES = 5       # 리셋 이 시간 전부터 다음 세션 후보/캔들 미리 받고 청산 주문 준비
+COOLDOWN_SECONDS = 180
+
+MIN_ORDER_KRW = 5000
+
+# ------------------------------------------
+# [실시간 시세 / 잔고 / 기록]
+# ------------------------------------------
+LOOP_INTERVAL_SECONDS = 2       # 스트리밍 사용 시에도 리포트/리셋 체크 주기
+WS_PRICE_MAX_AGE = 10           # 이 시간(초)보다 오래된 스트림 가격은 REST 로 보충
+BALANCE_TTL_SECONDS = 10        # get_balances 1회를 틱 동안 공유, 주문 시/TTL 만료 시만 재조회
+BUY_SUMMARY_PRICE_REFRESH_SECONDS = 30   # 기록 변화 없을 때 평가금액만 갱신하는 주기
+ORDER_WORKERS = 5               # 동시 접수 주문 수 (초당 주문 한도는 upbit_api 버킷이 지킴)
+FILL_TIMEOUT_SECONDS = 3        # 체결 확인(get_order) 최대 대기 → 넘으면 가격 없이 기록, 다음 틱부터 재확인
+PENDING_FILL_MAX_SECONDS = 600  # 이 시간 넘게 확인 못 한 주문은 확인 실패로 기록하고 그만 조회
+SELL_ALL_RETRY_SECONDS = 10     # 리셋 청산 후 남은 보유가 있으면 이 간격으로 재시도 (끝날 때까지 새 세션 매수 없음)
+SELL_ALL_GIVE_UP_SECONDS = 600  # 이 시간 넘게 못 팔면 남은 보유를 둔 채 새 세션 시작
+NO_SELL_ORDER = "매도 주문 없음(시세 없음/최소 주문금액 미만)"    # 상장폐지/먼지 코인 - 재시도해도 못 팖
+PUBLISH_INTERVAL_SECONDS = 1    # 대시보드 스냅샷 최소 간격
+
+DEFAULT_SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+# secrets.toml 키 → 환경변수 (환경변수가 우선)
+CONFIG_ENV = {
+    "upbit_access": "UPBIT_ACCESS",
+    "upbit_secret": "UPBIT_SECRET",
+    "discord_webhook": "DISCORD_WEBHOOK",
+    "use_websocket": "USE_WEBSOCKET",
+    "journal_path": "JOURNAL_PATH",
+    "state_dir": "STATE_DIR",
+    "metrics_port": "METRICS_PORT",
+    "record_dir": "RECORD_DIR",
+    "candidate_size": "CANDIDATE_SIZE",
+    "trigger_score": "TRIGGER_SCORE",
+    "target_intervals": "TARGET_INTERVALS",
+    "target_combine": "TARGET_COMBINE",
+    "k_noise_window": "K_NOISE_WINDOW",
+    "atr_window": "ATR_WINDOW",
+    "strategy_name": "STRATEGY_NAME",
+    "k_value": "K_VALUE",
+    "stop_loss_pct": "STOP_LOSS_PCT",
+    "take_profit_pct": "TAKE_PROFIT_PCT",
+    "max_holdings": "MAX_HOLDINGS",
+    "max_buy_amount": "MAX_BUY_AMOUNT",
+    "cooldown_seconds": "COOLDOWN_SECONDS",
+}
+
+
+@dataclasses.dataclass
+class EngineConfig:
+    upbit_access: str = ""
+    upbit_secret: str = ""
+    discord_webhook: str = ""
+    use_websocket: bool = False
+    journal_path: str = "trades.db"
+    state_dir: str = "state"
+    metrics_port: int = 9108        # 127.0.0.1:<port>/metrics (Prometheus), 0 = 끄기
+    record_dir: str = "recordings"  # 시세/캔들 기록 (replay.py 재생용), "" = 끄기
+    candidate_size: int = CANDIDATE_SIZE    # 감시 후보 수 (0 = 전체 KRW 마켓)
+    trigger_score: str = "strength"         # 동시 돌파 시 우선순위: strength(돌파 강도) / volume(24h 거래대금)
+    target_intervals: str = TARGET_INTERVAL # 목표가 봉 간격 (쉼표로 여러 개: "minute15,minute60,day")
+    target_combine: str = "max"             # 여러 간격일 때 max = 모두 돌파해야 매수 / min = 하나라도
+    k_noise_window: int = 0                 # >0 이면 마켓별 K = 직전 N봉 평균 노이즈 비율 (0 = k_value 고정)
+    atr_window: int = 0                     # >0 이면 범위 = 직전 N봉 ATR (0 = 직전 봉 고가-저가)
+    # 전략별 파라미터 (feed.py 로 여러 전략/계좌를 같이 돌릴 때 워커마다 다르게)
+    strategy_name: str = ""                 # 디스코드 메시지 앞에 [이름]
+    k_value: float = K_VALUE
+    stop_loss_pct: float = STOP_LOSS_PCT
+    take_profit_pct: float = TAKE_PROFIT_PCT
+    max_holdings: int = MAX_HOLDINGS
+    max_buy_amount: float = MAX_BUY_AMOUNT
+    cooldown_seconds: float = COOLDOWN_SECONDS  # 매수/매도 후 같은 종목 재거래 금지 시간
+
+
+def load_config(path: str = DEFAULT_SECRETS_PATH, **overrides):
+    """
+    Streamlit 과 같은 secrets.toml 을 읽고 환경변수/인자로 덮어씀
+    """
+    values = {}
+    if path and os.path.exists(path):
+        import tomllib
+        with open(path, "rb") as fp:
+            raw = tomllib.load(fp)
+        values.update({k: raw[k] for k in CONFIG_ENV if k in raw})
+    for key, env in CONFIG_ENV.items():
+        if os.environ.get(env):
+            values[key] = os.environ[env]
+    values.update({k: v for k, v in overrides.items() if v is not None})
+
+    if isinstance(values.get("use_websocket"), str):
+        values["use_websocket"] = values["use_websocket"].strip().lower() in ("1", "true", "yes", "on")
+    for key in ("metrics_port", "candidate_size", "k_noise_window", "atr_window", "max_holdings"):
+        if key in values:
+            values[key] = int(values[key])
+    for key in ("k_value", "stop_loss_pct", "take_profit_pct", "max_buy_amount", "cooldown_seconds"):
+        if key in values:
+            values[key] = float(values[key])
+    return EngineConfig(**values)
+
+
+def _buy_row(ts: float, coin: str, buy_amount_krw: float, buy_price: float):
+    return {
+        "buy_time": fmt_ts(ts),
+        "coin": coin,
+        "buy_amount_krw": int(buy_amount_krw),
+        "buy_price": float(buy_price),
+        "qty_est": (float(buy_amount_krw) / float(buy_price)) if buy_price else 0.0,
+    }
+
+def _trade_row(ts: float, side: str, coin: str, price, amount_krw, reason: str):
+    return {
+        "time": fmt_ts(ts),
+        "side": side,
+        "coin": coin,
+        "price": None if price is None else float(price),
+        "amount_krw": None if amount_krw is None else int(amount_krw),
+        "reason": reason,
+    }
+
+
+def calculate_buy_amount(current_holding_count, krw_balance, max_holdings=MAX_HOLDINGS, max_buy_amount=MAX_BUY_AMOUNT):
+    if krw_balance is None:
+        return 0
+    remaining = max_holdings - current_holding_count
+    if remaining <= 0:
+        return 0
+    amount = (float(krw_balance) * 0.999) / remaining
+    return min(amount, max_buy_amount) if amount >= MIN_ORDER_KRW else 0
+
+
+def in_reset_window(now: datetime.datetime):
+    if now.hour != RESET_HOUR:
+        return False
+    return 0 <= now.minute < RESET_WINDOW_MINUTES
+
+
+def reset_at(now: datetime.datetime):
+    """오늘 리셋 시각 (RESET_HOUR:00 KST)"""
+    return now.replace(hour=RESET_HOUR, minute=0, second=0, microsecond=0)
+
+
+def liquidation_done(left):
+    """sell_all 결과: 남은 보유가 없거나 주문 자체가 안 되는 종목뿐이면 True (그 종목 때문에 세션을 막지 않음)"""
+    return left is not None and all(r == NO_SELL_ORDER for r in left.values())
+
+
+def is_cooled_down(ticker: str, cooldown_map: dict, now_ts: float, seconds: float = COOLDOWN_SECONDS):
+    last = cooldown_map.get(ticker)
+    return (last is not None) and (now_ts - last < seconds)
+
+
+class TradingEngine:
+    """
+    ✅ 매매 루프 한 벌 (프로세스당 하나, StateStore 잠금으로 중복 실행 방지)
+    upbit/prices/candle_fetch/universe 를 넘기면 그걸 사용 (replay.py: 기록 시세 + 모의 계좌)
+    """
+
+    def __init__(self, config: EngineConfig, upbit=None, prices=None, candle_fetch=None, universe=None):
+        self.config = config
+        self.upbit = upbit or UpbitPrivate(config.upbit_access, config.upbit_secret)
+        self.prices = prices or get_price_snapshot     # markets → {market: 현재가}
+        self.portfolio = PortfolioState(self.upbit, ttl=BALANCE_TTL_SECONDS, min_order_krw=MIN_ORDER_KRW)
+        self.executor = OrderExecutor(self.upbit, self.portfolio, max_workers=ORDER_WORKERS,
+                                      fill_timeout=FILL_TIMEOUT_SECONDS)
+        self.universe = universe or UniverseScanner(config.candidate_size, interval=UNIVERSE_SCAN_SECONDS)
+        self.candle_store = self.new_candle_store(candle_fetch)
+        self.journal = TradeJournal(config.journal_path)
+        # 429 재시도는 notifier 가 직접 처리(Retry-After/카운트) → 클라이언트 재시도는 끔
+        self.notifier = DiscordNotifier(config.discord_webhook,
+                                        post=lambda u, **kw: client.post(u, retries=0, **kw))
+        self.store = StateStore(config.state_dir) if config.state_dir else None
+        self.checkpoint = Checkpoint(os.path.join(config.state_dir, "checkpoint.json")) if config.state_dir else None
+        self._state_changed = False     # 체크포인트에 남길 상태가 바뀜 → 틱 끝에 저장
+        self.recorder = MarketRecorder(config.record_dir) if config.record_dir else None
+        self.triggers = TriggerBook(score=self.trigger_score(config.trigger_score))
+        self._armed = (None, None)      # sync_triggers 가 마지막으로 반영한 (목표가, 평단)
+
+        # ✅ 09:00 리셋 준비 (다음 세션 후보/캔들/목표가는 백그라운드, 루프는 완성본을 한 번에 교체)
+        self._prep_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reset-prep")
+        self.reset_prep_async = True    # False 면 준비 단계를 루프에서 바로 실행 (replay.py: 결정적 재생)
+        self._session = None            # {"date", "stage": prepare/bar, "future", "candidates", "store"}
+        self._staged_sells = None       # 리셋 직전에 만들어 둔 청산 주문
+        self._liquidation = None        # 리셋 청산이 덜 끝났으면 {"since", "next"} (재시도 중)
+        self.pending_fills = []         # 체결 확인 대기 주문 (가격 없이 기록, 틱마다 재확인)
+        self.last_price_map = {}
+
+        # ✅ 최근 24h 매수 / 12h 매매 메모리 인덱스: 시작 시 저널에서 한 번 적재, 이후 증분 갱신
+        self.buy_window = RecordWindow(24 * 3600, sum_fields=("buy_amount_krw", "qty_est"))
+        self.trade_window = RecordWindow(12 * 3600)
+        try:
+            for r in self.journal.buys_since(time.time() - self.buy_window.span):
+                self.buy_window.add(r["ts"], _buy_row(r["ts"], r["coin"], r["buy_amount_krw"], r["buy_price"]))
+            for r in self.journal.trades_since(time.time() - self.trade_window.span):
+                self.trade_window.add(r["ts"], _trade_row(r["ts"], r["side"], r["coin"], r["price"],
+                                                          r["amount_krw"], r["reason"]))
+        except:
+            pass
+
+        self.candidates = []
+        self.target_prices = {}
+        self.cooldown = {}
+        self.last_reset_date = None
+        self.last_report_key = None     # ✅ 정각/30분 리포트 중복 전송 방지 키 (YYYY-MM-DD HH:MM)
+        self.stream = None
+        self.running = False
+        self.metrics_server = None
+
+        # 대시보드 스냅샷
+        self.started_at = None
+        self.start_holdings = []
+        self.start_trades = []
+        self.last_error = None
+        self._published_at = 0.0
+        self._buy_summary = {"version": None, "at": 0.0, "section": None}
+
+    # ==========================================
+    # 알림 / 기록
+    # ==========================================
+    def send_discord(self, msg: str, priority: int = HIGH):
+        """
+        priority: HIGH(매매/에러) / LOW(상태 리포트 - 밀리면 요약/생략될 수 있음)
+        """
+        t0 = time.perf_counter()
+        try:
+            now = fmt_kst(now_kst())  # ✅ KST 표기
+            name = f"[{self.config.strategy_name}] " if self.config.strategy_name else ""
+            self.notifier.send(f"[{now}] {name}{msg}", priority)
+        except:
+            pass
+        metrics.observe("engine_stage_seconds", time.perf_counter() - t0, stage="notify")
+
+    def add_buy_record(self, coin: str, buy_time: datetime.datetime, buy_amount_krw: float, buy_price: float):
+        try:
+            ts = buy_time.timestamp()
+            self.journal.add_buy(coin, ts, buy_amount_krw, buy_price)
+            self.buy_window.add(ts, _buy_row(ts, coin, buy_amount_krw, buy_price))
+        except:
+            pass
+
+    def add_trade_record(self, side: str, coin: str, price: float, reason: str = "-", amount_krw: float = None):
+        """
+        side: 'BUY' or 'SELL'
+        """
+        try:
+            ts = time.time()
+            trade_id = self.journal.add_trade(side, coin, price=price, reason=reason, amount_krw=amount_krw, ts=ts)
+            row = _trade_row(ts, side, coin, price, amount_krw, reason)
+            self.trade_window.add(ts, row)
+            return trade_id, row
+        except:
+            return None, None
+
+    # ==========================================
+    # 체결 확인 대기 주문
+    # ==========================================
+    def hold_fill(self, fill, side: str, reason: str, avg: float = None, ts: float = None):
+        """
+        체결 확인 못 한 주문: 주문 직전 가격을 체결가로 쓰지 않고 가격 없이 '확인 대기'로 기록
+        → reconcile_fills() 가 다음 틱부터 확인해서 실제 체결가/금액으로 채움
+        """
+        trade_id, row = self.add_trade_record(side, fill.order.market, price=None, reason=f"{reason}(체결 확인 대기)")
+        self.pending_fills.append({"fill": fill, "side": side, "reason": reason, "avg": avg,
+                                   "trade_id": trade_id, "row": row, "ts": time.time() if ts is None else ts})
+        self._state_changed = True
+
+    def reconcile_fills(self):
+        """확인 대기 주문 재조회 → 최종 상태면 기록 확정 (오래 확인 못 하면 확인 실패로 확정)"""
+        if not self.pending_fills:
+            return
+        now_ts = time.time()
+        keep = []
+        for p in self.pending_fills:
+            fill = p["fill"]
+            if self.executor.check(fill):
+                self.settle_fill(p)
+            elif now_ts - p["ts"] > PENDING_FILL_MAX_SECONDS:
+                self.settle_fill(p, failed=True)
+            else:
+                keep.append(p)
+        if len(keep) != len(self.pending_fills):
+            self._state_changed = True
+        self.pending_fills = keep
+
+    def settle_fill(self, p: dict, failed: bool = False):
+        fill, coin, reason, avg = p["fill"], p["fill"].order.market, p["reason"], p["avg"]
+        price, amount = (fill.price, fill.funds) if fill.volume and not failed else (None, None)
+        if failed:
+            reason = f"{reason}(체결 확인 실패)"
+            self.send_discord(f"❗ {coin} 주문 체결을 {PENDING_FILL_MAX_SECONDS}초 동안 확인 못 함 (uuid={fill.uuid}) - 잔고 확인 필요")
+        elif price is None:
+            reason = f"{reason}(체결 없음)"
+            self.send_discord(f"⚠️ {coin} 주문 체결 없이 종료 (uuid={fill.uuid}, state={fill.state})")
+        else:
+            if p["side"] == "SELL" and avg:
+                reason = f"{reason}({(price - avg) / avg * 100:.2f}%)"
+            if p["side"] == "BUY":
+                self.add_buy_record(coin, datetime.datetime.fromtimestamp(p["ts"], KST), amount, price)
+            self.send_discord(f"🧾 {coin} {'매수' if p['side'] == 'BUY' else '매도'} 체결 확인 "
+                              f"({int(amount):,} KRW @ {price:,.4g}, {reason})")
+        if p["trade_id"] is not None:
+            self.journal.settle_trade(p["trade_id"], price, amount, reason)
+        if p["row"] is not None:
+            p["row"].update(price=price, amount_krw=None if amount is None else int(amount), reason=reason)
+            self.trade_window.version += 1
+
+    # ==========================================
+    # 후보 / 목표가
+    # ==========================================
+    def get_top_candidates(self, fallback=None):
+        """
+        24h 누적 거래대금 상위 CANDIDATE_SIZE개 (유니버스 스캐너 즉시 갱신).
+        실패 시: fallback(직전 후보)을 반환해서 전략이 갑자기 BTC/ETH로 바뀌지 않도록 함.
+        """
+        try:
+            top = self.universe.scan()
+        except:
+            top = []
+        top = top if top else (fallback or ["KRW-BTC", "KRW-ETH"])
+        self.universe.mark_seen(top)
+        return top
+
+    def apply_universe_changes(self):
+        """
+        ✅ 백그라운드 스캐너가 바꾼 후보를 루프에 반영
+        새로 들어온 종목만 캔들 받아서 목표가 계산, 빠진 종목은 목표가 제거
+        """
+        change = self.universe.poll_changes()
+        if not change:
+            return
+        candidates, added, removed = change
+        if added:
+            errors = self.candle_store.sync(added)
+            self.record_candles(added)
+            targets, errors = self.target_prices_from_cache(added, errors)
+            self.target_prices.update(targets)
+            self.report_target_errors(errors)
+        for coin in removed:
+            self.target_prices.pop(coin, None)
+        self.candidates = candidates
+        self._state_changed = True
+        self.record_candidates()
+        if added or removed:
+            self.send_discord(
+                f"🔄 후보 변경: +{', '.join(added) or '-'} / -{', '.join(removed) or '-'}", LOW)
+
+    def new_candle_store(self, fetch=None):
+        """설정한 봉 간격(들)의 캔들 캐시 (적응형 K/ATR 창 길이만큼 처음에 더 받음)"""
+        c = self.config
+        intervals = [iv.strip() for iv in str(c.target_intervals).split(",") if iv.strip()] or [TARGET_INTERVAL]
+        kw = dict(warmup=max(c.k_noise_window + 1, c.atr_window + 2), max_workers=TARGET_FETCH_WORKERS,
+                  retry_seconds=CANDLE_RETRY_SECONDS, fetch=fetch)
+        if len(intervals) == 1:
+            return CandleStore(intervals[0], **kw)
+        return MultiCandleStore(intervals, combine=c.target_combine, **kw)
+
+    def compute_targets(self, store, candidates):
+        """캐시된 캔들 행렬로 전 후보 목표가 한 번에 (K 고정 또는 마켓별 노이즈 비율)"""
+        return store.targets(candidates, self.config.k_value, noise_window=self.config.k_noise_window,
+                             atr_window=self.config.atr_window)
+
+    def build_target_prices(self, candidates):
+        """
+        60분봉 기준 변동성 돌파 목표가(민감)
+        목표가 = 이번 봉 시가 + (직전 봉 고가-저가)*K
+
+        ✅ 캔들 캐시에 없는 봉만 병렬로 받아온 뒤 전 후보 목표가를 한 번에 계산
+        (업비트 초당 요청 제한은 upbit_api 버킷이 지킴)
+        반환: (targets{coin: 목표가}, errors{coin: 실패사유})  ← 일부 실패해도 나머지는 사용
+        """
+        errors = self.candle_store.sync(candidates)
+        self.record_candles(candidates)
+        return self.target_prices_from_cache(candidates, errors)
+
+    def target_prices_from_cache(self, candidates, errors=None):
+        errors = dict(errors or {})
+        targets = self.compute_targets(self.candle_store, candidates)
+        for coin in candidates:
+            if coin not in targets and coin not in errors and self.candle_store.ring(coin).size < 2:
+                errors[coin] = "캔들 부족"
+        return targets, errors
+
+    def report_target_errors(self, errors: dict):
+        if errors:
+            detail = ", ".join(f"{c}({e})" for c, e in list(errors.items())[:10])
+            self.send_discord(f"⚠️ 목표가 계산 실패 {len(errors)}건: {detail}", LOW)
+
+    # ==========================================
+    # 트리거
+    # ==========================================
+    def trigger_score(self, name: str):
+        """동시에 발동한 트리거 순위 기준"""
+        if name == "volume":
+            return lambda t: self.universe.value(t.market)
+        return breakout_strength
+
+    def sync_triggers(self, my_coins):
+        """
+        목표가나 보유 평단이 바뀌었을 때만 트리거 재등록
+        미보유 후보 = 돌파 매수(목표가 이상), 보유 = 익절(평단+2% 이상)/손절(평단-2% 이하)
+        """
+        avgs = {c: self.portfolio.avg_buy_price(c) for c in my_coins}
+        avgs = {c: a for c, a in avgs.items() if a and a > 0}
+        if self._armed == (self.target_prices, avgs):
+            return
+        self._armed = (dict(self.target_prices), avgs)
+
+        book = self.triggers
+        book.replace("BUY", {c: t for c, t in self.target_prices.items() if c not in my_coins})
+        meta = {c: {"avg": a} for c, a in avgs.items()}
+        tp, sl = self.config.take_profit_pct, self.config.stop_loss_pct
+        book.replace("TAKE_PROFIT", {c: a * (1 + tp) for c, a in avgs.items()}, UP, meta)
+        book.replace("STOP_LOSS", {c: a * (1 - sl) for c, a in avgs.items()}, DOWN, meta)
+
+    # ==========================================
+    # 체크포인트 (빠른 재시작)
+    # ==========================================
+    def checkpoint_state(self):
+        # ✅ 저장 시각은 넣지 않음 → 내용이 같으면 Checkpoint.save 가 쓰기를 건너뜀 (유효성은 봉 기준)
+        return {
+            "engine_version": ENGINE_VERSION,
+            "cooldown": self.cooldown,
+            "last_reset_date": self.last_reset_date,
+            "last_report_key": self.last_report_key,
+            "candidates": self.candidates,
+            "target_prices": self.target_prices,
+            "candles": self.candle_store.export(self.candidates),
+            "pending_fills": [{"uuid": p["fill"].uuid, "side": p["side"], "market": p["fill"].order.market,
+                               "amount": p["fill"].order.amount, "reason": p["reason"], "avg": p["avg"],
+                               "trade_id": p["trade_id"], "ts": p["ts"]} for p in self.pending_fills],
+        }
+
+    def save_checkpoint(self):
+        self._state_changed = False
+        if self.checkpoint is None:
+            return
+        try:
+            self.checkpoint.save(self.checkpoint_state())
+        except Exception as e:
+            self.last_error = f"checkpoint: {e}"
+
+    def restore_checkpoint(self):
+        """
+        쿨다운/리셋 날짜/리포트 키는 항상 복원 (재시작해도 09:00 리셋 중복, 쿨다운 중 재매수 없음)
+        후보/목표가/캔들은 체크포인트가 지금과 같은 봉(→ 같은 세션)일 때만 → 반환: 시장 데이터까지 복원했는지
+        """
+        state = self.checkpoint.load() if self.checkpoint else None
+        if not state:
+            return False
+        now_ts = time.time()
+        self.cooldown.update({c: t for c, t in (state.get("cooldown") or {}).items()
+                              if now_ts - t < self.config.cooldown_seconds})
+        self.last_reset_date = state.get("last_reset_date")
+        self.last_report_key = state.get("last_report_key")
+        for p in state.get("pending_fills") or []:
+            order = Order("bid" if p["side"] == "BUY" else "ask", p["market"], p["amount"])
+            self.pending_fills.append({**p, "fill": Fill(order, uuid=p["uuid"]), "row": None})
+
+        candles = state.get("candles") or {}
+        if not state.get("candidates") or candles.get("bar") != self.candle_store.bar_start():
+            return False
+        self.candidates = list(state["candidates"])
+        self.target_prices = {c: float(t) for c, t in (state.get("target_prices") or {}).items()}
+        self.candle_store.restore(candles)
+        self.universe.mark_seen(self.candidates)
+        return True
+
+    def prepare_targets(self):
+        """후보 순위 → 캔들 → 목표가 (체크포인트가 없거나 오래됐을 때)"""
+        self.candidates = self.get_top_candidates()
+        self.record_candidates()
+        self.target_prices, target_errors = self.build_target_prices(self.candidates)
+        self.report_target_errors(target_errors)
+
+    # ==========================================
+    # 09:00 리셋 준비
+    # ==========================================
+    def _background(self, fn, *args):
+        if self.reset_prep_async:
+            return self._prep_pool.submit(fn, *args)
+        f = Future()
+        try:
+            f.set_result(fn(*args))
+        except Exception as e:
+            f.set_exception(e)
+        return f
+
+    def prepare_session(self):
+        """다음 세션 후보 순위 + 캔들 이력 (새 CandleStore 에 받음, 루프 캐시는 건드리지 않음)"""
+        candidates = self.universe.scan() or self.candidates or ["KRW-BTC", "KRW-ETH"]
+        store = self.new_candle_store(self.candle_store.fetch)
+        store.sync(candidates)
+        return candidates, store
+
+    def finish_session(self, candidates, store):
+        """리셋 후: 새 봉(09:00)과 직전 봉 확정값만 받아 목표가 → (targets, errors)"""
+        errors = store.sync(candidates)
+        targets = self.compute_targets(store, candidates)
+        for coin in candidates:
+            if coin not in targets and coin not in errors and store.ring(coin).size < 2:
+                errors[coin] = "캔들 부족"
+        return targets, errors
+
+    def prewarm_reset(self, now: datetime.datetime, today_str: str):
+        """리셋 RESET_PREWARM_MINUTES 분 전부터: 다음 세션 준비 시작 + 청산 주문 미리 구성"""
+        if self.last_reset_date == today_str:
+            return
+        until = (reset_at(now) - now).total_seconds()
+        if not 0 < until <= RESET_PREWARM_MINUTES * 60:
+            return
+        if self._session is None or self._session["date"] != today_str:
+            self._session = {"date": today_str, "stage": "prepare", "future": self._background(self.prepare_session)}
+        # 잔고 스냅샷 + 직전 틱 시세로 (매 틱 다시 만들어서 리셋 직전 보유를 반영)
+        self._staged_sells = self.liquidation_orders(self.last_price_map)
+
+    def advance_session(self):
+        """
+        리셋 후 매 틱: 백그라운드 준비가 끝났으면 다음 단계 제출, 목표가까지 나왔으면
+        후보/캔들 캐시/목표가를 한 번에 교체. 준비 실패 시 기존 방식(동기 조회)으로.
+        """
+        s = self._session
+        if s is None or self.last_reset_date != s["date"] or not s["future"].done():
+            return
+        try:
+            result = s["future"].result()
+        except Exception as e:
+            self._session = None
+            self.send_discord(f"❗ 리셋 준비 실패, 다시 조회: {e}")
+            self.prepare_targets()
+            self._state_changed = True
+            return
+
+        if s["stage"] == "prepare":
+            s["candidates"], s["store"] = result
+            s["stage"] = "bar"
+            s["future"] = self._background(self.finish_session, s["candidates"], s["store"])
+            return
+
+        targets, errors = result
+        self.candle_store, self.candidates, self.target_prices = s["store"], s["candidates"], targets
+        self._session = None
+        self.universe.mark_seen(self.candidates)
+        self.record_candidates()
+        self.record_candles(self.candidates)
+        self.report_target_errors(errors)
+        self._state_changed = True
+        self.send_discord(f"🌅 새 세션 목표가 준비 ({len(targets)}/{len(self.candidates)}종목)", LOW)
+
+    def session_pending(self):
+        """리셋은 했고 새 세션 목표가는 아직 (이 동안 후보 변경/봉 갱신은 보류, 매수 없음)"""
+        return self._session is not None and self.last_reset_date == self._session["date"]
+
+    def next_wait(self):
+        """다음 틱까지 대기 (리셋 시각이 더 가까우면 그 순간까지 → 준비된 청산 주문 바로 접수)"""
+        now = now_kst()
+        until = (reset_at(now) - now).total_seconds()
+        if 0 < until < LOOP_INTERVAL_SECONDS:
+            return until + 0.01
+        return LOOP_INTERVAL_SECONDS
+
+    # ==========================================
+    # 시세 기록 (replay.py 재생용)
+    # ==========================================
+    def record_candidates(self):
+        if self.recorder:
+            self.recorder.record_event(time.time(), "candidates", markets=list(self.candidates))
+
+    def record_candles(self, markets):
+        """캔들 캐시의 최근 2봉(직전 확정봉 + 이번 봉) = 목표가 계산에 쓴 값"""
+        if self.recorder:
+            store = self.candle_store
+            self.recorder.record_candles(time.time(), {m: store.ring(m).last(2) for m in markets
+                                                       if store.ring(m).size})
+
+    # ==========================================
+    # 잔고 / 손익
+    # ==========================================
+    def get_my_coins(self):
+        """
+        보유 코인 목록(평가금액 5천원 이상) - 잔고 스냅샷 기준
+        """
+        try:
+            return self.portfolio.holdings()
+        except:
+            return []
+
+    def get_holdings_pnl_rows(self, my_coins, price_map=None):
+        """
+        ✅ 보유종목의 매수금액(평단*수량), 평가금액(현재가*수량), 차이(평가-매수)
+        price_map: 이번 틱 가격 스냅샷(없으면 보유종목만 한 번에 조회)
+        """
+        rows = []
+        try:
+            if price_map is None:
+                price_map = self.prices(my_coins)
+            balances = self.portfolio.balances()
+            bal_map = {}
+            for b in balances:
+                cur = b.get("currency")
+                if cur and cur != "KRW":
+                    bal_map[f"KRW-{cur}"] = b
+
+            for coin in my_coins:
+                b = bal_map.get(coin)
+                if not b:
+                    continue
+
+                qty = float(b.get("balance", 0))
+                avg = float(b.get("avg_buy_price", 0))
+                buy_amt = avg * qty
+
+                curr = price_map.get(coin)
+                eval_amt = (float(curr) * qty) if curr else None
+                diff = (eval_amt - buy_amt) if eval_amt is not None else None
+
+                if buy_amt >= MIN_ORDER_KRW:
+                    rows.append({
+                        "종목": coin,
+                        "매수금액(KRW)": int(buy_amt),
+                        "평가금액(KRW)": None if eval_amt is None else int(eval_amt),
+                        "차이(KRW)": None if diff is None else int(diff),
+                    })
+        except:
+            return []
+
+        return rows
+
+    def recent_buys_section(self, price_map=None, force=False):
+        """
+        ✅ 24h 구간 내용(매수 추가/만료)이 바뀌었을 때만 다시 계산
+        (변화가 없으면 평가금액 갱신용으로 BUY_SUMMARY_PRICE_REFRESH_SECONDS 마다)
+        """
+        self.buy_window.evict()
+        now_ts = time.time()
+        state = self._buy_summary
+        if (not force and state["section"] is not None and self.buy_window.version == state["version"]
+                and now_ts - state["at"] < BUY_SUMMARY_PRICE_REFRESH_SECONDS):
+            return state["section"]
+
+        rows = []
+        # ✅ 이번 틱 스냅샷 재사용(없으면 최근 매수 종목만 한 번에 조회)
+        if price_map is None:
+            price_map = self.prices(self.buy_window.coins())
+
+        for r in self.buy_window.rows():
+            coin = r["coin"]
+            buy_amount = float(r["buy_amount_krw"])
+            curr_price = price_map.get(coin)
+
+            qty_est = r["qty_est"]
+            curr_value = (qty_est * curr_price) if (curr_price and qty_est) else None
+            profit = (curr_value - buy_amount) if (curr_value is not None) else None
+
+            rows.append({
+                "매수시간(KST)": r["buy_time"],
+                "종목": coin,
+                "매수금액(KRW)": int(buy_amount),
+                "현재평가금액(KRW)": None if curr_value is None else int(curr_value),
+                "이익(KRW)": None if profit is None else int(profit),
+            })
+
+        # 종목별 누적 합계(증분 집계)로 총액 요약
+        agg = self.buy_window.aggregates()
+        section = {
+            "rows": rows,
+            "coins": len(agg),
+            "total_buy": int(sum(a["buy_amount_krw"] for a in agg.values())),
+            "total_eval": int(sum(a["qty_est"] * price_map[c] for c, a in agg.items() if price_map.get(c))),
+        }
+        state.update(version=self.buy_window.version, at=now_ts, section=section)
+        return section
+
+    def trades_12h_rows(self, my_coins):
+        rows = []
+        self.trade_window.evict()
+        for r in self.trade_window.rows(coins=my_coins):
+            try:
+                rows.append({
+                    "시간(KST)": r["time"],
+                    "구분": r["side"],
+                    "종목": r["coin"],
+                    "가격": r["price"],
+                    "금액(KRW)": r["amount_krw"],
+                    "사유": r["reason"]
+                })
+            except:
+                continue
+        return rows
+
+    # ==========================================
+    # 주문
+    # ==========================================
+    def liquidation_orders(self, price_map=None):
+        """전 보유 종목 시장가 매도 주문 (잔고 스냅샷 기준, price_map 없으면 보유 마켓 현재가 한 번에 조회)"""
+        holdings = {}
+        for b in self.portfolio.balances():
+            if b.get('currency') == "KRW":
+                continue
+            amount = float(b.get('balance', 0))
+            if amount:
+                holdings[f"KRW-{b['currency']}"] = amount
+        if price_map is None:
+            price_map = self.prices(holdings)
+        orders = []
+        for coin, amount in holdings.items():
+            curr = price_map.get(coin)
+            if curr and curr * amount > MIN_ORDER_KRW:
+                orders.append(Order("ask", coin, amount, ref_price=curr))
+        return orders
+
+    def sell_all(self, staged=None, alert=True):
+        """
+        staged: 리셋 직전에 만들어 둔 주문 → 잔고/시세 재조회 없이 바로 접수
+        (그 사이 팔린 종목은 빼고 현재 수량으로, 실패나 남은 보유가 있으면 다시 조회해서 한 번 더)
+        ✅ 잔고를 다시 조회해서 보유가 없을 때만 '완료', 남으면 종목별 사유와 함께 알림(alert)
+        반환: 남은 보유 {market: 사유} (비었으면 전량 매도 완료, 에러로 확인 못 하면 None)
+        """
+        errors = {}
+        try:
+            while True:
+                if staged is None:
+                    self.portfolio.refresh(force=True)
+                    orders = self.liquidation_orders()
+                else:
+                    orders = [dataclasses.replace(o, amount=self.portfolio.quantity(o.market))
+                              for o in staged if self.portfolio.quantity(o.market)]
+
+                # ✅ 전 종목 동시 접수 → 체결 확인
+                for fill in self.executor.execute(orders):
+                    coin = fill.order.market
+                    if fill.error:
+                        errors[coin] = fill.error
+                    elif not fill.confirmed:
+                        errors[coin] = "체결 확인 대기"
+                    else:
+                        errors.pop(coin, None)
+                    self.record_sell(fill, "SELL_ALL")
+
+                self.portfolio.refresh(force=True)
+                left = {c: errors.get(c, NO_SELL_ORDER) for c in self.get_my_coins()}
+                if not left or staged is None:
+                    break
+                staged = None
+        except Exception as e:
+            self.send_discord(f"❗ 전량매도 에러: {e}")
+            return None
+
+        if not left:
+            self.send_discord("🌅 전량 매도 완료.")
+        elif alert:
+            self.send_discord(f"❗ 전량 매도 미완료 - 남은 보유 {len(left)}종목: "
+                              + ", ".join(f"{c}({r})" for c, r in left.items()), HIGH)
+        return left
+
+    def retry_liquidation(self, now_ts: float):
+        """리셋 청산이 덜 끝났으면 주기적으로 다시 매도 (끝날 때까지 새 세션으로 넘어가지 않음 → 매수 없음)"""
+        liq = self._liquidation
+        if liq is None or now_ts < liq["next"]:
+            return
+        left = self.sell_all(alert=False)
+        if liquidation_done(left):
+            self._liquidation = None
+        elif now_ts - liq["since"] > SELL_ALL_GIVE_UP_SECONDS:
+            self._liquidation = None
+            self.send_discord(f"❗ 리셋 청산 {SELL_ALL_GIVE_UP_SECONDS}초 동안 실패 - 남은 보유를 둔 채 새 세션 시작: "
+                              + ", ".join(f"{c}({r})" for c, r in (left or {}).items()), HIGH)
+        else:
+            liq["next"] = now_ts + SELL_ALL_RETRY_SECONDS
+
+    def record_sell(self, fill, reason: str, avg: float = None):
+        """
+        매도 체결 결과 기록 (가격/금액은 실제 체결 평균가/체결금액)
+        avg 를 주면 사유에 실제 수익률을 붙임. 반환: 체결 확인 여부 (확인 대기면 False, 나중에 기록 확정)
+        """
+        coin = fill.order.market
+        if fill.error:
+            self.send_discord(f"❗ {coin} 매도 주문 실패: {fill.error}")
+            return False
+        if not fill.confirmed:
+            self.send_discord(f"⚠️ {coin} 매도 체결 확인 지연 (uuid={fill.uuid}) - 확인되면 체결가로 기록", LOW)
+            self.hold_fill(fill, "SELL", reason, avg)
+            return False
+        if fill.price is None:
+            self.send_discord(f"⚠️ {coin} 매도 주문 체결 없이 종료 (uuid={fill.uuid}, state={fill.state})")
+            return False
+        if avg:
+            reason = f"{reason}({(fill.price - avg) / avg * 100:.2f}%)"
+        self.add_trade_record("SELL", coin, price=fill.price,
+                              amount_krw=fill.funds or None, reason=reason)
+        return True
+
+    def liquidate_on_start(self):
+        try:
+            now_ts = time.time()
+            self.portfolio.refresh(force=True)
+            my_coins = self.get_my_coins()
+            if not my_coins:
+                return
+
+            price_map = self.prices(my_coins)
+            orders = []
+            for coin in my_coins:
+                curr = price_map.get(coin)
+                avg = self.portfolio.avg_buy_price(coin)
+                if curr and avg and avg > 0:
+                    rate = (curr - avg) / avg
+
+                    if rate >= self.config.take_profit_pct or rate <= -self.config.stop_loss_pct:
+                        amt = self.portfolio.quantity(coin)
+                        if amt and curr * amt > MIN_ORDER_KRW:
+                            orders.append(Order("ask", coin, amt, ref_price=curr, meta={"avg": avg}))
+
+            for fill in self.executor.execute(orders):
+                coin = fill.order.market
+                self.cooldown[coin] = now_ts
+                if self.record_sell(fill, "START_LIQUIDATE", avg=fill.order.meta["avg"]):
+                    rate = (fill.price - fill.order.meta["avg"]) / fill.order.meta["avg"]
+                    self.send_discord(f"🧹 [시작청산] {coin} 매도 (수익률 {rate*100:.2f}%)")
+        except Exception as e:
+            self.send_discord(f"❗ 시작청산 에러: {e}")
+
+    def send_status_to_discord(self, candidates, target_prices, my_coins):
+        # 디스코드는 길이 제한 고려해서 요약 형태로
+        mon = ", ".join([f"{c}(T={int(target_prices[c])})" for c in candidates if c in target_prices]) if candidates else "-"
+        hold = ", ".join(my_coins) if my_coins else "-"
+        self.send_discord(
+            "📌 [정각/30분 리포트/KST]\n"
+            f"- 모니터링: {mon}\n"
+            f"- 보유: {hold}",
+            LOW,
+        )
+
+    # ==========================================
+    # 대시보드 스냅샷
+    # ==========================================
+    def publish(self, my_coins, krw_balance, price_map=None, force=False):
+        """StateStore 로 화면용 상태를 내보냄 (PUBLISH_INTERVAL_SECONDS 마다, 실패해도 매매는 계속)"""
+        now_ts = time.time()
+        if self.store is None:
+            return
+        if not force and now_ts - self._published_at < PUBLISH_INTERVAL_SECONDS:
+            return
+        self._published_at = now_ts
+        try:
+            self.store.publish({
+                "ts": now_ts,
+                "pid": os.getpid(),
+                "version": ENGINE_VERSION,
+                "running": self.running,
+                "started_at": self.started_at,
+                "mode": "websocket" if self.stream else "polling",
+                "krw_balance": krw_balance,
+                "candidates": list(self.candidates),
+                "targets": {c: self.target_prices[c] for c in self.candidates if c in self.target_prices},
+                "prices": {c: price_map[c] for c in (price_map or {})},
+                "holdings": self.get_holdings_pnl_rows(my_coins, price_map),
+                "start_holdings": self.start_holdings,
+                "start_trades": self.start_trades,
+                "recent_buys": self.recent_buys_section(price_map),
+                "trades_12h": self.trades_12h_rows(my_coins),
+                "last_report": self.last_report_key,
+                "last_error": self.last_error,
+                "notifier_pending": self.notifier.pending(),
+                "metrics": metrics.snapshot(),
+            })
+        except:
+            pass
+
+    def handle_commands(self):
+        """대시보드에서 넣은 명령 처리"""
+        if self.store is None:
+            return
+        for cmd in self.store.pop_commands():
+            name = cmd.get("name")
+            if name == "sell_all":
+                self.sell_all()
+            elif name == "stop":
+                self.running = False
+
+    # ==========================================
+    # 실행 루프
+    # ==========================================
+    def start(self):
+        self.send_discord(f"🤖 [{ENGINE_VERSION}] 자동매매 가동 시작 (KST)")
+
+        # ✅ 계측: 모든 HTTP 호출 지연/횟수 + /metrics 엔드포인트
+        if metrics.http_observer not in client.observers:
+            client.observers.append(metrics.http_observer)
+        if self.config.metrics_port:
+            try:
+                self.metrics_server = serve_metrics(self.config.metrics_port)
+            except OSError as e:
+                self.send_discord(f"⚠️ metrics 포트 {self.config.metrics_port} 사용 불가: {e}", LOW)
+        t0 = time.perf_counter()
+        self.started_at = time.time()
+        self.running = True
+
+        # ✅ 체크포인트가 유효하면 후보/목표가/캔들 재조회 없이 바로 시작,
+        #    아니면 후보·목표가 준비와 시작 청산(잔고/시세 조회)을 동시에
+        warm = self.restore_checkpoint()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="start") as pool:
+            prepared = None if warm else pool.submit(self.prepare_targets)
+            # 시작 시 보유 정리(전략 유지)
+            pool.submit(self.liquidate_on_start).result()
+            if prepared:
+                prepared.result()
+        if warm:
+            self.record_candidates()
+
+        # ✅ 시작 시: 보유종목 손익 + 보유 종목 기준 최근 12시간 매수/매도 내역
+        my_coins_start = self.get_my_coins()
+        self.start_holdings = self.get_holdings_pnl_rows(my_coins_start)
+        self.start_trades = self.trades_12h_rows(my_coins_start)
+
+        # ✅ 스트리밍 모드: 목표가/익절가/손절가를 가로지르는 틱이 오면 즉시 루프를 깨움
+        if self.config.use_websocket:
+            from upbit_ws import TickerStream
+            # 리셋 때 캔들 캐시가 통째로 바뀌므로 항상 현재 캐시로 전달
+            self.stream = TickerStream(on_trade=lambda *a, **kw: self.candle_store.on_trade(*a, **kw)).start()
+
+        # ✅ 후보 유니버스는 백그라운드에서 주기적으로 재순위
+        self.universe.start()
+
+        self.save_checkpoint()
+        self.publish(my_coins_start, self.portfolio.krw_balance(), force=True)
+        elapsed = time.perf_counter() - t0
+        metrics.observe("engine_start_seconds", elapsed, mode="warm" if warm else "cold")
+        self.send_discord(f"⚡ 준비 완료 {elapsed:.2f}s ({'체크포인트 복원' if warm else '새로 조회'})", LOW)
+
+    def tick(self):
+        now = now_kst()          # ✅ KST
+        now_ts = time.time()
+        portfolio, stream = self.portfolio, self.stream
+        lap = metrics.laps()     # ✅ 단계별 소요시간 (engine_stage_seconds{stage})
+
+        # 지난 틱까지 체결 확인 못 한 주문 재조회 (루프는 확인을 기다리지 않음)
+        self.reconcile_fills()
+
+        # 09:00 리셋 (기존 전략 유지) - 다음 세션 후보/캔들은 리셋 전에 미리, 청산 주문도 미리 구성
+        today_str = now.strftime("%Y-%m-%d")
+        self.prewarm_reset(now, today_str)
+        if in_reset_window(now) and self.last_reset_date != today_str:
+            left = self.sell_all(self._staged_sells)
+            self._staged_sells = None
+            if not liquidation_done(left):
+                self._liquidation = {"since": now_ts, "next": now_ts + SELL_ALL_RETRY_SECONDS}
+            self.last_reset_date = today_str
+            self.cooldown.clear()
+            self.target_prices = {}     # 새 봉 목표가로 교체될 때까지 매수 없음
+            if self._session is None or self._session["date"] != today_str:
+                # 리셋 직전에 켜진 경우 등: 지금부터 준비
+                self._session = {"date": today_str, "stage": "prepare", "future": self._background(self.prepare_session)}
+            self.save_checkpoint()      # ✅ 리셋 완료 즉시 (재시작해도 오늘 리셋 반복 안 함)
+        self.retry_liquidation(now_ts)
+        if self._liquidation is None:
+            self.advance_session()
+        pending = self.session_pending()
+        lap("reset")
+
+        # ✅ 장중 거래대금 급증 종목 반영 (스캐너가 후보를 바꿨을 때만)
+        if not pending:
+            self.apply_universe_changes()
+        candidates, cooldown = self.candidates, self.cooldown
+        lap("universe")
+
+        # ✅ 매 봉 경계(60분봉=정시): 새 봉만 받아 전 후보 목표가를 한 번에 재계산
+        candle_store = self.candle_store
+        rolled, candle_errors = (False, {}) if pending else candle_store.roll(candidates)
+        if rolled:
+            self._state_changed = True
+            self.record_candles(set(candidates) | set(self.get_my_coins()))
+            self.target_prices, target_errors = self.target_prices_from_cache(candidates, candle_errors)
+            self.report_target_errors(target_errors)
+        target_prices = self.target_prices
+        lap("candles")
+
+        # ✅ 잔고는 틱당 최대 1회(get_balances) - 주문 후/TTL 만료 시에만 재조회
+        portfolio.refresh()
+        my_coins = self.get_my_coins()
+        krw_balance = portfolio.krw_balance()
+        lap("balance")
+
+        # ✅ 틱당 1회: 후보/보유/최근매수 종목 현재가를 한 번에 조회해서 모두 공유
+        markets = set(candidates) | set(my_coins) | set(self.buy_window.coins())
+        if stream:
+            stream.set_markets(list(candidates) + list(my_coins))
+            price_map = stream.snapshot(markets, max_age=WS_PRICE_MAX_AGE)
+            missing = markets - set(price_map)
+            if missing:
+                price_map.update(self.prices(missing))
+        else:
+            price_map = self.prices(markets)
+        prices_at = time.time()
+        self.last_price_map = price_map
+        if self.recorder:
+            self.recorder.record_prices(prices_at, price_map)
+        # ✅ 매시 정각(00분)과 30분에 모니터링 종목/목표가/보유 리포트를 디스코드로
+        if now.minute in (0, 30):
+            report_key = now.strftime("%Y-%m-%d %H:%M")
+            if self.last_report_key != report_key:
+                self.send_status_to_discord(candidates, target_prices, my_coins)
+                self.last_report_key = report_key
+                self._state_changed = True
+        lap("prices_report")
+
+        # ✅ 트리거 인덱스: 목표가/평단이 바뀐 종목만 재등록, 이번 스냅샷이 넘은 트리거만 꺼냄(점수 높은 순)
+        self.sync_triggers(my_coins)
+        sells, buys = [], []
+        for t in self.triggers.scan(price_map):
+            if is_cooled_down(t.market, cooldown, now_ts, self.config.cooldown_seconds):
+                continue
+            if t.kind == "BUY":
+                buys.append(t)
+                continue
+
+            # A. 매도 (손절 -2% / 익절 +2% : 매수가(평단) 기준) - 기존 전략 유지
+            coin, avg = t.market, t.meta["avg"]
+            amt = portfolio.quantity(coin)
+            if amt and t.price * amt > MIN_ORDER_KRW and all(o.market != coin for o in sells):
+                sells.append(Order("ask", coin, amt, ref_price=t.price, meta={"avg": avg, "kind": t.kind}))
+        lap("trigger_scan")
+
+        # ✅ 익절/손절 대상은 동시에 접수하고 체결가로 기록
+        for order in sells:
+            self.observe_tick_to_order(order, prices_at)
+        for fill in self.executor.execute(sells):
+            coin, avg = fill.order.market, fill.order.meta["avg"]
+            cooldown[coin] = now_ts
+            if not self.record_sell(fill, fill.order.meta["kind"], avg=avg):
+                continue
+            rate = (fill.price - avg) / avg
+            if fill.order.meta["kind"] == "TAKE_PROFIT":
+                self.send_discord(f"✅ {coin} 익절 완료 (+{self.config.take_profit_pct*100:.1f}%) (체결 {rate*100:.2f}%)")
+            else:
+                self.send_discord(f"⛔ {coin} 손절 완료 (-{self.config.stop_loss_pct*100:.1f}%) (체결 {rate*100:.2f}%)")
+        if sells:
+            self.save_checkpoint()      # ✅ 쿨다운은 주문 직후 바로 남김
+        lap("sell_orders")
+
+        # B. 매수 (기존 매수금액 규칙) - 돌파한 종목을 점수순으로 빈 자리만큼 동시에 접수
+        orders = []
+        held, krw_left = len(my_coins), krw_balance
+        max_holdings, max_buy = self.config.max_holdings, self.config.max_buy_amount
+        for t in buys:
+            if held >= max_holdings:
+                break
+            if t.market in my_coins:
+                continue
+            buy_amount = calculate_buy_amount(held, krw_left, max_holdings, max_buy)
+            if buy_amount < MIN_ORDER_KRW:
+                break
+            orders.append(Order("bid", t.market, buy_amount, ref_price=t.price, meta={"target": t.level}))
+            held += 1
+            krw_left -= buy_amount
+
+        for order in orders:
+            self.observe_tick_to_order(order, prices_at)
+        for fill in self.executor.execute(orders):
+            coin = fill.order.market
+            cooldown[coin] = now_ts
+            if fill.error:
+                self.send_discord(f"❗ {coin} 매수 주문 실패: {fill.error}")
+                continue
+            if not fill.confirmed:
+                # ✅ 직전가/주문금액을 체결값처럼 쓰지 않음 → 확인되면 실제 체결가로 기록
+                self.send_discord(f"⚠️ {coin} 매수 체결 확인 지연 (uuid={fill.uuid}) - 확인되면 체결가로 기록", LOW)
+                self.hold_fill(fill, "BUY", "BREAKOUT_BUY")
+                continue
+            if fill.price is None:
+                self.send_discord(f"⚠️ {coin} 매수 주문 체결 없이 종료 (uuid={fill.uuid}, state={fill.state})")
+                continue
+
+            # ✅ 실제 체결금액/평균가로 기록
+            spent = fill.funds
+            self.send_discord(f"🚀 {coin} 돌파 매수 완료! (체결 {int(spent):,} KRW @ {fill.price:,.4g})")
+
+            self.add_buy_record(
+                coin=coin,
+                buy_time=now_kst(),
+                buy_amount_krw=spent,
+                buy_price=fill.price
+            )
+            self.add_trade_record("BUY", coin, price=fill.price, amount_krw=spent, reason="BREAKOUT_BUY")
+        if orders:
+            self.save_checkpoint()
+        lap("buy")
+
+        # 스트림 트리거용 {coin: (손절가, 익절가/목표가)} - 쿨다운 종목 제외, 살 여력 없으면 매수 레벨 제외
+        levels = {}
+        if stream:
+            cooled = {c for c in cooldown if is_cooled_down(c, cooldown, now_ts, self.config.cooldown_seconds)}
+            can_buy = (len(my_coins) < max_holdings
+                       and calculate_buy_amount(len(my_coins), krw_balance, max_holdings, max_buy) >= MIN_ORDER_KRW)
+            levels = self.triggers.levels(skip=cooled, kinds=None if can_buy else ("TAKE_PROFIT", "STOP_LOSS"))
+
+        # ✅ 화면용 상태는 주문 판단이 끝난 뒤 내보냄
+        self.publish(my_coins, krw_balance, price_map)
+        if self.recorder:
+            self.recorder.maybe_flush()
+        if self._state_changed:
+            self.save_checkpoint()
+        lap("publish")
+        return levels
+
+    def observe_tick_to_order(self, order, prices_at: float):
+        """가격 돌파 관측(스트림 돌파 틱 수신, 없으면 이번 틱 시세 조회) → 주문 접수 직전까지"""
+        seen = (self.stream.crossed_at(order.market) if self.stream else None) or prices_at
+        metrics.observe("tick_to_order_seconds", max(time.time() - seen, 0.0), side=order.side)
+
+    def run(self):
+        self.start()
+        while self.running:
+            try:
+                self.handle_commands()
+                if not self.running:
+                    break
+                t0 = time.perf_counter()
+                levels = self.tick()
+                metrics.observe("engine_tick_seconds", time.perf_counter() - t0)
+                self.last_error = None
+
+                if self.stream:
+                    self.stream.set_levels(levels)
+                    self.stream.wait(self.next_wait())
+                else:
+                    time.sleep(self.next_wait())
+
+            except Exception as e:
+                metrics.inc("engine_errors_total", stage="loop", error=e.__class__.__name__)
+                self.last_error = f"{fmt_kst(now_kst())} {e}"
+                self.send_discord(f"❗ Loop Error: {e}")
+                time.sleep(10)
+
+    def close(self):
+        self.running = False
+        self.universe.stop()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+        if self.stream:
+            self.stream.stop()
+        try:
+            self.publish(self.get_my_coins(), self.portfolio.krw_balance(), force=True)
+        except:
+            pass
+        if self.started_at:
+            self.save_checkpoint()
+        self._prep_pool.shutdown(wait=False, cancel_futures=True)
+        self.executor.shutdown()
+        self.notifier.stop()
+        self.journal.close()
+        if self.recorder:
+            self.recorder.close()
+
+
+def _on_sigterm(signum, frame):
+    """systemd/kill 의 SIGTERM 도 Ctrl+C 처럼 → run() 밖 finally 에서 정리 후 종료"""
+    raise KeyboardInterrupt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="자동매매 엔진 (Streamlit 없이 실행)")
+    ap.add_argument("cmd", nargs="?", default="run", choices=("run", "sell-all"))
+    ap.add_argument("--secrets", default=DEFAULT_SECRETS_PATH, help="secrets.toml 경로")
+    ap.add_argument("--state-dir", default=None)
+    ap.add_argument("--journal", default=None)
+    ap.add_argument("--feed", default=None, help="feed.py 공유메모리 이름 (시세/캔들/후보를 피드에서 받음)")
+    args = ap.parse_args()
+
+    config = load_config(args.secrets, state_dir=args.state_dir, journal_path=args.journal)
+    if not (config.upbit_access and config.upbit_secret):
+        print("❌ upbit_access / upbit_secret 설정이 필요합니다.", file=sys.stderr)
+        return 2
+
+    store = StateStore(config.state_dir)
+    if args.cmd == "run" and not store.acquire_engine_lock():
+        print("❌ 이미 실행 중인 엔진이 있습니다.", file=sys.stderr)
+        return 1
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+    feed = None
+    if args.feed:
+        from feed import SharedFeed, FeedUniverse
+        try:
+            feed = SharedFeed(args.feed)
+        except (FileNotFoundError, RuntimeError) as e:
+            print(f"❌ 피드에 연결할 수 없습니다: {args.feed} ({e})", file=sys.stderr)
+            store.release_engine_lock()
+            return 1
+        # 시세는 피드가 전부 받으므로 워커별 WebSocket 은 쓰지 않음
+        config = dataclasses.replace(config, use_websocket=False)
+        engine = TradingEngine(config, prices=feed.snapshot, candle_fetch=feed.candles,
+                               universe=FeedUniverse(feed, config.candidate_size))
+    else:
+        engine = TradingEngine(config)
+    try:
+        if args.cmd == "sell-all":
+            engine.sell_all()
+        else:
+            engine.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.close()
+        store.release_engine_lock()
+        if feed:
+            feed.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
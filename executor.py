@@ -0,0 +1,169 @@
+import time
+import threading
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+# 업비트 주문 상태: wait(미체결) / watch(예약) / done(체결 완료) / cancel(취소 - 시장가 매수 잔액 반환 포함)
+FINAL_STATES = ("done", "cancel")
+
+
+@dataclasses.dataclass
+class Order:
+    side: str                  # "bid"(매수, amount=KRW) / "ask"(매도, amount=수량)
+    market: str
+    amount: float
+    ref_price: float = None    # 주문 직전 현재가 (지연 계측/알림용, 체결가로 기록하지 않음)
+    meta: dict = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass
+class Fill:
+    order: Order
+    uuid: str = None
+    state: str = None
+    volume: float = 0.0        # 실제 체결 수량
+    funds: float = 0.0         # 실제 체결 금액(KRW, 수수료 제외)
+    fee: float = 0.0
+    error: str = None
+    seconds: float = 0.0       # 접수~체결 확인까지
+
+    @property
+    def ok(self):
+        return self.error is None and self.volume > 0
+
+    @property
+    def confirmed(self):
+        return self.state in FINAL_STATES
+
+    @property
+    def price(self):
+        """체결 평균가 (체결 내역이 없으면 None - 주문 직전 가격으로 대신하지 않음)"""
+        return (self.funds / self.volume) if self.volume else None
+
+
+def parse_order(data: dict):
+    """get_order 응답 → (state, 체결수량, 체결금액, 수수료)"""
+    trades = data.get("trades") or []
+    if trades:
+        volume = sum(float(t.get("volume", 0)) for t in trades)
+        funds = sum(float(t.get("funds", 0)) for t in trades)
+    else:
+        volume = float(data.get("executed_volume") or 0)
+        price = float(data.get("price") or 0)
+        # 시장가 매수(ord_type=price)의 price 는 단가가 아니라 주문 총액
+        funds = (price if data.get("ord_type") == "price" else volume * price) if volume else 0.0
+    return data.get("state"), volume, funds, float(data.get("paid_fee") or 0)
+
+
+class OrderExecutor:
+    """
+    ✅ 시장가 주문 병렬 실행 + UUID 체결 확인
+    - 서로 독립적인 주문은 스레드풀로 동시에 접수 (초당 주문 한도는 upbit_api 'order' 버킷이 지킴)
+    - 접수 후 get_order(uuid) 로 done/cancel 될 때까지 확인 → 실제 체결가/수량 반환
+    - 체결 내역으로 잔고 스냅샷(PortfolioState)을 바로 갱신 → 주문마다 get_balances 재조회 없음
+    """
+
+    def __init__(self, upbit, portfolio=None, max_workers: int = 5,
+                 poll_interval: float = 0.2, fill_timeout: float = 10.0):
+        self.upbit = upbit
+        self.portfolio = portfolio
+        self.poll_interval = poll_interval
+        self.fill_timeout = fill_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.failed = 0
+        self.unconfirmed = 0
+
+    def _place(self, order: Order):
+        if order.side == "bid":
+            return self.upbit.buy_market_order(order.market, order.amount)
+        return self.upbit.sell_market_order(order.market, order.amount)
+
+    def _poll(self, fill: Fill):
+        """get_order 1회 → fill 갱신, 최종 상태면 True"""
+        data = self.upbit.get_order(fill.uuid)
+        if isinstance(data, dict) and data.get("uuid"):
+            fill.state, fill.volume, fill.funds, fill.fee = parse_order(data)
+        return fill.confirmed
+
+    def _settle(self, fill: Fill):
+        order = fill.order
+        if self.portfolio:
+            if fill.confirmed and fill.volume:
+                self.portfolio.apply_fill(order.market, order.side, fill.volume, fill.funds, fill.fee)
+            else:
+                # 확인 못 한 주문은 잔고를 다시 조회해서 맞춤
+                self.portfolio.invalidate()
+
+    def check(self, fill: Fill):
+        """
+        fill_timeout 안에 확인 못 한 주문을 다시 조회 (루프가 다음 틱에 호출)
+        반환: 이번에 최종 상태가 됐으면 True
+        """
+        if fill.confirmed or not fill.uuid:
+            return False
+        try:
+            done = self._poll(fill)
+        except Exception:
+            return False
+        if done:
+            if self.portfolio:
+                # 미확인 시점에 이미 잔고 재조회로 넘겼음 → 체결분을 더하지 않고 다시 조회만
+                self.portfolio.invalidate()
+            with self._lock:
+                self.unconfirmed = max(self.unconfirmed - 1, 0)   # 재시작 후 복원한 주문은 카운트에 없음
+            metrics.inc("orders_total", side=fill.order.side, result=f"late_{fill.state}")
+        return done
+
+    def _run(self, order: Order):
+        t0 = time.monotonic()
+        fill = Fill(order)
+        try:
+            resp = self._place(order)
+        except Exception as e:
+            resp = {"error": str(e)}
+        if not isinstance(resp, dict) or not resp.get("uuid"):
+            err = resp.get("error") if isinstance(resp, dict) else None
+            fill.error = str(err or "주문 접수 실패")
+            with self._lock:
+                self.failed += 1
+            metrics.inc("orders_total", side=order.side, result="rejected")
+            if self.portfolio:
+                self.portfolio.invalidate()
+            fill.seconds = time.monotonic() - t0
+            return fill
+
+        fill.uuid = resp["uuid"]
+        with self._lock:
+            self.submitted += 1
+
+        # 체결 확인 (시장가는 보통 수백 ms 이내)
+        deadline = t0 + self.fill_timeout
+        while not self._poll(fill):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        fill.seconds = time.monotonic() - t0
+
+        self._settle(fill)
+        if not fill.confirmed:
+            with self._lock:
+                self.unconfirmed += 1
+        metrics.observe("order_fill_seconds", fill.seconds, side=order.side)
+        metrics.inc("orders_total", side=order.side, result=fill.state or "unconfirmed")
+        return fill
+
+    def submit(self, order: Order):
+        """Future[Fill]"""
+        return self._pool.submit(self._run, order)
+
+    def execute(self, orders):
+        """주문들을 동시에 접수하고 모두 체결 확인될 때까지 대기 → 주문 순서대로 Fill 리스트"""
+        futures = [self.submit(o) for o in orders]
+        return [f.result() for f in futures]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
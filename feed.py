@@ -0,0 +1,527 @@
+"""
+공유 시세 피드 - 여러 전략 엔진(워커)이 시세/캔들/후보를 한 곳에서 받음
+
+- 피드 프로세스 하나가 전 KRW 마켓 현재가, 거래대금 후보 순위, 후보 캔들을 조회해서
+  공유메모리(SharedFeed)에 게시 → 전략을 늘려도 시세 API 호출은 그대로
+- 워커는 각자 secrets.toml(업비트 키/디스코드/저널/state_dir/전략 파라미터)로 engine.py 를 실행하고,
+  시세/캔들/후보만 공유메모리에서 읽음 (주문/잔고 API 는 워커별 계정 한도)
+
+    python feed.py --workers strategies/a.toml strategies/b.toml     # 피드 + 워커 프로세스
+    python feed.py --candidates 40 --intervals minute60 day           # 피드만
+    python engine.py --secrets strategies/a.toml --feed coin_feed     # 워커를 따로 띄울 때
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import datetime
+import subprocess
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from upbit_api import get_candles, get_price_snapshot, fetch_concurrently
+from candles import CandleStore, FIELDS, bar_start
+from universe import UniverseScanner
+from metrics import metrics, serve_metrics
+import engine as engine_mod
+
+FEED_NAME = "coin_feed"
+FEED_LAYOUT_VERSION = 1
+MAX_MARKETS = 512               # 마켓 행 수 (KRW 마켓 ~250)
+NAME_BYTES = 16                 # 마켓/간격 이름 최대 길이
+FEED_BARS = 30                  # 간격별 마켓당 게시하는 최근 봉 수 (워커가 더 필요하면 --bars)
+PRICE_CHUNK = 100               # 현재가 조회 1회당 마켓 수
+FEED_MAX_AGE_SECONDS = 10       # 이보다 오래된 가격은 워커에 주지 않음 (피드 중단 시 매매 멈춤)
+FEED_BAR_WAIT_SECONDS = 5       # 워커가 새 봉을 요청했는데 피드가 아직 동기화 전이면 기다리는 최대 시간
+FEED_READ_TIMEOUT_SECONDS = 1   # seqlock 이 이보다 오래 쓰는 중이면 피드가 쓰다 죽은 것 → 읽기 포기
+ENGINE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine.py")
+
+# 헤더 int64 칸
+H_SEQ, H_LAYOUT, H_MAX_MARKETS, H_INTERVALS, H_BARS, H_MARKETS, H_CANDIDATES, H_PID = range(8)
+# 시각 float64 칸
+T_PRICES, T_CANDIDATES, T_STARTED = range(3)
+
+
+def _layout(max_markets: int, n_intervals: int, bars: int):
+    """공유메모리 배치 [(이름, dtype, shape)] (앞에서부터 8바이트 정렬로 이어 붙임)"""
+    return [
+        ("header", np.int64, (16,)),
+        ("times", np.float64, (8,)),
+        ("intervals", f"S{NAME_BYTES}", (n_intervals,)),
+        ("synced", np.float64, (n_intervals,)),         # 간격별 피드가 마지막으로 동기화한 봉 시작
+        ("names", f"S{NAME_BYTES}", (max_markets,)),    # 마켓 id → 이름 (추가만, 행 번호 고정)
+        ("prices", np.float64, (max_markets,)),
+        ("values", np.float64, (max_markets,)),         # 24h 거래대금
+        ("candidates", np.int32, (max_markets,)),       # 거래대금 순 마켓 id
+        ("rows", np.int32, (n_intervals, max_markets)),
+        ("candles", np.float64, (n_intervals, max_markets, bars, len(FIELDS))),
+    ]
+
+
+def _views(layout, buf=None):
+    """buf 위에 필드별 numpy 뷰 (buf 없으면 필요한 크기만)"""
+    views, offset = {}, 0
+    for name, dtype, shape in layout:
+        dtype = np.dtype(dtype)
+        if buf is not None:
+            views[name] = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        offset += -(-int(np.prod(shape)) * dtype.itemsize // 8) * 8
+    return views, offset
+
+
+def _pid_alive(pid: int):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+
+class SharedFeed:
+    """
+    ✅ 공유메모리 시세판 (피드 1개가 쓰고 워커 여러 개가 읽음, 복사 없는 numpy 뷰)
+    - seqlock: 쓰기는 seq 를 홀수로 올리고 → 쓰고 → 짝수로, 읽기는 seq 가 짝수이고 전후 같을 때만 채택
+    - 마켓은 id(행 번호)로 고정, 새 상장은 뒤에 추가 → 워커는 마켓 수가 바뀔 때만 이름표를 다시 읽음
+    - 워커 쪽 snapshot()/candles() 는 get_price_snapshot/get_candles 와 같은 형태
+      (TradingEngine(prices=..., candle_fetch=...) 에 그대로 넘김)
+    """
+
+    def __init__(self, name: str = FEED_NAME, intervals=None, bars: int = FEED_BARS,
+                 max_markets: int = MAX_MARKETS, create: bool = False):
+        self.name = name
+        self.owner = create
+        if create:
+            intervals = list(intervals or [engine_mod.TARGET_INTERVAL])
+            layout = _layout(max_markets, len(intervals), bars)
+            self._unlink_stale(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=_views(layout)[1])
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # 3.13 전에는 붙기만 한 프로세스도 종료 시 세그먼트를 지움 → 추적 해제 (정리는 피드가 함)
+            try:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except:
+                pass
+            head = np.ndarray((16,), dtype=np.int64, buffer=self.shm.buf)
+            if head[H_LAYOUT] != FEED_LAYOUT_VERSION:
+                self.shm.close()
+                raise RuntimeError(f"피드 형식이 다릅니다: {name} (layout {int(head[H_LAYOUT])})")
+            max_markets, bars = int(head[H_MAX_MARKETS]), int(head[H_BARS])
+            layout = _layout(max_markets, int(head[H_INTERVALS]), bars)
+
+        self._v, _ = _views(layout, self.shm.buf)
+        self.max_markets = max_markets
+        self.bars = bars
+        self.bar_wait = FEED_BAR_WAIT_SECONDS
+        self.max_age = FEED_MAX_AGE_SECONDS
+        self.read_timeout = FEED_READ_TIMEOUT_SECONDS
+        self._ids = {}          # market -> id
+        self._names = []
+
+        h = self._v["header"]
+        if create:
+            self._v["intervals"][:] = [iv.encode() for iv in intervals]
+            self._v["synced"][:] = 0
+            h[H_MAX_MARKETS], h[H_INTERVALS], h[H_BARS] = max_markets, len(intervals), bars
+            h[H_PID] = os.getpid()
+            self._v["times"][T_STARTED] = time.time()
+            h[H_LAYOUT] = FEED_LAYOUT_VERSION       # 마지막에 써서 워커가 반쯤 만든 세그먼트에 붙지 않게
+        self.intervals = [iv.decode() for iv in self._v["intervals"].tolist()]
+        self._interval_index = {iv: k for k, iv in enumerate(self.intervals)}
+
+    @staticmethod
+    def _unlink_stale(name: str):
+        """비정상 종료한 이전 피드가 남긴 세그먼트 정리 (살아 있는 피드면 에러)"""
+        try:
+            old = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return
+        pid = int(np.ndarray((16,), dtype=np.int64, buffer=old.buf)[H_PID]) if old.size >= 128 else 0
+        if pid and pid != os.getpid() and _pid_alive(pid):
+            old.close()
+            raise RuntimeError(f"이미 실행 중인 피드가 있습니다: {name} (pid {pid})")
+        old.close()
+        old.unlink()
+
+    def close(self):
+        self._v = {}
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------
+    # 쓰기 (피드 프로세스)
+    # ------------------------------------------
+    @contextmanager
+    def _write(self):
+        h = self._v["header"]
+        h[H_SEQ] += 1
+        try:
+            yield
+        finally:
+            h[H_SEQ] += 1
+
+    def _id(self, market: str):
+        i = self._ids.get(market)
+        if i is None:
+            h = self._v["header"]
+            i = int(h[H_MARKETS])
+            if i >= self.max_markets or len(market) > NAME_BYTES:
+                return None
+            self._v["names"][i] = market.encode()
+            self._ids[market] = i
+            self._names.append(market)
+            h[H_MARKETS] = i + 1
+        return i
+
+    def publish_prices(self, price_map: dict, values: dict = None):
+        with self._write():
+            prices, vals = self._v["prices"], self._v["values"]
+            for m, p in price_map.items():
+                i = self._id(m)
+                if i is not None:
+                    prices[i] = p
+            for m, v in (values or {}).items():
+                i = self._id(m)
+                if i is not None:
+                    vals[i] = v
+            self._v["times"][T_PRICES] = time.time()
+
+    def publish_candidates(self, markets):
+        with self._write():
+            ids = [i for i in (self._id(m) for m in markets) if i is not None]
+            self._v["candidates"][:len(ids)] = ids
+            self._v["header"][H_CANDIDATES] = len(ids)
+            self._v["times"][T_CANDIDATES] = time.time()
+
+    def publish_candles(self, k: int, bar: float, rows_by_market: dict):
+        """k: 간격 번호, bar: 이번에 동기화한 봉 시작, rows_by_market{market: 오래된 것부터 봉 dict}"""
+        candles, rows = self._v["candles"][k], self._v["rows"][k]
+        with self._write():
+            for m, bars in rows_by_market.items():
+                i = self._id(m)
+                if i is None:
+                    continue
+                bars = bars[-self.bars:]
+                if bars:
+                    candles[i, :len(bars)] = [[c[f] for f in FIELDS] for c in bars]
+                rows[i] = len(bars)
+            self._v["synced"][k] = bar
+
+    # ------------------------------------------
+    # 읽기 (워커)
+    # ------------------------------------------
+    def read(self, fn):
+        """
+        seqlock 읽기: 쓰는 중이거나 읽는 사이 바뀌었으면 다시 (fn 은 복사본을 반환해야 함)
+        read_timeout 안에 온전히 못 읽으면(피드가 쓰다 죽음) None → 호출한 쪽이 빈 값/직접 조회로 대체
+        """
+        h = self._v["header"]
+        deadline = None
+        while True:
+            seq = int(h[H_SEQ])
+            if not seq & 1:
+                out = fn()
+                if int(h[H_SEQ]) == seq:
+                    return out
+            if deadline is None:
+                deadline = time.monotonic() + self.read_timeout
+            elif time.monotonic() >= deadline:
+                metrics.inc("feed_read_timeouts_total")
+                return None
+            time.sleep(0)
+
+    def names(self):
+        """마켓 id → 이름 (마켓 수가 바뀌었을 때만 다시 읽음)"""
+        n = int(self._v["header"][H_MARKETS])
+        if n != len(self._names):
+            self._names = [b.decode() for b in self._v["names"][:n].tolist()]
+            self._ids = {m: i for i, m in enumerate(self._names)}
+        return self._names
+
+    def market_id(self, market: str):
+        self.names()
+        return self._ids.get(market)
+
+    def age(self):
+        """마지막 가격 게시 후 경과(초)"""
+        at = float(self._v["times"][T_PRICES])
+        return time.time() - at if at else float("inf")
+
+    def snapshot(self, markets):
+        """get_price_snapshot 대체 (피드가 max_age 이상 멈췄으면 빈 dict → 매매 판단 안 함)"""
+        if self.age() > self.max_age:
+            return {}
+        self.names()
+        n = len(self._names)
+        prices = self.read(lambda: self._v["prices"][:n].copy())
+        if prices is None:
+            return {}
+        ids = self._ids
+        out = {}
+        for m in markets:
+            i = ids.get(m)
+            if i is not None and prices[i] > 0:
+                out[m] = float(prices[i])
+        return out
+
+    def candidates(self):
+        """거래대금 순 후보 전체 + {market: 24h 거래대금} (피드가 멈췄으면 빈 값 → 워커는 직전 후보 유지)"""
+        if self.age() > self.max_age:
+            return [], {}
+        names = self.names()
+        n = len(names)
+
+        def read():
+            c = int(self._v["header"][H_CANDIDATES])
+            return self._v["candidates"][:c].copy(), self._v["values"][:n].copy()
+
+        got = self.read(read)
+        if got is None:
+            return [], {}
+        ids, values = got
+        top = [names[i] for i in ids.tolist() if i < n]
+        return top, {m: float(v) for m, v in zip(names, values.tolist()) if v > 0}
+
+    def _wait_bar(self, k: int, interval: str):
+        """이번 봉을 피드가 아직 동기화 전이면 잠깐 기다림 (워커가 봉 경계에서 먼저 깨어난 경우)"""
+        if self.age() > self.max_age:
+            return
+        bar = bar_start(interval)
+        deadline = time.time() + self.bar_wait
+        synced = self._v["synced"]
+        while synced[k] < bar and time.time() < deadline:
+            time.sleep(0.05)
+
+    def candles(self, market: str, interval: str = "minute60", count: int = 2):
+        """
+        get_candles 대체: 최근 count 개 (오래된 것부터, 최대 bars 개)
+        피드가 안 내보내는 간격/마켓이나 피드가 멈췄을 때는 직접 조회 (feed_fallback_total)
+        """
+        k = self._interval_index.get(interval)
+        i = self.market_id(market)
+        if k is not None and i is not None and self.age() <= self.max_age:
+            self._wait_bar(k, interval)
+
+            def read():
+                n = int(self._v["rows"][k, i])
+                take = min(n, count)
+                return self._v["candles"][k, i, n - take:n].copy()
+
+            rows = self.read(read)
+            if rows is not None and len(rows):
+                return [dict(zip(FIELDS, r)) for r in rows.tolist()]
+        metrics.inc("feed_fallback_total", interval=interval)
+        return get_candles(market, interval, count=count)
+
+
+class FeedUniverse(UniverseScanner):
+    """워커용 후보: 피드가 게시한 거래대금 순위에서 앞 size 개 (전 마켓 ticker 조회 없음)"""
+
+    def __init__(self, feed: SharedFeed, size: int = engine_mod.CANDIDATE_SIZE,
+                 interval: float = engine_mod.LOOP_INTERVAL_SECONDS):
+        super().__init__(size, interval=interval)
+        self.feed = feed
+
+    def markets(self, force: bool = False):
+        return list(self.feed.names())
+
+    def scan(self):
+        top, values = self.feed.candidates()
+        self.scan_count += 1
+        if not top:
+            return self.top()
+        top = top[:self.size] if self.size else top
+        with self._lock:
+            self._values = values
+            self._set_top(top)
+            self.scanned_at = time.time()
+            return list(self._top)
+
+
+class MarketFeed:
+    """
+    ✅ 피드 프로세스 루프: 전 KRW 마켓 현재가 / 후보 순위 / 후보 캔들을 SharedFeed 에 게시
+    - 현재가: 틱마다 전 마켓 ticker 를 PRICE_CHUNK 개씩 병렬 조회 (워커 보유 종목도 전부 포함)
+    - 후보: UniverseScanner 백그라운드 순위 (워커는 각자 candidate_size 만큼 앞에서 자름)
+    - 캔들: 간격별 CandleStore 로 후보만 증분 동기화 (봉 경계/재시도/후보 추가 시에만 다시 게시)
+    """
+
+    def __init__(self, shared: SharedFeed, candidate_size: int = engine_mod.CANDIDATE_SIZE):
+        self.shared = shared
+        self.universe = UniverseScanner(candidate_size, interval=engine_mod.UNIVERSE_SCAN_SECONDS)
+        self.stores = [CandleStore(iv, warmup=shared.bars, max_workers=engine_mod.TARGET_FETCH_WORKERS)
+                       for iv in shared.intervals]
+        self.candidates = []
+        self.ticks = 0
+        self.last_error = None
+
+    def start(self):
+        self.universe.scan()
+        self.tick()
+        self.universe.start()
+        return self
+
+    def sync_candles(self, markets, added=()):
+        """봉 경계/재시도면 전 후보, 아니면 새로 들어온 후보만 동기화해서 게시"""
+        for k, store in enumerate(self.stores):
+            changed = markets
+            rolled, errors = store.roll(markets)
+            if not rolled and added:
+                rolled, errors, changed = True, store.sync(added), added
+            if errors:
+                self.last_error = f"{store.interval} 캔들 {len(errors)}개 실패: {next(iter(errors.values()))}"
+            if rolled:
+                self.shared.publish_candles(k, store.bar_start(),
+                                            {m: store.ring(m).last(self.shared.bars) for m in changed})
+
+    def tick(self):
+        lap = metrics.laps("feed_stage_seconds")
+        markets = self.universe.markets()
+        chunks = [tuple(markets[i:i + PRICE_CHUNK]) for i in range(0, len(markets), PRICE_CHUNK)]
+        results, errors = fetch_concurrently(chunks, get_price_snapshot, max_workers=4)
+        prices = {}
+        for snap in results.values():
+            prices.update(snap)
+        if errors:
+            self.last_error = f"ticker: {len(errors)}개 묶음 실패"
+        lap("prices")
+
+        top = self.universe.top()
+        changed = bool(top) and top != self.candidates
+        added = []
+        if changed:
+            prev = set(self.candidates)
+            added = [m for m in top if m not in prev]
+            self.candidates = top
+        self.sync_candles(self.candidates, added)
+        lap("candles")
+
+        # 후보보다 가격을 나중에 게시 → 워커가 새 후보를 보면 그 가격도 이미 있음
+        if prices:
+            self.shared.publish_prices(prices, {m: self.universe.value(m) for m in prices})
+        if changed:
+            self.shared.publish_candidates(self.candidates)
+        lap("publish")
+        self.ticks += 1
+
+
+def spawn_worker(path: str, feed_name: str):
+    """전략 워커 = engine.py --feed (키/설정은 그 워커의 secrets.toml 만 사용)"""
+    # 피드 쪽 UPBIT_ACCESS 등 환경변수가 모든 워커 계정을 덮어쓰지 않도록 빼고 실행
+    env = {k: v for k, v in os.environ.items() if k not in engine_mod.CONFIG_ENV.values()}
+    return subprocess.Popen([sys.executable, ENGINE_SCRIPT, "run", "--secrets", path, "--feed", feed_name],
+                            env=env, start_new_session=True)
+
+
+def check_workers(configs: dict):
+    """워커끼리 같은 state_dir/저널/지표 포트/기록 디렉터리를 쓰면 에러 문자열
+    (기록은 워커마다 자기 후보/보유 기준이라 각자 따로 - 같은 디렉터리면 markets.txt id 가 섞임)"""
+    for key in ("state_dir", "journal_path", "metrics_port", "record_dir"):
+        seen = {}
+        for path, c in configs.items():
+            v = getattr(c, key)
+            if not v:
+                continue
+            if v in seen:
+                return f"{key} 중복: {seen[v]}, {path} ({v})"
+            seen[v] = path
+    return None
+
+
+def _on_sigterm(signum, frame):
+    """SIGTERM 도 Ctrl+C 처럼 → 워커 종료/공유메모리 정리 후 끝냄"""
+    raise KeyboardInterrupt
+
+
+def main():
+    ap = argparse.ArgumentParser(description="공유 시세 피드 (+ 전략 워커 프로세스)")
+    ap.add_argument("--name", default=FEED_NAME, help="공유메모리 이름 (워커 --feed)")
+    ap.add_argument("--workers", nargs="*", default=[], help="워커별 secrets.toml ...")
+    ap.add_argument("--candidates", type=int, default=None, help="게시할 후보 수 (기본: 워커 중 최대, 0 = 전체)")
+    ap.add_argument("--intervals", nargs="+", default=None, help="캔들 간격 (기본: 워커 target_intervals 합집합)")
+    ap.add_argument("--bars", type=int, default=None, help=f"간격별 게시 봉 수 (기본: 워커 필요분, 최소 {FEED_BARS})")
+    ap.add_argument("--metrics-port", type=int, default=0)
+    args = ap.parse_args()
+
+    configs = {p: engine_mod.load_config(p) for p in args.workers}
+    missing = [p for p, c in configs.items() if not (c.upbit_access and c.upbit_secret)]
+    if missing:
+        print(f"❌ upbit_access / upbit_secret 설정이 필요합니다: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    problem = check_workers(configs)
+    if problem:
+        print(f"❌ 워커 설정 충돌 - {problem}", file=sys.stderr)
+        return 2
+
+    # 워커가 필요로 하는 만큼 (후보 수 최대/전체, 간격 합집합, 봉 수 최대)
+    sizes = [c.candidate_size for c in configs.values()]
+    candidate_size = args.candidates if args.candidates is not None else (
+        0 if 0 in sizes else max(sizes, default=engine_mod.CANDIDATE_SIZE))
+    intervals = args.intervals or list(dict.fromkeys(
+        iv.strip() for c in configs.values() for iv in c.target_intervals.split(",") if iv.strip()
+    )) or [engine_mod.TARGET_INTERVAL]
+    bars = args.bars or max([FEED_BARS] + [max(c.k_noise_window + 1, c.atr_window + 2) for c in configs.values()])
+
+    try:
+        shared = SharedFeed(args.name, intervals=intervals, bars=bars, create=True)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    feed = MarketFeed(shared, candidate_size)
+    workers = {}
+    try:
+        t0 = time.perf_counter()
+        feed.start()
+        print(f"feed {args.name}: markets {len(shared.names())}  candidates {len(feed.candidates)}  "
+              f"intervals {','.join(intervals)}  bars {bars}  ({time.perf_counter() - t0:.2f}s)", flush=True)
+        for path in args.workers:
+            workers[path] = spawn_worker(path, args.name)
+            print(f"worker {path}: pid {workers[path].pid}", flush=True)
+
+        while True:
+            t = time.perf_counter()
+            try:
+                feed.tick()
+            except Exception as e:
+                feed.last_error = str(e)
+                metrics.inc("engine_errors_total", stage="feed")
+            if feed.last_error:
+                print(f"[{datetime.datetime.now(engine_mod.KST):%H:%M:%S}] ❗ {feed.last_error}", flush=True)
+                feed.last_error = None
+            for path, proc in list(workers.items()):
+                if proc.poll() is not None:
+                    print(f"worker {path}: 종료 (code {proc.returncode})", flush=True)
+                    del workers[path]
+            if args.workers and not workers:
+                break
+            time.sleep(max(0.0, engine_mod.LOOP_INTERVAL_SECONDS - (time.perf_counter() - t)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in workers.values():
+            proc.terminate()        # 워커는 SIGTERM 을 Ctrl+C 처럼 정리 후 종료
+        for proc in workers.values():
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        feed.universe.stop()
+        shared.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buys (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    coin TEXT NOT NULL,
+    buy_amount_krw INTEGER,
+    buy_price REAL
+);
+CREATE INDEX IF NOT EXISTS buys_ts ON buys(ts);
+CREATE INDEX IF NOT EXISTS buys_coin_ts ON buys(coin, ts);
+
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    side TEXT NOT NULL,
+    coin TEXT NOT NULL,
+    price REAL,
+    amount_krw INTEGER,
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_ts ON trades(ts);
+CREATE INDEX IF NOT EXISTS trades_coin_ts ON trades(coin, ts);
+"""
+
+BUY_COLUMNS = ("id", "ts", "coin", "buy_amount_krw", "buy_price")
+TRADE_COLUMNS = ("id", "ts", "side", "coin", "price", "amount_krw", "reason")
+COLUMNS = {"buys": BUY_COLUMNS, "trades": TRADE_COLUMNS}
+
+
+class TradeJournal:
+    """
+    ✅ 매수/매매 기록 영구 저장 (SQLite WAL, append-only)
+    - add_buy/add_trade 는 메모리 큐에 넣고 바로 반환 → 주문 경로가 디스크를 기다리지 않음
+    - 백그라운드 스레드가 flush_interval 마다 한 트랜잭션으로 묶어서 기록
+    - 조회는 (ts), (coin, ts) 인덱스 범위 쿼리 + 아직 안 쓴 대기분 합침
+      (id 는 기록 시점에 미리 부여 → 커밋 직후 조회해도 중복 없음)
+    - 체결 확인 전 주문은 가격 없이 기록 → settle_trade(id, ...) 로 확정값을 나중에 채움
+    """
+
+    def __init__(self, path: str = "trades.db", flush_interval: float = 0.5, batch_size: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._pending = {"buys": [], "trades": []}     # 아직 커밋 전(쓰는 중 포함)
+        self._inflight = {"buys": [], "trades": []}
+        self._settle = []       # (price, amount_krw, reason, trade id) - 체결 확인 후 갱신
+        self._settle_inflight = []
+        self._wakeup = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._closed = False
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        self._next_id = {
+            t: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {t}").fetchone()[0] + 1 for t in COLUMNS
+        }
+        conn.close()
+
+        self._reader = self._connect()
+        self._reader_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._writer, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ------------------------------------------
+    # 기록 (논블로킹)
+    # ------------------------------------------
+    def _append(self, table: str, row: tuple):
+        with self._lock:
+            row_id = self._next_id[table]
+            self._next_id[table] += 1
+            self._pending[table].append((row_id,) + row)
+            n = len(self._pending[table])
+        if n >= self.batch_size:
+            self._wakeup.set()
+        return row_id
+
+    def add_buy(self, coin: str, ts: float, buy_amount_krw: float, buy_price: float):
+        self._append("buys", (float(ts), coin, int(buy_amount_krw), float(buy_price)))
+
+    def add_trade(self, side: str, coin: str, price: float = None, reason: str = "-",
+                  amount_krw: float = None, ts: float = None):
+        """반환: 기록 id (settle_trade 용)"""
+        return self._append("trades", (
+            time.time() if ts is None else float(ts), side, coin,
+            None if price is None else float(price),
+            None if amount_krw is None else int(amount_krw),
+            reason,
+        ))
+
+    def settle_trade(self, trade_id: int, price: float = None, amount_krw: float = None, reason: str = None):
+        """가격 없이 기록한 매매(체결 확인 대기)를 실제 체결가/금액/사유로 갱신"""
+        with self._lock:
+            self._settle.append((None if price is None else float(price),
+                                 None if amount_krw is None else int(amount_krw), reason, int(trade_id)))
+        self._wakeup.set()
+
+    # ------------------------------------------
+    # 백그라운드 기록
+    # ------------------------------------------
+    def _writer(self):
+        conn = self._connect()
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self._lock:
+                for t in ("buys", "trades"):
+                    self._inflight[t] = self._pending[t]
+                    self._pending[t] = []
+                self._settle_inflight, self._settle = self._settle, []
+                closed = self._closed
+            try:
+                if self._inflight["buys"] or self._inflight["trades"] or self._settle_inflight:
+                    with conn:
+                        for t, cols in COLUMNS.items():
+                            if self._inflight[t]:
+                                conn.executemany(
+                                    f"INSERT OR IGNORE INTO {t} ({','.join(cols)}) VALUES ({','.join('?' * len(cols))})",
+                                    self._inflight[t])
+                        if self._settle_inflight:
+                            conn.executemany("UPDATE trades SET price = ?, amount_krw = ?, reason = ? WHERE id = ?",
+                                             self._settle_inflight)
+                committed = True
+            except sqlite3.Error:
+                committed = False
+            with self._lock:
+                for t in ("buys", "trades"):
+                    if not committed:
+                        # 실패분은 다음 배치에 다시 (순서 유지)
+                        self._pending[t] = self._inflight[t] + self._pending[t]
+                    self._inflight[t] = []
+                if not committed:
+                    self._settle = self._settle_inflight + self._settle
+                self._settle_inflight = []
+                self._flushed.notify_all()
+            if closed:
+                break
+        conn.close()
+
+    def flush(self, timeout: float = 5.0):
+        """대기분이 디스크에 쓰일 때까지 기다림(종료/테스트용)"""
+        deadline = time.time() + timeout
+        with self._lock:
+            while (self._pending["buys"] or self._pending["trades"] or self._settle
+                   or self._inflight["buys"] or self._inflight["trades"] or self._settle_inflight):
+                self._wakeup.set()
+                left = deadline - time.time()
+                if left <= 0 or not self._flushed.wait(left):
+                    return False
+        return True
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        with self._reader_lock:
+            self._reader.close()
+
+    # ------------------------------------------
+    # 조회 (인덱스 범위 쿼리)
+    # ------------------------------------------
+    def _query(self, table: str, since: float, until: float = None, coins=None):
+        columns = COLUMNS[table]
+        sql = f"SELECT {','.join(columns)} FROM {table} WHERE ts >= ?"
+        args = [since]
+        if until is not None:
+            sql += " AND ts < ?"
+            args.append(until)
+        if coins is not None:
+            coins = list(coins)
+            if not coins:
+                return []
+            sql += f" AND coin IN ({','.join('?' * len(coins))})"
+            args.extend(coins)
+        sql += " ORDER BY ts, id"
+
+        with self._lock:
+            extra = self._inflight[table] + self._pending[table]
+            settle = self._settle_inflight + self._settle if table == "trades" else []
+        with self._reader_lock:
+            rows = self._reader.execute(sql, args).fetchall()
+
+        if extra:
+            ci = columns.index("coin")
+            coin_set = set(coins) if coins is not None else None
+            seen = {r[0] for r in rows}
+            for r in extra:
+                if r[0] in seen:
+                    continue
+                if r[1] >= since and (until is None or r[1] < until) and (coin_set is None or r[ci] in coin_set):
+                    rows.append(r)
+            rows.sort(key=lambda r: (r[1], r[0]))
+        out = [dict(zip(columns, r)) for r in rows]
+        if settle:
+            by_id = {r["id"]: r for r in out}
+            for price, amount_krw, reason, trade_id in settle:
+                r = by_id.get(trade_id)
+                if r is not None:
+                    r.update(price=price, amount_krw=amount_krw, reason=reason)
+        return out
+
+    def buys_since(self, since: float, until: float = None, coins=None):
+        return self._query("buys", since, until, coins)
+
+    def trades_since(self, since: float, until: float = None, coins=None):
+        return self._query("trades", since, until, coins)
@@ -0,0 +1,232 @@
+import time
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 초 단위 지연시간 버킷 (0.5ms ~ 30s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "engine_stage_seconds": "매매 루프 단계별 소요시간",
+    "engine_tick_seconds": "매매 루프 1틱 전체 소요시간",
+    "engine_errors_total": "단계별 예외 수",
+    "engine_start_seconds": "엔진 시작~매매 루프 준비까지 (warm=체크포인트 복원)",
+    "tick_to_order_seconds": "가격 돌파 관측 → 주문 접수까지",
+    "order_fill_seconds": "주문 접수 → 체결 확인까지",
+    "orders_total": "주문 결과별 건수",
+    "http_request_seconds": "엔드포인트별 HTTP 지연시간",
+    "http_requests_total": "엔드포인트/상태코드별 HTTP 호출 수",
+    "feed_stage_seconds": "시세 피드 단계별 소요시간",
+    "feed_fallback_total": "워커가 피드에 없는 캔들을 직접 조회한 수",
+    "feed_read_timeouts_total": "피드가 쓰는 중(홀수 seq)에서 멈춰 읽기를 포기한 수",
+}
+
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """고정 버킷 누적 히스토그램 (observe 는 bisect 한 번 + 덧셈)"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)     # 마지막 칸 = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, v: float):
+        self.counts[bisect_left(self.buckets, v)] += 1
+        self.count += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+
+    def quantile(self, q: float):
+        """버킷 안 선형 보간으로 근사한 분위수(초)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lo + (hi - lo) * (rank - seen) / c, self.max)
+            seen += c
+        return self.max
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "t0")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.t0, **self.labels)
+        if exc_type is not None:
+            self.registry.inc("engine_errors_total", **self.labels)
+        return False
+
+
+class _Laps:
+    """구간 계측: lap("단계") 호출 시 직전 lap 이후 경과시간을 stage 라벨로 기록"""
+    __slots__ = ("registry", "name", "t0", "t")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+        self.t0 = self.t = time.perf_counter()
+
+    def __call__(self, stage: str):
+        now = time.perf_counter()
+        self.registry.observe(self.name, now - self.t, stage=stage)
+        self.t = now
+
+    def elapsed(self):
+        return time.perf_counter() - self.t0
+
+
+class Registry:
+    """
+    ✅ 프로세스 공용 지표 저장소 (module 전역 metrics 사용)
+    - 카운터/히스토그램은 (이름, 라벨) 키로 자동 생성
+    - render_prometheus(): Prometheus text 형식, snapshot(): 대시보드용 요약 dict
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._hists = {}
+        self.started_at = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: dict):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, n: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                h = self._hists[key] = Histogram()
+            h.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """with metrics.timer("engine_stage_seconds", stage="sell_scan"): ..."""
+        return _Timer(self, name, labels)
+
+    def laps(self, name: str = "engine_stage_seconds"):
+        """lap = metrics.laps(); ...; lap("reset"); ...; lap("sell_scan")"""
+        return _Laps(self, name)
+
+    def http_observer(self, endpoint: str, seconds: float, status):
+        """upbit_api.client.observers 훅"""
+        self.observe("http_request_seconds", seconds, endpoint=endpoint)
+        self.inc("http_requests_total", endpoint=endpoint, status=str(status or "error"))
+
+    # ------------------------------------------
+    # 내보내기
+    # ------------------------------------------
+    @staticmethod
+    def _fmt_labels(labels, extra=None):
+        items = list(labels) + (list(extra) if extra else [])
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+    def render_prometheus(self):
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: (h.buckets, list(h.counts), h.count, h.sum) for k, h in self._hists.items()}
+
+        lines, typed = [], set()
+        for (name, labels), v in sorted(counters.items()):
+            if name not in typed:
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._fmt_labels(labels)} {v}")
+        for (name, labels), (buckets, counts, count, total) in sorted(hists.items()):
+            if name not in typed:
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cum = 0
+            for b, c in zip(buckets, counts):
+                cum += c
+                lines.append(f"{name}_bucket{self._fmt_labels(labels, [('le', b)])} {cum}")
+            lines.append(f"{name}_bucket{self._fmt_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{self._fmt_labels(labels)} {total}")
+            lines.append(f"{name}_count{self._fmt_labels(labels)} {count}")
+        lines.append(f"process_uptime_seconds {time.time() - self.started_at:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        대시보드용 요약
+        {"histograms": [{name, labels, count, avg_ms, p50_ms, p99_ms, max_ms}], "counters": [{name, labels, value}]}
+        """
+        with self._lock:
+            hists = [{
+                "name": name,
+                "labels": ",".join(f"{k}={v}" for k, v in labels),
+                "count": h.count,
+                "avg_ms": round(h.sum / h.count * 1000, 2) if h.count else 0.0,
+                "p50_ms": round(h.quantile(0.5) * 1000, 2),
+                "p99_ms": round(h.quantile(0.99) * 1000, 2),
+                "max_ms": round(h.max * 1000, 2),
+            } for (name, labels), h in sorted(self._hists.items())]
+            counters = [{
+                "name": name,
+                "labels": ",".join(f"{k}={v}" for k, v in labels),
+                "value": v,
+            } for (name, labels), v in sorted(self._counters.items())]
+        return {"histograms": hists, "counters": counters}
+
+
+metrics = Registry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = metrics
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", registry: Registry = None):
+    """/metrics (Prometheus text) 백그라운드 서버 시작 → server"""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
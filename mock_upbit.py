@@ -0,0 +1,590 @@
+"""
+로컬 모의 업비트 서버 (테스트/벤치마크용)
+
+- REST 시세: http://127.0.0.1:<port>/v1/market/all, /v1/ticker, /v1/candles/...
+  요청마다 지연(latency)을 주고, 초당 요청 한도를 넘으면 429 반환
+- REST 계좌/주문: /v1/accounts, POST /v1/orders(시장가), /v1/order?uuid= (인증 헤더는 확인만)
+  주문은 현재가로 즉시 체결되고 fill_delay 초 뒤부터 done/cancel 로 조회됨
+- 디스코드 웹훅: POST /api/webhooks/... (5회/2초 넘으면 429 + retry_after)
+- WebSocket 시세: ws://127.0.0.1:<port>/websocket/v1
+  업비트와 같은 구독 메시지를 받아서 ticker/trade 를 binary JSON 으로 흘려보냄
+
+실행:
+    python mock_upbit.py --http-port 8080 --ws-port 8765 --drop-every 30
+    UPBIT_API_URL=http://127.0.0.1:8080 UPBIT_WS_URL=ws://127.0.0.1:8765/websocket/v1 python engine.py
+"""
+import json
+import math
+import time
+import uuid
+import base64
+import random
+import struct
+import hashlib
+import datetime
+import argparse
+import threading
+import socketserver
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# ==========================================
+# 가격 경로 (랜덤워크)
+# ==========================================
+class PricePath:
+    def __init__(self, start: float = 1000.0, vol: float = 0.002, seed: int = None):
+        self.start = start
+        self.vol = vol
+        self.rng = random.Random(seed)
+        self.prices = {}
+        self.lock = threading.Lock()
+
+    def next(self, market: str):
+        with self.lock:
+            p = self.prices.get(market, self.start)
+            p = max(p * (1 + self.rng.gauss(0, self.vol)), 1e-8)
+            self.prices[market] = p
+            return p
+
+    def last(self, market: str):
+        with self.lock:
+            return self.prices.get(market, self.start)
+
+
+# ==========================================
+# 최소 WebSocket 프레이밍 (RFC 6455)
+# ==========================================
+def ws_send_frame(sock, payload: bytes, opcode: int = 0x2):
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 65536:
+        header += bytes([126]) + struct.pack("!H", n)
+    else:
+        header += bytes([127]) + struct.pack("!Q", n)
+    sock.sendall(header + payload)
+
+
+def ws_recv_exact(sock, n: int):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("closed")
+        buf += chunk
+    return buf
+
+
+def ws_recv_frame(sock):
+    b1, b2 = ws_recv_exact(sock, 2)
+    opcode = b1 & 0x0F
+    n = b2 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", ws_recv_exact(sock, 2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", ws_recv_exact(sock, 8))[0]
+    mask = ws_recv_exact(sock, 4) if (b2 & 0x80) else None
+    data = ws_recv_exact(sock, n) if n else b""
+    if mask:
+        data = bytes(c ^ mask[i % 4] for i, c in enumerate(data))
+    return opcode, data
+
+
+class MockWSHandler(socketserver.BaseRequestHandler):
+    """
+    연결당 1스레드:
+    - 핸드셰이크 후 구독 메시지를 읽어 codes 를 갱신
+    - interval 마다 구독 마켓 시세 전송
+    - drop_every 초가 지나면 강제로 끊어서 재접속/재구독 확인
+    """
+
+    def handle(self):
+        srv = self.server
+        sock = self.request
+
+        # --- handshake ---
+        raw = b""
+        while b"\r\n\r\n" not in raw:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            raw += chunk
+        headers = {}
+        for line in raw.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+
+        state = {"codes": [], "types": ["ticker"], "alive": True}
+        srv.subscriptions += 1
+
+        def reader():
+            try:
+                while state["alive"]:
+                    opcode, data = ws_recv_frame(sock)
+                    if opcode == 0x8:
+                        break
+                    if opcode == 0x9:
+                        ws_send_frame(sock, data, opcode=0xA)
+                        continue
+                    if opcode in (0x1, 0x2):
+                        try:
+                            req = json.loads(data.decode("utf-8"))
+                        except:
+                            continue
+                        codes, types = [], []
+                        for item in req:
+                            if isinstance(item, dict) and "codes" in item:
+                                codes.extend(item["codes"])
+                                types.append(item.get("type", "ticker"))
+                        state["codes"] = sorted(set(codes))
+                        state["types"] = types or ["ticker"]
+            except:
+                pass
+            state["alive"] = False
+
+        threading.Thread(target=reader, daemon=True).start()
+
+        opened = time.time()
+        try:
+            while state["alive"]:
+                if srv.drop_every and time.time() - opened > srv.drop_every:
+                    break
+                for market in list(state["codes"]):
+                    price = srv.path.next(market)
+                    for t in state["types"]:
+                        msg = {
+                            "type": t,
+                            "code": market,
+                            "trade_price": price,
+                            "timestamp": int(time.time() * 1000),
+                            "stream_type": "REALTIME",
+                        }
+                        ws_send_frame(sock, json.dumps(msg).encode("utf-8"))
+                time.sleep(srv.interval)
+        except:
+            pass
+        state["alive"] = False
+        try:
+            ws_send_frame(sock, b"", opcode=0x8)
+        except:
+            pass
+
+
+class MockWSServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, addr, path: PricePath, interval: float = 0.1, drop_every: float = 0):
+        super().__init__(addr, MockWSHandler)
+        self.path = path
+        self.interval = interval
+        self.drop_every = drop_every
+        self.subscriptions = 0
+
+
+def start_ws_server(port: int = 0, path: PricePath = None, interval: float = 0.1, drop_every: float = 0):
+    """
+    백그라운드 스레드로 모의 WS 서버 기동 → (server, url)
+    """
+    server = MockWSServer(("127.0.0.1", port), path or PricePath(), interval, drop_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"ws://127.0.0.1:{server.server_address[1]}/websocket/v1"
+    return server, url
+
+
+# ==========================================
+# REST 시세 (market/all, ticker, candles)
+# ==========================================
+KST = datetime.timezone(datetime.timedelta(hours=9))
+VOLUME_DECIMALS = 8     # 업비트 코인 수량 단위 (잔고/주문 수량 모두 소수 8자리)
+
+
+def quantize_volume(volume: float):
+    """소수 8자리 내림 (account_rows 가 보고하는 값과 같은 단위로 보관)"""
+    return math.floor(round(volume * 10 ** VOLUME_DECIMALS, 4)) / 10 ** VOLUME_DECIMALS
+
+
+def make_markets(n: int):
+    return [f"KRW-C{i:03d}" for i in range(n)]
+
+
+def candle_offset(unit_minutes: int):
+    """업비트 주봉은 월요일 UTC 00:00 시작 (epoch 0 은 목요일 → 4일 밀림), 나머지는 epoch 기준"""
+    return 4 * 86400 if unit_minutes == 10080 else 0
+
+
+def synth_candle(market: str, unit_minutes: int, index: int, base: float = 1000.0):
+    """
+    (마켓, 봉 단위, 봉 번호)마다 항상 같은 값을 주는 합성 캔들
+    """
+    rng = random.Random(f"{market}:{unit_minutes}:{index}")
+    mid = base * (1 + 0.05 * rng.uniform(-1, 1))
+    o = mid * (1 + 0.005 * rng.uniform(-1, 1))
+    c = mid * (1 + 0.005 * rng.uniform(-1, 1))
+    h = max(o, c) * (1 + 0.01 * rng.random())
+    lo = min(o, c) * (1 - 0.01 * rng.random())
+    vol = 100 + 1000 * rng.random()
+    start = index * unit_minutes * 60 + candle_offset(unit_minutes)
+    return {
+        "market": market,
+        "candle_date_time_utc": datetime.datetime.fromtimestamp(start, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "candle_date_time_kst": datetime.datetime.fromtimestamp(start, KST).strftime("%Y-%m-%dT%H:%M:%S"),
+        "opening_price": o,
+        "high_price": h,
+        "low_price": lo,
+        "trade_price": c,
+        "timestamp": int(start * 1000),
+        "candle_acc_trade_price": vol * mid,
+        "candle_acc_trade_volume": vol,
+        "unit": unit_minutes,
+    }
+
+
+class MockExchange:
+    """
+    모의 거래소 상태 + 동작 옵션
+    - latency: 요청당 지연(초)
+    - rate_limit: 초당 허용 요청 수(0=무제한), 넘으면 429
+    """
+
+    def __init__(self, n_markets: int = 50, latency: float = 0.05, rate_limit: int = 10, path: PricePath = None,
+                 krw: float = 1_000_000, fee: float = 0.0005, fill_delay: float = 0.0,
+                 webhook_limit: int = 5, webhook_window: float = 2.0):
+        self.markets = make_markets(n_markets)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.path = path or PricePath()
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.throttled = 0
+        self._window = (0, 0)   # (초, 그 초의 요청 수)
+
+        # 계좌/주문
+        self.fee = fee
+        self.fill_delay = fill_delay
+        self.accounts = {"KRW": {"balance": float(krw), "avg": 0.0}}
+        self.orders = {}
+        self.rejected = {}      # 에러 이름 -> 거절 수
+
+        # 디스코드 웹훅
+        self.webhook_limit = webhook_limit
+        self.webhook_window = webhook_window
+        self.webhooks = []
+        self.webhook_throttled = 0
+        self._hook_times = deque()
+
+    def admit(self):
+        """이번 요청을 허용하면 (True, 남은수), 한도 초과면 (False, 0)"""
+        with self.lock:
+            sec = int(time.time())
+            w_sec, n = self._window
+            n = n + 1 if w_sec == sec else 1
+            self._window = (sec, n)
+            if self.rate_limit and n > self.rate_limit:
+                self.throttled += 1
+                return False, 0
+            return True, max(self.rate_limit - n, 0) if self.rate_limit else 99
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def candles(self, market: str, unit_minutes: int, count: int, to: float = None):
+        """to(epoch, exclusive) 가 있으면 그 이전 봉부터 과거로 count 개"""
+        unit_sec = unit_minutes * 60
+        offset = candle_offset(unit_minutes)
+        if to is None:
+            now_idx = int((time.time() - offset) // unit_sec)
+        else:
+            to -= offset
+            now_idx = int(to // unit_sec) - (1 if to % unit_sec == 0 else 0)
+        return [synth_candle(market, unit_minutes, now_idx - i, self.path.start) for i in range(count)]
+
+    def ticker(self, market: str):
+        price = self.path.next(market)
+        rng = random.Random(market)
+        return {
+            "market": market,
+            "trade_price": price,
+            "acc_trade_price_24h": 1e9 * rng.random(),
+            "timestamp": int(time.time() * 1000),
+        }
+
+
+    # ------------------------------------------
+    # 계좌 / 주문
+    # ------------------------------------------
+    def account_rows(self):
+        with self.lock:
+            return [{
+                "currency": cur,
+                "balance": f"{a['balance']:.8f}",
+                "locked": "0",
+                "avg_buy_price": f"{a['avg']:.8f}",
+                "avg_buy_price_modified": False,
+                "unit_currency": "KRW",
+            } for cur, a in self.accounts.items() if cur == "KRW" or a["balance"] > 0]
+
+    def equity(self):
+        """KRW + 보유 코인 평가금액(현재 경로 가격)"""
+        with self.lock:
+            rows = [(cur, a["balance"]) for cur, a in self.accounts.items()]
+        return sum(b if cur == "KRW" else b * self.path.last(f"KRW-{cur}") for cur, b in rows)
+
+    def _reject(self, name: str, message: str):
+        self.rejected[name] = self.rejected.get(name, 0) + 1
+        return 400, {"error": {"name": name, "message": message}}
+
+    def place_order(self, body: dict):
+        """시장가 주문 즉시 체결 → (status, 응답)"""
+        market, side = body.get("market"), body.get("side")
+        if market not in self.markets or side not in ("bid", "ask"):
+            return self._reject("invalid_parameter", "market/side")
+        cur = market.split("-", 1)[1]
+        price = self.path.last(market)
+        with self.lock:
+            krw = self.accounts["KRW"]
+            acc = self.accounts.setdefault(cur, {"balance": 0.0, "avg": 0.0})
+            if side == "bid":
+                if body.get("ord_type") != "price":
+                    return self._reject("invalid_ord_type", "bid 는 price 만 지원")
+                funds = float(body.get("price", 0))
+                fee = funds * self.fee
+                if funds + fee > krw["balance"]:
+                    return self._reject("insufficient_funds_bid", "주문가능한 금액(KRW)이 부족합니다.")
+                volume = quantize_volume(funds / price)
+                acc["avg"] = (acc["avg"] * acc["balance"] + funds) / (acc["balance"] + volume)
+                acc["balance"] = round(acc["balance"] + volume, VOLUME_DECIMALS)
+                krw["balance"] -= funds + fee
+                final = "cancel"        # 업비트 시장가 매수는 잔액 반환으로 cancel 종료
+            else:
+                if body.get("ord_type") != "market":
+                    return self._reject("invalid_ord_type", "ask 는 market 만 지원")
+                volume = quantize_volume(float(body.get("volume", 0)))
+                if volume <= 0 or volume > acc["balance"]:
+                    return self._reject("insufficient_funds_ask", "주문가능한 금액(코인)이 부족합니다.")
+                funds = volume * price
+                fee = funds * self.fee
+                acc["balance"] = max(round(acc["balance"] - volume, VOLUME_DECIMALS), 0.0)
+                krw["balance"] += funds - fee
+                final = "done"
+
+            order = {
+                "uuid": str(uuid.uuid4()),
+                "side": side,
+                "ord_type": body.get("ord_type"),
+                "price": body.get("price"),
+                "market": market,
+                "volume": body.get("volume"),
+                "executed_volume": f"{volume:.8f}",
+                "remaining_volume": "0",
+                "paid_fee": f"{fee:.8f}",
+                "trades_count": 1,
+                "created_at": datetime.datetime.now(KST).isoformat(),
+                "_final": final,
+                "_at": time.time(),
+                "_trade": {"market": market, "price": f"{price:.8f}", "volume": f"{volume:.8f}",
+                           "funds": f"{funds:.8f}", "side": side},
+            }
+            self.orders[order["uuid"]] = order
+        return 201, self._public_order(order, "wait")
+
+    @staticmethod
+    def _public_order(order: dict, state: str):
+        out = {k: v for k, v in order.items() if not k.startswith("_")}
+        out["state"] = state
+        out["trades"] = [order["_trade"]] if state != "wait" else []
+        if state == "wait":
+            # 체결 확인 전: 체결 수량/수수료도 아직 0 (체결 내역이 없는데 수량만 보이지 않게)
+            out.update(executed_volume="0", remaining_volume=order["executed_volume"], paid_fee="0", trades_count=0)
+        return out
+
+    def order(self, order_uuid: str):
+        with self.lock:
+            order = self.orders.get(order_uuid)
+        if order is None:
+            return None
+        filled = time.time() - order["_at"] >= self.fill_delay
+        return self._public_order(order, order["_final"] if filled else "wait")
+
+    # ------------------------------------------
+    # 디스코드 웹훅
+    # ------------------------------------------
+    def webhook(self, content: str):
+        """허용이면 (True, 0), 한도 초과면 (False, retry_after초)"""
+        with self.lock:
+            now = time.time()
+            while self._hook_times and now - self._hook_times[0] >= self.webhook_window:
+                self._hook_times.popleft()
+            if self.webhook_limit and len(self._hook_times) >= self.webhook_limit:
+                self.webhook_throttled += 1
+                return False, self.webhook_window - (now - self._hook_times[0])
+            self._hook_times.append(now)
+            self.webhooks.append(content)
+            return True, 0.0
+
+
+class MockHTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True     # keep-alive 에서 헤더/본문 분할 전송 시 40ms 지연 방지
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        ex = self.server.exchange
+        url = urlparse(self.path)
+        qs = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+
+        group = ("candles" if "candles" in parts else "ticker" if "ticker" in parts
+                 else "market" if "market" in parts else "default")
+        ex.count(url.path)
+        if ex.latency:
+            time.sleep(ex.latency)
+        ok, remaining = ex.admit()
+        headers = {"Remaining-Req": f"group={group}; min=600; sec={remaining}"}
+        if not ok:
+            return self._send(429, {"error": {"name": "too_many_requests"}}, headers)
+
+        if url.path in ("/v1/accounts", "/v1/order") and not self.headers.get("Authorization"):
+            return self._send(401, {"error": {"name": "jwt_verification", "message": "인증 헤더 없음"}}, headers)
+
+        if url.path == "/v1/accounts":
+            return self._send(200, ex.account_rows(), headers)
+
+        if url.path == "/v1/order":
+            order = ex.order(qs.get("uuid", ""))
+            if order is None:
+                return self._send(404, {"error": {"name": "order_not_found", "message": "주문을 찾지 못했습니다."}}, headers)
+            return self._send(200, order, headers)
+
+        if url.path == "/v1/market/all":
+            return self._send(200, [{"market": m} for m in ex.markets], headers)
+
+        if url.path == "/v1/ticker":
+            markets = [m for m in qs.get("markets", "").split(",") if m]
+            if not markets or any(m not in ex.markets for m in markets):
+                # 업비트처럼 없는 코드가 하나라도 있으면 요청 전체 거절
+                return self._send(404, {"error": {"name": "404", "message": "Code not found"}}, headers)
+            return self._send(200, [ex.ticker(m) for m in markets], headers)
+
+        if len(parts) >= 3 and parts[:2] == ["v1", "candles"]:
+            kind = parts[2]
+            unit = {"days": 1440, "weeks": 10080, "months": 43200}.get(kind)
+            if kind == "minutes" and len(parts) >= 4:
+                unit = int(parts[3])
+            market = qs.get("market")
+            if not unit or not market:
+                return self._send(400, {"error": {"name": "invalid_parameter"}}, headers)
+            count = min(int(qs.get("count", 1)), 200)
+            to = None
+            if qs.get("to"):
+                to = datetime.datetime.fromisoformat(qs["to"].replace("Z", "").replace(" ", "T"))
+                to = to.replace(tzinfo=datetime.timezone.utc).timestamp()
+            return self._send(200, ex.candles(market, unit, count, to), headers)
+
+        return self._send(404, {"error": {"name": "not_found"}}, headers)
+
+
+    def do_POST(self):
+        ex = self.server.exchange
+        url = urlparse(self.path)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except ValueError:
+            body = {}
+        ex.count(f"POST {url.path}")
+
+        if url.path.startswith("/api/webhooks/"):
+            ok, retry_after = ex.webhook(body.get("content", ""))
+            if not ok:
+                return self._send(429, {"message": "You are being rate limited.", "retry_after": retry_after},
+                                  {"Retry-After": f"{retry_after:.3f}"})
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if ex.latency:
+            time.sleep(ex.latency)
+        ok, remaining = ex.admit()
+        headers = {"Remaining-Req": f"group=order; min=200; sec={remaining}"}
+        if not ok:
+            return self._send(429, {"error": {"name": "too_many_requests"}}, headers)
+        if url.path == "/v1/orders":
+            if not self.headers.get("Authorization"):
+                return self._send(401, {"error": {"name": "jwt_verification", "message": "인증 헤더 없음"}}, headers)
+            status, resp = ex.place_order(body)
+            return self._send(status, resp, headers)
+        return self._send(404, {"error": {"name": "not_found"}}, headers)
+
+
+def start_http_server(port: int = 0, exchange: MockExchange = None):
+    """
+    백그라운드 스레드로 모의 REST 서버 기동 → (server, base_url)
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockHTTPHandler)
+    server.daemon_threads = True
+    server.exchange = exchange or MockExchange()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="로컬 모의 업비트 서버")
+    ap.add_argument("--http-port", type=int, default=8080)
+    ap.add_argument("--ws-port", type=int, default=8765)
+    ap.add_argument("--markets", type=int, default=50, help="모의 KRW 마켓 수")
+    ap.add_argument("--latency", type=float, default=0.05, help="REST 요청당 지연(초)")
+    ap.add_argument("--rate-limit", type=int, default=10, help="REST 초당 허용 요청 수(0=무제한)")
+    ap.add_argument("--interval", type=float, default=0.1, help="시세 전송 간격(초)")
+    ap.add_argument("--vol", type=float, default=0.002, help="틱당 가격 변동성")
+    ap.add_argument("--drop-every", type=float, default=0, help="N초마다 연결 강제 종료(0=안함)")
+    ap.add_argument("--krw", type=float, default=1_000_000, help="모의 계좌 시작 KRW")
+    ap.add_argument("--fill-delay", type=float, default=0.0, help="주문 체결 확인까지 지연(초)")
+    args = ap.parse_args()
+
+    path = PricePath(vol=args.vol)
+    http_server, base_url = start_http_server(
+        args.http_port, MockExchange(args.markets, args.latency, args.rate_limit, path,
+                                     krw=args.krw, fill_delay=args.fill_delay)
+    )
+    server, url = start_ws_server(args.ws_port, path, args.interval, args.drop_every)
+    print(f"mock rest: {base_url}")
+    print(f"mock ws: {url}")
+    print(f"mock discord: {base_url}/api/webhooks/0/mock")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        http_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import time
+import threading
+from collections import deque
+
+import requests
+
+HIGH = 0    # 매수/매도/에러
+LOW = 1     # 정각/30분 리포트 등 상태 메시지
+
+DISCORD_MAX_LEN = 2000
+
+
+class DiscordNotifier:
+    """
+    ✅ 디스코드 웹훅 백그라운드 전송 (매매 루프는 큐에 넣고 바로 반환)
+    - 큐 크기 제한: 가득 차면 LOW 부터 버림, HIGH 는 LOW 를 밀어내고 들어감
+    - batch_window 동안 모인 메시지는 2000자 이내로 합쳐서 한 번에 전송
+    - 밀려 있을 때(backlog 이상) LOW 메시지는 'N건 생략' 한 줄로 요약
+    - 전송 간격 min_interval 유지, 429 면 Retry-After 만큼 쉬고 재전송
+    """
+
+    def __init__(self, url: str, maxsize: int = 200, batch_window: float = 1.0,
+                 min_interval: float = 0.5, backlog: int = 20, max_retries: int = 3, post=None):
+        self.url = url
+        self.maxsize = maxsize
+        self.batch_window = batch_window
+        self.min_interval = min_interval
+        self.backlog = backlog
+        self.max_retries = max_retries
+        self._post = post or requests.Session().post
+
+        self._q = deque()            # (priority, text)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = True
+        self._last_post = 0.0
+
+        self.sent = 0
+        self.posts = 0
+        self.dropped = 0
+        self.summarized = 0
+        self.throttled = 0
+
+        self._thread = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------
+    # 넣기 (논블로킹)
+    # ------------------------------------------
+    def send(self, text: str, priority: int = HIGH):
+        if not self.url:
+            return
+        with self._lock:
+            if len(self._q) >= self.maxsize:
+                low = next((i for i, (p, _) in enumerate(self._q) if p == LOW), None)
+                if priority == LOW or low is None:
+                    self.dropped += 1
+                    return
+                del self._q[low]
+                self.dropped += 1
+            self._q.append((priority, text))
+        self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._q)
+
+    # ------------------------------------------
+    # 백그라운드 전송
+    # ------------------------------------------
+    def _take_batch(self):
+        """큐에서 2000자 안에 들어가는 만큼 꺼내서 한 메시지로 합침"""
+        with self._lock:
+            items = list(self._q)
+            self._q.clear()
+
+        # 밀려 있으면 LOW 는 요약
+        if len(items) > self.backlog:
+            lows = [t for p, t in items if p == LOW]
+            if len(lows) > 1:
+                items = [(p, t) for p, t in items if p == HIGH]
+                items.append((LOW, f"ℹ️ 상태 메시지 {len(lows)}건 생략 (최근: {lows[-1][:200]})"))
+                self.summarized += len(lows) - 1
+
+        lines, size, rest = [], 0, []
+        for i, (p, t) in enumerate(items):
+            if len(t) > DISCORD_MAX_LEN:
+                # 단일 메시지가 너무 길면 잘라서 나머지는 다음 배치로
+                head, tail = t[:DISCORD_MAX_LEN], t[DISCORD_MAX_LEN:]
+                if lines:
+                    rest = items[i:]
+                    break
+                lines.append(head)
+                rest = [(p, tail)] + items[i + 1:]
+                break
+            add = len(t) + (1 if lines else 0)
+            if size + add > DISCORD_MAX_LEN:
+                rest = items[i:]
+                break
+            lines.append(t)
+            size += add
+
+        if rest:
+            with self._lock:
+                self._q.extendleft(reversed(rest))
+        return "\n".join(lines), len(lines)
+
+    def _deliver(self, content: str):
+        for attempt in range(self.max_retries + 1):
+            wait = self.min_interval - (time.time() - self._last_post)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                resp = self._post(self.url, json={"content": content}, timeout=5)
+                self._last_post = time.time()
+                self.posts += 1
+            except Exception:
+                time.sleep(min(2 ** attempt, 10))
+                continue
+
+            if resp.status_code == 429:
+                self.throttled += 1
+                retry_after = resp.headers.get("Retry-After")
+                try:
+                    retry_after = float(retry_after) if retry_after else float(resp.json().get("retry_after", 1))
+                except Exception:
+                    retry_after = 1.0
+                time.sleep(min(max(retry_after, 0.1), 60))
+                continue
+            if resp.status_code >= 500:
+                time.sleep(min(2 ** attempt, 10))
+                continue
+            return True
+        return False
+
+    def _run(self):
+        while self._running or self.pending():
+            if not self._wakeup.wait(1.0):
+                continue
+            # 잠깐 모았다가 한 번에
+            if self._running:
+                time.sleep(self.batch_window)
+            self._wakeup.clear()
+            while self.pending():
+                content, n = self._take_batch()
+                if not n:
+                    break
+                if self._deliver(content):
+                    self.sent += n
+                else:
+                    self.dropped += n
+
+    def stop(self, timeout: float = 5.0):
+        """남은 메시지 최대한 보내고 종료"""
+        self._running = False
+        self._wakeup.set()
+        self._thread.join(timeout)
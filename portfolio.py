@@ -0,0 +1,133 @@
+import time
+import threading
+
+
+class PortfolioState:
+    """
+    ✅ 잔고 스냅샷: get_balances 1회 결과를 틱 동안 공유
+    - 보유종목/수량/평단/KRW 잔고를 모두 여기서 읽음
+    - 주문 발생(invalidate) 또는 TTL 만료 시에만 다시 조회
+    """
+
+    def __init__(self, upbit, ttl: float = 10.0, min_order_krw: float = 5000):
+        self.upbit = upbit
+        self.ttl = ttl
+        self.min_order_krw = min_order_krw
+
+        self._lock = threading.Lock()
+        self._rows = {}          # currency -> balance row(dict)
+        self._fetched_at = 0.0
+        self._dirty = True
+        self.fetch_count = 0
+
+    # ------------------------------------------
+    # 갱신
+    # ------------------------------------------
+    def invalidate(self):
+        """주문 접수/체결 후 호출 → 다음 조회 때 새로 가져옴"""
+        with self._lock:
+            self._dirty = True
+
+    def refresh(self, force: bool = False):
+        """
+        필요할 때만 get_balances 호출. 실패 시 직전 스냅샷 유지.
+        반환: 실제로 조회했으면 True
+        """
+        with self._lock:
+            expired = (time.time() - self._fetched_at) >= self.ttl
+            if not (force or self._dirty or expired):
+                return False
+
+        try:
+            balances = self.upbit.get_balances()
+        except:
+            balances = None
+        self.fetch_count += 1
+
+        if not isinstance(balances, list):
+            return False
+
+        rows = {}
+        for b in balances:
+            cur = b.get("currency")
+            if cur:
+                rows[cur] = b
+
+        with self._lock:
+            self._rows = rows
+            self._fetched_at = time.time()
+            self._dirty = False
+        return True
+
+    def apply_fill(self, coin: str, side: str, volume: float, funds: float, fee: float = 0.0):
+        """
+        ✅ 체결 내역으로 스냅샷 직접 갱신 (get_balances 재조회 없이)
+        side: 'bid'(매수) / 'ask'(매도), funds: 체결금액(KRW, 수수료 제외)
+        TTL 만료 시 정식 재조회로 다시 맞춰짐
+        """
+        cur = coin.split("-", 1)[1] if "-" in coin else coin
+        with self._lock:
+            krw = self._rows.setdefault("KRW", {"currency": "KRW", "balance": "0", "avg_buy_price": "0"})
+            row = self._rows.get(cur) or {"currency": cur, "balance": "0", "avg_buy_price": "0",
+                                          "unit_currency": "KRW"}
+            qty = float(row.get("balance", 0))
+            avg = float(row.get("avg_buy_price", 0))
+            if side == "bid":
+                new_qty = qty + volume
+                row["avg_buy_price"] = str(((avg * qty) + funds) / new_qty) if new_qty else "0"
+                row["balance"] = str(new_qty)
+                krw["balance"] = str(float(krw.get("balance", 0)) - funds - fee)
+            else:
+                row["balance"] = str(max(qty - volume, 0.0))
+                krw["balance"] = str(float(krw.get("balance", 0)) + funds - fee)
+            self._rows[cur] = row
+        return True
+
+    def _row(self, coin: str):
+        self.refresh()
+        cur = coin.split("-", 1)[1] if "-" in coin else coin
+        with self._lock:
+            return self._rows.get(cur)
+
+    # ------------------------------------------
+    # 조회
+    # ------------------------------------------
+    def balances(self):
+        """원본 balance row 리스트 (KRW 포함)"""
+        self.refresh()
+        with self._lock:
+            return list(self._rows.values())
+
+    def krw_balance(self):
+        b = self._row("KRW")
+        return float(b.get("balance", 0)) if b else 0.0
+
+    def quantity(self, coin: str):
+        b = self._row(coin)
+        return float(b.get("balance", 0)) if b else 0.0
+
+    def avg_buy_price(self, coin: str):
+        b = self._row(coin)
+        return float(b.get("avg_buy_price", 0)) if b else 0.0
+
+    def coins(self):
+        """KRW 제외 잔고가 있는 모든 마켓(금액 무관)"""
+        out = []
+        for b in self.balances():
+            cur = b.get("currency")
+            if cur and cur != "KRW" and float(b.get("balance", 0)) > 0:
+                out.append(f"KRW-{cur}")
+        return out
+
+    def holdings(self):
+        """보유 코인 목록(평단*수량이 최소주문금액 초과)"""
+        out = []
+        for b in self.balances():
+            cur = b.get("currency")
+            if not cur or cur == "KRW":
+                continue
+            avg_buy = float(b.get("avg_buy_price", 0))
+            bal = float(b.get("balance", 0))
+            if avg_buy * bal > self.min_order_krw:
+                out.append(f"KRW-{cur}")
+        return out
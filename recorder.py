@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import datetime
+import threading
+
+import numpy as np
+
+# 레코드 형식 (리틀엔디언 고정 길이 → 파일 끝에 이어쓰기, 읽을 때 np.memmap)
+TICK_DTYPE = np.dtype([("ts", "<f8"), ("market", "<u4"), ("price", "<f8")])
+CANDLE_DTYPE = np.dtype([
+    ("ts", "<f8"), ("market", "<u4"), ("start", "<f8"),
+    ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+])
+KST = datetime.timezone(datetime.timedelta(hours=9))
+
+
+def day_key(ts: float):
+    """epoch → 'YYYYMMDD' (KST 기준 일자 파티션)"""
+    return datetime.datetime.fromtimestamp(ts, KST).strftime("%Y%m%d")
+
+
+class MarketRecorder:
+    """
+    ✅ 실매매가 본 시세 기록 (일자별 디렉터리, append-only)
+    recordings/YYYYMMDD/
+      ticks.bin    : 틱마다 가격 스냅샷 (ts, market_id, price)
+      candles.bin  : 봉 동기화 때 받은 캔들 (기록 시각, market_id, start, OHLCV)
+      markets.txt  : market_id → 마켓 코드 (줄 번호 = id)
+      events.jsonl : 후보 변경 등 드문 이벤트
+    - 기록은 메모리 버퍼에 쌓았다가 flush_interval 마다 파일 끝에 한 번에 씀
+    - 중간에 죽어서 마지막 레코드가 잘려도 읽을 때 레코드 크기 배수로 잘라서 사용
+      (그 날짜에 다시 기록을 시작할 때 잘린 꼬리를 먼저 버림)
+    """
+
+    def __init__(self, root: str = "recordings", flush_interval: float = 5.0):
+        self.root = root
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._day = None
+        self._ids = {}
+        self._ticks = []
+        self._candles = []
+        self._events = []
+        self._flushed_at = time.time()
+        self.records = 0
+
+    # ------------------------------------------
+    # 파티션
+    # ------------------------------------------
+    def _switch(self, ts: float):
+        """ts 가 다른 날이면 버퍼를 이전 파티션에 쓰고 새 파티션으로"""
+        day = day_key(ts)
+        if day == self._day:
+            return
+        self._write()
+        self._day = day
+        path = os.path.join(self.root, day)
+        os.makedirs(path, exist_ok=True)
+        self._ids = {}
+        try:
+            with open(os.path.join(path, "markets.txt"), encoding="utf-8") as fp:
+                for i, line in enumerate(fp):
+                    self._ids[line.rstrip("\n")] = i
+        except OSError:
+            pass
+        # 이전 실행이 레코드 중간에 죽었으면 잘린 꼬리를 버림 (이어 쓴 레코드가 어긋나지 않게)
+        for name, dtype in (("ticks.bin", TICK_DTYPE), ("candles.bin", CANDLE_DTYPE)):
+            try:
+                with open(os.path.join(path, name), "r+b") as fp:
+                    size = os.fstat(fp.fileno()).st_size
+                    if size % dtype.itemsize:
+                        fp.truncate(size - size % dtype.itemsize)
+            except OSError:
+                pass
+        try:
+            with open(os.path.join(path, "events.jsonl"), "r+b") as fp:
+                data = fp.read()
+                if data and not data.endswith(b"\n"):
+                    fp.truncate(data.rfind(b"\n") + 1)
+        except OSError:
+            pass
+
+    def _market_id(self, market: str):
+        mid = self._ids.get(market)
+        if mid is None:
+            mid = self._ids[market] = len(self._ids)
+            with open(os.path.join(self.root, self._day, "markets.txt"), "a", encoding="utf-8") as fp:
+                fp.write(market + "\n")
+        return mid
+
+    # ------------------------------------------
+    # 기록
+    # ------------------------------------------
+    def record_prices(self, ts: float, price_map: dict):
+        with self._lock:
+            self._switch(ts)
+            for m, p in price_map.items():
+                self._ticks.append((ts, self._market_id(m), p))
+            self.records += len(price_map)
+
+    def record_candles(self, ts: float, candles: dict):
+        """candles: {market: [{"start","open","high","low","close","volume"}, ...]}"""
+        with self._lock:
+            self._switch(ts)
+            for m, rows in candles.items():
+                mid = self._market_id(m)
+                for c in rows:
+                    self._candles.append((ts, mid, c["start"], c["open"], c["high"], c["low"],
+                                          c["close"], c.get("volume", 0.0)))
+                self.records += len(rows)
+
+    def record_event(self, ts: float, kind: str, **data):
+        with self._lock:
+            self._switch(ts)
+            self._events.append(json.dumps({"ts": ts, "kind": kind, **data}, ensure_ascii=False))
+
+    def _write(self):
+        if self._day is None or not (self._ticks or self._candles or self._events):
+            return
+        path = os.path.join(self.root, self._day)
+        if self._ticks:
+            with open(os.path.join(path, "ticks.bin"), "ab") as fp:
+                fp.write(np.array(self._ticks, dtype=TICK_DTYPE).tobytes())
+            self._ticks = []
+        if self._candles:
+            with open(os.path.join(path, "candles.bin"), "ab") as fp:
+                fp.write(np.array(self._candles, dtype=CANDLE_DTYPE).tobytes())
+            self._candles = []
+        if self._events:
+            with open(os.path.join(path, "events.jsonl"), "a", encoding="utf-8") as fp:
+                fp.write("\n".join(self._events) + "\n")
+            self._events = []
+
+    def maybe_flush(self, now: float = None):
+        now = time.time() if now is None else now
+        if now - self._flushed_at >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now: float = None):
+        with self._lock:
+            self._write()
+            self._flushed_at = time.time() if now is None else now
+
+    def close(self):
+        self.flush()
+
+
+# ==========================================
+# 읽기
+# ==========================================
+def _memmap(path: str, dtype):
+    try:
+        n = os.path.getsize(path) // dtype.itemsize
+    except OSError:
+        n = 0
+    if not n:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+class RecordedDay:
+    """하루치 기록 (ticks/candles 는 mmap 구조화 배열)"""
+
+    def __init__(self, root: str, day: str):
+        path = os.path.join(root, day)
+        self.day = day
+        self.ticks = _memmap(os.path.join(path, "ticks.bin"), TICK_DTYPE)
+        self.candles = _memmap(os.path.join(path, "candles.bin"), CANDLE_DTYPE)
+        try:
+            with open(os.path.join(path, "markets.txt"), encoding="utf-8") as fp:
+                self.markets = [line.rstrip("\n") for line in fp]
+        except OSError:
+            self.markets = []
+        self.events = []
+        try:
+            with open(os.path.join(path, "events.jsonl"), encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        self.events.append(json.loads(line))
+                    except ValueError:
+                        continue    # 마지막 줄이 잘렸을 수 있음
+        except OSError:
+            pass
+
+    def batches(self):
+        """틱 스냅샷 단위(같은 ts)로 (ts, 시작, 끝) 인덱스"""
+        ts = self.ticks["ts"]
+        if not len(ts):
+            return []
+        cuts = np.flatnonzero(np.diff(ts)) + 1
+        starts = np.concatenate(([0], cuts))
+        ends = np.concatenate((cuts, [len(ts)]))
+        return list(zip(ts[starts].tolist(), starts.tolist(), ends.tolist()))
+
+
+def list_days(root: str = "recordings"):
+    try:
+        return sorted(d for d in os.listdir(root) if d.isdigit() and len(d) == 8)
+    except OSError:
+        return []
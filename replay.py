@@ -0,0 +1,224 @@
+"""
+기록된 실시세 재생 - 모의 계좌 페이퍼 트레이딩
+
+- 엔진이 남긴 recordings/YYYYMMDD/ (recorder.py) 를 mmap 으로 읽어 틱 스냅샷 순서대로 TradingEngine.tick() 실행
+  → 매수금액 계산/쿨다운/09:00 리셋/익절·손절 판단은 실매매 코드 그대로
+- 시계는 기록 시각으로 바로 이동 (time.time / now_kst 교체) → 2초 간격 틱을 기다리지 않음
+- HTTP 없음: 시세/캔들/후보는 기록에서, 계좌/주문은 MockExchange 를 프로세스 안에서 직접 호출
+  (기록 가격으로 즉시 체결, 수수료 반영)
+
+    python replay.py                                  # 기록된 모든 날
+    python replay.py --days 20261017 20261018 --krw 500000
+    python replay.py --record-dir recordings --state-dir state_replay   # 대시보드로 보면서
+    python replay.py --config strategies/a.toml       # 그 전략 설정으로 (기본: 실매매와 같은 secrets.toml)
+
+- 전략 파라미터(K/손절/익절/보유 수/쿨다운/후보 수 등)는 실매매와 같은 load_config 로 읽음
+  (키/디스코드/웹소켓/기록/지표는 재생에서 끔, 목표가 간격은 기록한 기본 간격 하나만)
+"""
+import os
+import time
+import argparse
+import datetime
+import tempfile
+
+import engine as engine_mod
+from bench_loop import SimClock, percentile
+from mock_upbit import MockExchange
+from recorder import RecordedDay, list_days
+from universe import UniverseScanner
+
+
+class ReplayFeed:
+    """
+    재생 시점까지의 마켓별 최신가 + 기록된 캔들
+    (MockExchange.path 자리에도 들어가서 체결가 = 기록 가격)
+    """
+
+    def __init__(self):
+        self.latest = {}
+        self._candles = {}      # market -> [(기록 시각, 봉 dict)] 기록 순서
+
+    def load_day(self, day: RecordedDay):
+        names = day.markets
+        for rec_ts, mid, start, o, h, l, c, v in day.candles.tolist():
+            self._candles.setdefault(names[mid], []).append(
+                (rec_ts, {"start": start, "open": o, "high": h, "low": l, "close": c, "volume": v}))
+
+    def apply(self, names, ids, prices):
+        latest = self.latest
+        for mid, p in zip(ids, prices):
+            latest[names[mid]] = p
+
+    # MockExchange 가 쓰는 가격 경로 인터페이스
+    def last(self, market: str):
+        return self.latest.get(market, 0.0)
+
+    def snapshot(self, markets):
+        """get_price_snapshot 대체"""
+        latest = self.latest
+        return {m: latest[m] for m in markets if m in latest}
+
+    def candles(self, market: str, interval: str = None, count: int = 2):
+        """
+        get_candles 대체: 현재(가상) 시각까지 기록된 봉 중 최근 count 개 (오래된 것부터)
+        같은 봉이 여러 번 기록됐으면 마지막 기록값 (interval 은 기록한 TARGET_INTERVAL 고정)
+        """
+        now = time.time()
+        bars = {}
+        for rec_ts, bar in self._candles.get(market, ()):
+            if rec_ts > now:
+                break
+            bars[bar["start"]] = bar
+        return [dict(bars[k]) for k in sorted(bars)[-count:]]
+
+
+class ReplayUniverse(UniverseScanner):
+    """후보 목록도 기록된 candidates 이벤트를 그대로 사용 (전 마켓 조회 없음)"""
+
+    def set_candidates(self, markets):
+        with self._lock:
+            self._set_top(markets)
+            self.scanned_at = time.time()
+
+    def scan(self):
+        return self.top()
+
+    def start(self):
+        return self
+
+
+class PaperAccount:
+    """UpbitPrivate 자리: MockExchange 계좌/주문을 HTTP 없이 직접 호출"""
+
+    def __init__(self, exchange: MockExchange):
+        self.exchange = exchange
+
+    def get_balances(self):
+        return self.exchange.account_rows()
+
+    def _place(self, body: dict):
+        status, resp = self.exchange.place_order(body)
+        if status >= 400:
+            err = resp.get("error") or {}
+            return {"error": f"{err.get('name', status)}: {err.get('message', '')}"}
+        return resp
+
+    def buy_market_order(self, ticker: str, price: float):
+        return self._place({"market": ticker, "side": "bid", "ord_type": "price", "price": str(price)})
+
+    def sell_market_order(self, ticker: str, volume: float):
+        return self._place({"market": ticker, "side": "ask", "ord_type": "market", "volume": str(volume)})
+
+    def get_order(self, uuid: str):
+        return self.exchange.order(uuid)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="기록 시세 재생 (실매매 판단 로직 + 모의 계좌)")
+    ap.add_argument("--config", default=engine_mod.DEFAULT_SECRETS_PATH,
+                    help="전략 설정 secrets.toml (실매매 엔진과 같은 파일/환경변수)")
+    ap.add_argument("--record-dir", default="recordings")
+    ap.add_argument("--days", nargs="*", default=None, help="YYYYMMDD ... (기본: 전부)")
+    ap.add_argument("--krw", type=float, default=1_000_000, help="시작 KRW")
+    ap.add_argument("--fee", type=float, default=0.0005)
+    ap.add_argument("--state-dir", default="", help="대시보드 스냅샷 경로 (기본: 끔)")
+    ap.add_argument("--journal", default=None, help="재생 매매 기록 sqlite (기본: 임시 파일)")
+    args = ap.parse_args()
+
+    days = args.days or list_days(args.record_dir)
+    days = [d for d in days if os.path.isdir(os.path.join(args.record_dir, d))]
+    if not days:
+        print(f"❌ {args.record_dir} 에 기록이 없습니다.")
+        return 1
+
+    loaded = [RecordedDay(args.record_dir, d) for d in days]
+    first = [d.batches()[:1] for d in loaded if len(d.ticks)]
+    if not first:
+        print(f"❌ 시세 기록이 없습니다: {', '.join(days)}")
+        return 1
+    first_ts = first[0][0][0]
+    clock = SimClock(first_ts).install()
+
+    # 기록된 봉은 기록 시각(= 실매매 조회가 성공한 시각)부터 보임 → 새 봉 재조회를 틱마다 해서 그 시각에 바로 반영
+    engine_mod.CANDLE_RETRY_SECONDS = 0
+    journal = args.journal or os.path.join(tempfile.mkdtemp(prefix="replay_"), "trades.db")
+    config = engine_mod.load_config(args.config, journal_path=journal, state_dir=args.state_dir,
+                                    discord_webhook="", use_websocket=False, metrics_port=0, record_dir="")
+    intervals = [iv.strip() for iv in config.target_intervals.split(",") if iv.strip()]
+    if len(intervals) > 1:
+        # 기록에는 기본 간격 캔들만 있음 → 여러 간격 조합은 재생 불가
+        print(f"⚠️ target_intervals={config.target_intervals} → 재생은 {intervals[0]} 하나로")
+        config.target_intervals = intervals[0]
+
+    feed = ReplayFeed()
+    universe = ReplayUniverse(config.candidate_size)
+    ex = MockExchange(n_markets=0, latency=0, rate_limit=0, path=feed, krw=args.krw, fee=args.fee,
+                      webhook_limit=0)
+    ex.markets = sorted({m for d in loaded for m in d.markets})
+
+    eng = engine_mod.TradingEngine(config, upbit=PaperAccount(ex), prices=feed.snapshot,
+                                   candle_fetch=feed.candles, universe=universe)
+    eng.executor.poll_interval = 0.0
+    eng.reset_prep_async = False    # 리셋 준비도 틱 안에서 → 재생 결과가 실행 속도와 무관
+
+    # 첫 틱 시각에 엔진 시작 (그때까지 기록된 후보/캔들로 목표가 계산)
+    events = sorted((e for d in loaded for e in d.events if e.get("kind") == "candidates"),
+                    key=lambda e: e["ts"])
+    ev_i = 0
+    while ev_i < len(events) and (ev_i == 0 or events[ev_i]["ts"] <= clock.now):
+        universe.set_candidates(events[ev_i]["markets"])
+        ev_i += 1
+    feed.load_day(loaded[0])
+    eng.start()
+
+    start_equity = ex.equity() or args.krw
+    durations = []
+    n_ticks = 0
+    wall_t0 = time.perf_counter()
+    for i, day in enumerate(loaded):
+        if i:
+            feed.load_day(day)
+        names = day.markets
+        ids, prices = day.ticks["market"], day.ticks["price"]
+        batches = day.batches()
+        print(f"{day.day}: ticks {len(batches)}  records {len(day.ticks)}  candles {len(day.candles)}")
+        for ts, a, b in batches:
+            clock.now = ts
+            while ev_i < len(events) and events[ev_i]["ts"] <= ts:
+                universe.set_candidates(events[ev_i]["markets"])
+                ev_i += 1
+            feed.apply(names, ids[a:b].tolist(), prices[a:b].tolist())
+
+            t = time.perf_counter()
+            eng.tick()
+            durations.append(time.perf_counter() - t)
+            n_ticks += 1
+
+    elapsed = time.perf_counter() - wall_t0
+    sim_seconds = clock.now - first_ts
+    eng.journal.flush()
+    trades = eng.journal.trades_since(0)
+    end_equity = ex.equity()
+    eng.close()
+    clock.uninstall()
+
+    reasons = {}
+    for t in trades:
+        key = t["side"] if t["side"] == "BUY" else t["reason"].split("(")[0]
+        reasons[key] = reasons.get(key, 0) + 1
+
+    start_dt = datetime.datetime.fromtimestamp(first_ts, engine_mod.KST)
+    print()
+    print(f"replayed        {start_dt:%Y-%m-%d %H:%M} KST + {sim_seconds / 3600:.1f}h  ({n_ticks} ticks in {elapsed:.2f}s)")
+    print(f"speed           x{sim_seconds / max(elapsed, 1e-9):.0f}  ({n_ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    if durations:
+        print(f"tick latency    p50 {percentile(durations, 0.5) * 1000:.3f}ms  p99 {percentile(durations, 0.99) * 1000:.3f}ms")
+    print(f"orders          {len(ex.orders)}  " + "  ".join(f"{k} {v}" for k, v in sorted(reasons.items())))
+    print(f"equity          {start_equity:,.0f} → {end_equity:,.0f} KRW "
+          f"({(end_equity - start_equity) / start_equity * 100:+.2f}%)")
+    print(f"journal         {journal}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
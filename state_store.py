@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:     # Windows: 중복 실행 잠금 없이 동작
+    fcntl = None
+
+
+class StateStore:
+    """
+    ✅ 엔진 ↔ 대시보드 공유 로컬 저장소 (디렉터리 하나)
+    - state.json: 엔진이 주기적으로 통째로 교체(임시파일 → os.replace, 읽는 쪽은 항상 완전한 파일)
+    - commands/: 대시보드가 넣는 명령 파일(전량매도 등), 엔진이 읽고 지움
+    - engine.lock: 엔진 중복 실행 방지(flock, 프로세스 종료 시 자동 해제)
+    """
+
+    def __init__(self, root: str = "state"):
+        self.root = root
+        self.state_path = os.path.join(root, "state.json")
+        self.command_dir = os.path.join(root, "commands")
+        self.lock_path = os.path.join(root, "engine.lock")
+        os.makedirs(self.command_dir, exist_ok=True)
+        self._lock_fp = None
+
+    @staticmethod
+    def _write_atomic(path: str, data: dict):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    # ------------------------------------------
+    # 상태 스냅샷
+    # ------------------------------------------
+    def publish(self, snapshot: dict):
+        snapshot = dict(snapshot)
+        snapshot.setdefault("ts", time.time())
+        self._write_atomic(self.state_path, snapshot)
+
+    def read(self):
+        """마지막 스냅샷(dict), 없거나 읽기 실패 시 None"""
+        try:
+            with open(self.state_path, encoding="utf-8") as fp:
+                return json.load(fp)
+        except:
+            return None
+
+    # ------------------------------------------
+    # 명령 (대시보드 → 엔진)
+    # ------------------------------------------
+    def push_command(self, name: str, **args):
+        cmd = {"name": name, "args": args, "ts": time.time()}
+        path = os.path.join(self.command_dir, f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json")
+        self._write_atomic(path, cmd)
+
+    def pop_commands(self):
+        """쌓인 명령을 들어온 순서대로 꺼냄(꺼낸 파일은 삭제)"""
+        out = []
+        try:
+            names = sorted(n for n in os.listdir(self.command_dir) if n.endswith(".json"))
+        except OSError:
+            return out
+        for name in names:
+            path = os.path.join(self.command_dir, name)
+            try:
+                with open(path, encoding="utf-8") as fp:
+                    out.append(json.load(fp))
+            except:
+                pass
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return out
+
+    # ------------------------------------------
+    # 엔진 단일 실행 잠금
+    # ------------------------------------------
+    def acquire_engine_lock(self):
+        """이미 다른 엔진이 돌고 있으면 False"""
+        if fcntl is None:
+            return True
+        fp = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fp.close()
+            return False
+        fp.seek(0)
+        fp.truncate()
+        fp.write(str(os.getpid()))
+        fp.flush()
+        self._lock_fp = fp
+        return True
+
+    def release_engine_lock(self):
+        if self._lock_fp is None:
+            return
+        try:
+            self._lock_fp.seek(0)
+            self._lock_fp.truncate()
+            self._lock_fp.close()
+        except OSError:
+            pass
+        self._lock_fp = None
+
+    def engine_running(self):
+        """잠금 파일의 pid 가 살아 있으면 엔진 실행 중 (잠금을 건드리지 않고 확인)"""
+        try:
+            with open(self.lock_path, encoding="utf-8") as fp:
+                pid = int(fp.read().strip() or 0)
+        except (OSError, ValueError):
+            return False
+        if pid <= 0:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True     # 다른 사용자 프로세스
+        return True
@@ -0,0 +1,236 @@
+"""
+전략 상수 파라미터 스윕 (그리드/랜덤) - 전 코어 프로세스풀
+
+- 과거 캔들은 컬럼형 디렉터리(필드별 .npy)를 각 워커가 mmap 으로 열어 공유
+  (데이터셋을 워커마다 pickle/복사하지 않음)
+- 결과는 JSONL 체크포인트에 한 줄씩 추가 → 중단 후 같은 명령으로 이어서 실행
+- 끝나면 지표 기준 순위표 출력 + CSV 저장
+
+    python sweep.py prepare hist.npz hist_cols          # .npz → 컬럼형(mmap) 변환
+    python sweep.py prepare --synthetic 120 --bars 8760 hist_cols
+    python sweep.py run hist_cols --k 0.1 0.15 0.2 0.3 --sl 0.01 0.02 0.03 \\
+        --tp 0.01 0.02 0.03 0.05 --max-holdings 3 5 8 --candidates 10 20 40 \\
+        --cooldown 180 3600 --checkpoint sweep.jsonl
+    python sweep.py run hist_cols ... --random 500        # 그리드에서 500개 무작위 추출
+"""
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from backtest import StrategyParams, load_dataset, synthetic_dataset, compute_signals, run_backtest
+
+# 스윕 대상: CLI 옵션 → StrategyParams 필드
+SWEEP_PARAMS = {
+    "k": "k",
+    "sl": "stop_loss_pct",
+    "tp": "take_profit_pct",
+    "max_holdings": "max_holdings",
+    "candidates": "candidate_size",
+    "cooldown": "cooldown_seconds",
+}
+# 신호 계산(목표가/후보/쿨다운 봉수)에 영향을 주는 필드 → 워커에서 캐시 키로 사용
+SIGNAL_FIELDS = ("k", "candidate_size", "cooldown_seconds", "reset_hour")
+STAT_COLUMNS = ("total_return", "pnl_krw", "max_drawdown", "sharpe", "buys", "win_rate", "avg_trade_return", "profit_factor")
+
+
+# ==========================================
+# 조합 생성
+# ==========================================
+def combo_key(combo: dict):
+    return json.dumps(combo, sort_keys=True)
+
+
+def grid_size(grid: dict):
+    n = 1
+    for values in grid.values():
+        n *= len(values)
+    return n
+
+
+def iter_grid(grid: dict):
+    names = list(grid)
+    for values in itertools.product(*(grid[n] for n in names)):
+        yield dict(zip(names, values))
+
+
+def sample_grid(grid: dict, n: int, seed: int = 0):
+    """
+    그리드 전체를 만들지 않고 혼합진법 인덱스로 n 개 무작위 추출(중복 없음)
+    """
+    names = list(grid)
+    total = grid_size(grid)
+    rng = random.Random(seed)
+    for idx in rng.sample(range(total), min(n, total)):
+        combo = {}
+        for name in reversed(names):
+            values = grid[name]
+            idx, r = divmod(idx, len(values))
+            combo[name] = values[r]
+        yield {name: combo[name] for name in names}
+
+
+# ==========================================
+# 워커
+# ==========================================
+_ds = None
+_signals = {}
+
+
+def _init_worker(data_path: str):
+    global _ds
+    _ds = load_dataset(data_path)   # mmap → 페이지 캐시 공유
+
+
+def _run_combo(combo: dict, base: dict):
+    p = StrategyParams(**{**base, **{SWEEP_PARAMS[k]: v for k, v in combo.items()}})
+
+    # 같은 K/후보수/쿨다운 조합은 신호 재사용 (작업을 K 순으로 넘겨서 적중률을 높임)
+    sig_key = tuple(getattr(p, f) for f in SIGNAL_FIELDS)
+    sig = _signals.get(sig_key)
+    if sig is None:
+        if len(_signals) >= 4:
+            _signals.clear()
+        sig = _signals[sig_key] = compute_signals(_ds, p)
+
+    t0 = time.perf_counter()
+    stats = run_backtest(_ds, p, sig)["stats"]
+    row = {k: stats[k] for k in STAT_COLUMNS}
+    row["seconds"] = time.perf_counter() - t0
+    return combo, row
+
+
+# ==========================================
+# 체크포인트
+# ==========================================
+def load_checkpoint(path: str):
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path) as fp:
+        for line in fp:
+            try:
+                rec = json.loads(line)
+                done[combo_key(rec["params"])] = rec
+            except:
+                continue   # 중단 시 마지막 줄이 잘렸을 수 있음
+    return done
+
+
+def rank_results(records, by: str):
+    reverse = by != "max_drawdown"
+    return sorted(records, key=lambda r: r["stats"].get(by, 0), reverse=reverse)
+
+
+def write_csv(path: str, records, names):
+    with open(path, "w", newline="") as fp:
+        w = csv.writer(fp)
+        w.writerow(["rank", *names, *STAT_COLUMNS])
+        for i, r in enumerate(records, 1):
+            w.writerow([i, *(r["params"][n] for n in names), *(r["stats"][c] for c in STAT_COLUMNS)])
+
+
+def print_table(records, names, top: int):
+    head = f"{'#':>4} " + " ".join(f"{n:>12}" for n in names) + f" {'return%':>9} {'mdd%':>7} {'sharpe':>7} {'trades':>7} {'win%':>6}"
+    print(head)
+    print("-" * len(head))
+    for i, r in enumerate(records[:top], 1):
+        s = r["stats"]
+        print(f"{i:>4} " + " ".join(f"{r['params'][n]:>12}" for n in names)
+              + f" {s['total_return']*100:>9.2f} {s['max_drawdown']*100:>7.2f} {s['sharpe']:>7.2f}"
+              f" {s['buys']:>7} {s['win_rate']*100:>6.1f}")
+
+
+def run_sweep(data_path: str, grid: dict, base: StrategyParams = None, random_n: int = 0, seed: int = 0,
+              workers: int = None, checkpoint: str = None, progress: bool = True):
+    """
+    반환: 체크포인트 포함 전체 결과 레코드 리스트 [{"params":{..}, "stats":{..}}]
+    """
+    base = dataclasses.asdict(base or StrategyParams())
+    combos = list(sample_grid(grid, random_n, seed) if random_n else iter_grid(grid))
+    done = load_checkpoint(checkpoint)
+    todo = [c for c in combos if combo_key(c) not in done]
+    todo.sort(key=lambda c: tuple(c.get(n, 0) for n in ("k", "candidates", "cooldown")))
+
+    if progress:
+        print(f"combos {len(combos)}  done {len(combos) - len(todo)}  todo {len(todo)}  workers {workers or os.cpu_count()}")
+
+    records = [done[combo_key(c)] for c in combos if combo_key(c) in done]
+    if not todo:
+        return records
+
+    t0 = time.time()
+    fp = open(checkpoint, "a") if checkpoint else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_path,)) as pool:
+            futures = [pool.submit(_run_combo, c, base) for c in todo]
+            for i, fut in enumerate(as_completed(futures), 1):
+                combo, stats = fut.result()
+                rec = {"params": combo, "stats": stats}
+                records.append(rec)
+                if fp:
+                    fp.write(json.dumps(rec) + "\n")
+                    fp.flush()
+                if progress and (i % 50 == 0 or i == len(todo)):
+                    rate = i / (time.time() - t0)
+                    print(f"  {i}/{len(todo)}  {rate:.1f} combos/s  eta {(len(todo) - i) / rate:.0f}s")
+    finally:
+        if fp:
+            fp.close()
+    return records
+
+
+def main():
+    ap = argparse.ArgumentParser(description="전략 파라미터 스윕")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    a = sub.add_parser("prepare", help="데이터셋을 컬럼형(mmap) 디렉터리로 변환")
+    a.add_argument("src", nargs="?", help=".npz 데이터셋")
+    a.add_argument("out")
+    a.add_argument("--synthetic", type=int, default=0, help="합성 데이터 마켓 수")
+    a.add_argument("--bars", type=int, default=8760)
+
+    a = sub.add_parser("run", help="스윕 실행")
+    a.add_argument("data", help="컬럼형 디렉터리(prepare 결과)")
+    d = StrategyParams()
+    a.add_argument("--k", type=float, nargs="+", default=[d.k])
+    a.add_argument("--sl", type=float, nargs="+", default=[d.stop_loss_pct])
+    a.add_argument("--tp", type=float, nargs="+", default=[d.take_profit_pct])
+    a.add_argument("--max-holdings", type=int, nargs="+", default=[d.max_holdings])
+    a.add_argument("--candidates", type=int, nargs="+", default=[d.candidate_size])
+    a.add_argument("--cooldown", type=float, nargs="+", default=[d.cooldown_seconds])
+    a.add_argument("--random", type=int, default=0, help="그리드에서 N 개만 무작위 추출")
+    a.add_argument("--seed", type=int, default=0)
+    a.add_argument("--workers", type=int, default=None)
+    a.add_argument("--checkpoint", default="sweep.jsonl")
+    a.add_argument("--rank-by", default="total_return", choices=STAT_COLUMNS)
+    a.add_argument("--top", type=int, default=20)
+    a.add_argument("--csv", default="sweep_results.csv")
+
+    args = ap.parse_args()
+
+    if args.cmd == "prepare":
+        from backtest import load_dataset as load_any
+        ds = synthetic_dataset(args.synthetic, args.bars) if args.synthetic else load_any(args.src)
+        ds.save_columnar(args.out)
+        print(f"saved {args.out}: {len(ds.markets)} markets x {len(ds.times)} bars")
+        return
+
+    grid = {name: getattr(args, name) for name in SWEEP_PARAMS}
+    records = run_sweep(args.data, grid, random_n=args.random, seed=args.seed,
+                        workers=args.workers, checkpoint=args.checkpoint)
+    ranked = rank_results(records, args.rank_by)
+    names = list(SWEEP_PARAMS)
+    print_table(ranked, names, args.top)
+    if args.csv:
+        write_csv(args.csv, ranked, names)
+        print(f"saved {args.csv} ({len(ranked)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 최상위 모듈(engine.py, mock_upbit.py ...)을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import upbit_api  # noqa: E402
+import engine as engine_mod  # noqa: E402
+from upbit_api import client, TokenBucket  # noqa: E402
+from mock_upbit import MockExchange, PricePath, start_http_server  # noqa: E402
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    """로컬 모의 거래소(HTTP) - upbit_api 가 이쪽으로 요청, 요청 한도는 풀어 둠"""
+    ex = MockExchange(n_markets=5, latency=0, rate_limit=0, path=PricePath(seed=1))
+    server, base_url = start_http_server(0, ex)
+    monkeypatch.setattr(upbit_api, "API_URL", base_url)
+    monkeypatch.setattr(client, "buckets", {g: TokenBucket(1e6, capacity=1e6) for g in client.buckets})
+    monkeypatch.setattr(upbit_api, "_market_cache", {"markets": None, "at": 0.0, "bad": set()})
+    yield ex
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine(exchange, tmp_path):
+    """모의 거래소 상대 TradingEngine (start() 없이) - 디스코드 메시지는 eng.sent 에 (msg, priority)"""
+    config = engine_mod.EngineConfig(
+        upbit_access="test", upbit_secret="test-secret-" + "0" * 32,
+        journal_path=str(tmp_path / "trades.db"), state_dir=str(tmp_path / "state"),
+        metrics_port=0, record_dir="",
+    )
+    eng = engine_mod.TradingEngine(config)
+    eng.executor.poll_interval = 0.0
+    eng.sent = []
+    eng.send_discord = lambda msg, priority=engine_mod.HIGH: eng.sent.append((msg, priority))
+    yield eng
+    eng.close()
+
+
+def hold(exchange, market: str, krw: float = 20_000):
+    """모의 계좌에 market 을 krw 어치 보유시킴 (현재 경로 가격 기준)"""
+    price = exchange.path.last(market)
+    exchange.accounts[market.split("-", 1)[1]] = {"balance": krw / price, "avg": price}
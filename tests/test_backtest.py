@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from backtest import Dataset, StrategyParams, ffill, load_dataset, rolling_sum_prev, run_backtest, synthetic_dataset
+
+DAY_START = 1_700_006_400     # 2023-11-15 00:00 UTC = 09:00 KST
+
+
+def one_market(bars):
+    """bars: [(open, high, low, close)] → 1마켓 1시간봉 Dataset (첫 봉이 09:00 KST)"""
+    cols = {f: np.array([[b[i] for b in bars]], dtype=float) for i, f in enumerate(("open", "high", "low", "close"))}
+    cols["value"] = np.ones((1, len(bars)))
+    return Dataset(DAY_START + np.arange(len(bars)) * 3600, ["KRW-A"], **cols)
+
+
+def test_breakout_buy_then_take_profit():
+    ds = one_market([(100, 110, 90, 100),      # 범위 20
+                     (100, 112, 99, 111),      # 목표 100 + 20*0.5 = 110 돌파 → 110 매수
+                     (111, 115, 110, 114)])    # 익절 110*1.02 = 112.2
+    p = StrategyParams(k=0.5, take_profit_pct=0.02, stop_loss_pct=0.02, fee=0.0,
+                       max_holdings=1, max_buy_amount=1e9, cooldown_seconds=0, initial_krw=10000)
+    res = run_backtest(ds, p)
+    tr = res["trades"]
+    assert tr["side"].tolist() == ["BUY", "SELL"]
+    assert tr["bar"].tolist() == [1, 2]
+    assert tr["price"].tolist() == pytest.approx([110.0, 112.2])
+    assert tr["reason"].tolist() == ["BREAKOUT_BUY", "TAKE_PROFIT"]
+    assert res["equity"][-1] == pytest.approx(10000 * 0.999 * 1.02 + 10000 * 0.001)
+    assert res["stats"]["buys"] == 1 and res["stats"]["exit_reasons"] == {"TAKE_PROFIT": 1}
+
+
+def test_stop_loss_wins_when_both_hit_in_one_bar():
+    ds = one_market([(100, 110, 90, 100),
+                     (100, 111, 100, 110),     # 110 매수
+                     (110, 120, 100, 110)])    # 익절/손절 둘 다 닿음 → 손절 107.8
+    p = StrategyParams(k=0.5, fee=0.0, max_holdings=1, cooldown_seconds=0, initial_krw=10000)
+    tr = run_backtest(ds, p)["trades"]
+    assert tr["reason"].tolist() == ["BREAKOUT_BUY", "STOP_LOSS"]
+    assert tr["price"][-1] == pytest.approx(107.8)
+
+
+def test_rolling_sum_prev_excludes_current_bar():
+    x = np.array([[1.0, 2.0, np.nan, 4.0]])
+    assert rolling_sum_prev(x, 2).tolist() == [[0.0, 1.0, 3.0, 2.0]]
+    assert ffill(np.array([[1.0, np.nan, np.nan, 2.0]])).tolist() == [[1.0, 1.0, 1.0, 2.0]]
+
+
+def test_columnar_round_trip(tmp_path):
+    ds = synthetic_dataset(n_markets=3, n_bars=48, seed=1)
+    ds.save_columnar(str(tmp_path / "cols"))
+    ds.save(str(tmp_path / "d.npz"))
+    for loaded in (load_dataset(str(tmp_path / "cols")), load_dataset(str(tmp_path / "d.npz"))):
+        assert loaded.markets.tolist() == ds.markets.tolist()
+        assert np.array_equal(loaded.close, ds.close)
+        assert run_backtest(loaded)["stats"] == run_backtest(ds)["stats"]
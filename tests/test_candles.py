@@ -0,0 +1,102 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from candles import CandleRing, CandleStore, bar_start, breakout_targets
+
+
+def bar(start, o=100.0, h=110.0, lo=90.0, c=105.0, v=1.0):
+    return {"start": start, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+
+
+def test_ring_wraps_and_overwrites_same_bar():
+    r = CandleRing(3)
+    for s in range(5):
+        r.append(bar(s, c=float(s)))
+    assert r.size == 3 and r.column("start") == [2.0, 3.0, 4.0]
+    r.append(bar(4, c=99.0))                # 같은 봉 → 덮어쓰기
+    r.append(bar(1))                        # 과거 봉 → 무시
+    assert r.column("close") == [2.0, 3.0, 99.0]
+    assert list(r.positions(3)) == [(r._head - 3 + i) % 3 for i in range(3)]
+
+
+def test_update_last_tracks_high_low_close_volume():
+    r = CandleRing(4)
+    r.append(bar(0, o=100, h=100, lo=100, c=100, v=0))
+    for p in (103.0, 97.0, 101.0):
+        r.update_last(p, 2.0)
+    assert r.last()[0] == {"start": 0.0, "open": 100.0, "high": 103.0, "low": 97.0, "close": 101.0, "volume": 6.0}
+
+
+def test_targets_skip_markets_without_current_bar():
+    store = CandleStore(fetch=lambda *a, **kw: [])
+    now_bar = store.bar_start()
+    store.ring("KRW-A").append(bar(now_bar - 3600, h=110, lo=90))
+    store.ring("KRW-A").append(bar(now_bar, o=100))
+    store.ring("KRW-B").append(bar(now_bar - 7200))
+    store.ring("KRW-B").append(bar(now_bar - 3600))
+    assert store.targets(["KRW-A", "KRW-B"], 0.5) == {"KRW-A": pytest.approx(110.0)}
+
+
+def test_roll_fetches_only_new_bars():
+    asked = []
+
+    def fetch(market, interval, count):
+        asked.append((market, count))
+        now = store.bar_start(ts)
+        return [bar(now - 3600 * i) for i in range(count - 1, -1, -1)]
+
+    store = CandleStore(fetch=fetch)
+    ts = 1_700_000_000
+    assert store.roll(["KRW-A"], ts) == (True, {})
+    assert asked == [("KRW-A", 2)]                  # 처음은 warmup 만큼
+    assert store.roll(["KRW-A"], ts + 60) == (False, {})
+    ts += 3600
+    assert store.roll(["KRW-A"], ts)[0]
+    assert asked[-1] == ("KRW-A", 2)                # 새 봉 + 직전 봉 확정값
+    assert store.ring("KRW-A").last_start() == store.bar_start(ts)
+
+
+def test_on_trade_bumps_version_only_on_new_bar():
+    store = CandleStore(fetch=lambda *a, **kw: [])
+    b = store.bar_start(1_700_000_000)
+    store.ring("KRW-A").append(bar(b - 3600))
+    store.on_trade("KRW-A", 100.0, 1.0, b + 1)
+    version = store.version
+    for i in range(20):
+        store.on_trade("KRW-A", 100.0 + i, 1.0, b + 2 + i)
+    assert store.version == version
+    assert store.ring("KRW-A").last()[0]["high"] == 119.0
+    store.on_trade("KRW-A", 90.0, 1.0, b + 3600)
+    assert store.version == version + 1
+
+
+def test_breakout_target_fixed_k():
+    # 직전 봉 범위 20, 이번 봉 시가 100 → 100 + 20 * 0.5
+    mat = {f: np.array([[x, y]], dtype=float) for f, x, y in
+           (("open", 95, 100), ("high", 110, 100), ("low", 90, 100), ("close", 100, 100))}
+    assert breakout_targets(mat, 0.5)[0] == pytest.approx(110.0)
+
+
+def test_breakout_target_noise_k_and_atr():
+    # 직전 2봉: 노이즈 1-|c-o|/(h-l) = 1-5/20 = 0.75, 1-10/20 = 0.5 → K 0.625
+    o = np.array([[100, 100, 100, 120]], dtype=float)
+    h = np.array([[110, 110, 110, 120]], dtype=float)
+    lo = np.array([[90, 90, 90, 120]], dtype=float)
+    c = np.array([[100, 105, 110, 120]], dtype=float)
+    mat = {"open": o, "high": h, "low": lo, "close": c}
+    assert breakout_targets(mat, 0.5, noise_window=2)[0] == pytest.approx(120 + 20 * 0.625)
+    # ATR(2): TR 은 고가-저가 20 (직전 종가가 범위 안) → 범위 20
+    assert breakout_targets(mat, 0.5, atr_window=2)[0] == pytest.approx(130.0)
+
+
+def test_week_bars_start_monday_0900_kst():
+    kst = datetime.timezone(datetime.timedelta(hours=9))
+    ts = datetime.datetime(2026, 10, 18, 12, 0, tzinfo=kst).timestamp()      # 일요일
+    start = datetime.datetime.fromtimestamp(bar_start("week", ts), kst)
+    assert (start.weekday(), start.hour, start.minute) == (0, 9, 0) and start.day == 12
+    monday = datetime.datetime(2026, 10, 19, 9, 0, tzinfo=kst).timestamp()
+    assert bar_start("week", monday) == monday and bar_start("week", monday - 1) == bar_start("week", ts)
+    assert CandleStore("week", fetch=lambda *a, **kw: []).bar_start(ts) == bar_start("week", ts)
+    assert bar_start("day", ts) == datetime.datetime(2026, 10, 18, 9, 0, tzinfo=kst).timestamp()
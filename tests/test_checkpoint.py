@@ -0,0 +1,63 @@
+import os
+
+import checkpoint
+import engine as engine_mod
+from checkpoint import Checkpoint
+
+
+def test_save_load_round_trip_and_dedupe(tmp_path):
+    cp = Checkpoint(str(tmp_path / "state" / "checkpoint.json"))
+    assert cp.save({"cooldown": {"KRW-A": 1.0}, "candidates": ["KRW-A"]})
+    assert not cp.save({"candidates": ["KRW-A"], "cooldown": {"KRW-A": 1.0}})    # 키 순서만 다름
+    assert cp.saves == 1
+
+    state = Checkpoint(cp.path).load()
+    assert state["cooldown"] == {"KRW-A": 1.0} and state["candidates"] == ["KRW-A"]
+    assert not [f for f in os.listdir(tmp_path / "state") if f.endswith(".tmp")]
+
+
+def test_load_after_load_skips_identical_save(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    Checkpoint(path).save({"a": 1})
+    cp = Checkpoint(path)
+    cp.load()
+    assert not cp.save({"a": 1})
+
+
+def test_load_rejects_corrupt_or_other_version(tmp_path, monkeypatch):
+    path = tmp_path / "checkpoint.json"
+    assert Checkpoint(str(path)).load() is None
+    path.write_text("{not json", encoding="utf-8")
+    assert Checkpoint(str(path)).load() is None
+
+    Checkpoint(str(path)).save({"a": 1})
+    monkeypatch.setattr(checkpoint, "CHECKPOINT_VERSION", checkpoint.CHECKPOINT_VERSION + 1)
+    assert Checkpoint(str(path)).load() is None
+
+
+def test_checkpoint_skips_identical_state(engine):
+    engine.save_checkpoint()
+    engine.save_checkpoint()
+    assert engine.checkpoint.saves == 1
+    engine.cooldown["KRW-C000"] = 1.0
+    engine.save_checkpoint()
+    assert engine.checkpoint.saves == 2
+
+
+def test_warm_restart_restores_session(exchange, engine):
+    engine.prepare_targets()
+    engine.cooldown[engine.candidates[0]] = engine_mod.time.time()
+    engine.save_checkpoint()
+
+    again = engine_mod.TradingEngine(engine.config)
+    try:
+        assert again.restore_checkpoint()
+        assert again.candidates == engine.candidates
+        assert again.target_prices == engine.target_prices
+        assert again.cooldown == engine.cooldown
+        calls = exchange.calls.get("/v1/candles/minutes/60", 0)
+        assert calls >= len(engine.candidates)
+        assert again.target_prices_from_cache(again.candidates, {})[0] == engine.target_prices
+        assert exchange.calls.get("/v1/candles/minutes/60", 0) == calls      # 캔들 재조회 없음
+    finally:
+        again.close()
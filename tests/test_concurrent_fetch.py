@@ -0,0 +1,42 @@
+import threading
+import time
+
+from upbit_api import fetch_concurrently, get_candles
+
+
+def test_partial_failures_keep_other_results():
+    def fn(m):
+        if m == "KRW-BAD":
+            raise ValueError("boom")
+        return m.lower()
+
+    results, errors = fetch_concurrently(["KRW-A", "KRW-BAD", "KRW-A", "KRW-B"], fn)
+    assert results == {"KRW-A": "krw-a", "KRW-B": "krw-b"}
+    assert errors == {"KRW-BAD": "boom"}
+    assert fetch_concurrently([], fn) == ({}, {})
+
+
+def test_runs_in_parallel():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fn(m):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return m
+
+    fetch_concurrently([f"KRW-{i}" for i in range(8)], fn, max_workers=4)
+    assert peak[0] == 4
+
+
+def test_candles_from_mock_oldest_first(exchange):
+    results, errors = fetch_concurrently(exchange.markets, lambda m: get_candles(m, "minute60", count=3))
+    assert not errors and set(results) == set(exchange.markets)
+    for rows in results.values():
+        starts = [c["start"] for c in rows]
+        assert len(rows) == 3 and starts == sorted(starts)
+        assert all(c["low"] <= c["close"] <= c["high"] for c in rows)
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from executor import Order, OrderExecutor, parse_order
+from journal import TradeJournal
+from portfolio import PortfolioState
+
+
+@pytest.mark.parametrize("data, expected", [
+    # 체결 내역이 있으면 그 합계
+    ({"state": "done", "ord_type": "market", "trades": [{"volume": "1.5", "funds": "150"}, {"volume": "0.5", "funds": "52"}],
+      "paid_fee": "0.1"}, ("done", 2.0, 202.0, 0.1)),
+    # 시장가 매수: price 는 주문 총액 → 그대로 체결금액
+    ({"state": "cancel", "ord_type": "price", "price": "10000", "executed_volume": "0.2"}, ("cancel", 0.2, 10000.0, 0.0)),
+    # 지정가: 단가 * 수량
+    ({"state": "done", "ord_type": "limit", "price": "500", "executed_volume": "3"}, ("done", 3.0, 1500.0, 0.0)),
+    # 아직 체결 없음 → 금액 0 (주문 총액을 체결금액으로 보지 않음)
+    ({"state": "wait", "ord_type": "price", "price": "10000", "executed_volume": "0"}, ("wait", 0.0, 0.0, 0.0)),
+])
+def test_parse_order_funds(data, expected):
+    assert parse_order(data) == expected
+
+
+class FakeUpbit:
+    """매수는 즉시 체결(단가 100), 매도는 거절"""
+
+    def __init__(self):
+        self.orders = {}
+
+    def get_balances(self):
+        return [{"currency": "KRW", "balance": "100000", "avg_buy_price": "0"}]
+
+    def buy_market_order(self, market, amount):
+        uuid = f"u{len(self.orders)}"
+        self.orders[uuid] = {"uuid": uuid, "state": "cancel", "ord_type": "price", "price": str(amount),
+                             "trades": [{"volume": str(amount / 100), "funds": str(amount)}], "paid_fee": "0"}
+        return {"uuid": uuid}
+
+    def sell_market_order(self, market, volume):
+        return {"error": "insufficient_funds_ask: 부족"}
+
+    def get_order(self, uuid):
+        return self.orders[uuid]
+
+
+def test_execute_applies_fills_and_reports_rejections():
+    upbit = FakeUpbit()
+    pf = PortfolioState(upbit, ttl=3600)
+    pf.refresh()
+    ex = OrderExecutor(upbit, pf, poll_interval=0)
+    try:
+        (buy,) = ex.execute([Order("bid", "KRW-A", 5000)])
+        assert buy.ok and buy.confirmed and buy.price == 100.0
+        assert pf.quantity("KRW-A") == 50.0 and pf.krw_balance() == 95000.0     # 재조회 없이 반영
+        (sell,) = ex.execute([Order("ask", "KRW-B", 1.0)])
+    finally:
+        ex.shutdown()
+    assert not sell.ok and sell.error.startswith("insufficient_funds_ask")
+    assert pf._dirty                                    # 거절되면 잔고 다시 조회
+    assert (ex.submitted, ex.failed, ex.unconfirmed) == (1, 1, 0)
+
+
+def test_unconfirmed_buy_journaled_without_price_then_settled(exchange, engine):
+    market = exchange.markets[0]
+    exchange.fill_delay = 3600
+    engine.executor.fill_timeout = 0.05
+
+    fill = engine.executor.execute([Order("bid", market, 10_000, ref_price=exchange.path.last(market))])[0]
+    assert not fill.confirmed and fill.price is None
+    engine.hold_fill(fill, "BUY", "BREAKOUT_BUY")
+    engine.journal.flush()
+    (row,) = engine.journal.trades_since(0)
+    assert row["price"] is None and "체결 확인 대기" in row["reason"]
+
+    exchange.fill_delay = 0
+    engine.reconcile_fills()
+    engine.journal.flush()
+    assert engine.pending_fills == []
+    (row,) = engine.journal.trades_since(0)
+    assert row["price"] == fill.price and row["reason"] == "BREAKOUT_BUY"
+    assert row["amount_krw"] == int(fill.funds)
+    assert [b["coin"] for b in engine.journal.buys_since(0)] == [market]
+
+
+def test_settle_trade_fills_price_later(tmp_path):
+    path = str(tmp_path / "t.db")
+    journal = TradeJournal(path, flush_interval=60)
+    try:
+        trade_id = journal.add_trade("SELL", "KRW-A", price=None, reason="STOP_LOSS(체결 확인 대기)", ts=1.0)
+        journal.settle_trade(trade_id, 98.5, 9850, "STOP_LOSS(-1.50%)")
+        (row,) = journal.trades_since(0)
+        assert (row["price"], row["amount_krw"], row["reason"]) == (98.5, 9850, "STOP_LOSS(-1.50%)")
+        assert journal.flush()
+        assert sqlite3.connect(path).execute("SELECT price, reason FROM trades").fetchone() == (98.5, "STOP_LOSS(-1.50%)")
+    finally:
+        journal.close()
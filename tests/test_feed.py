@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import pytest
+
+import engine as engine_mod
+import feed as feed_mod
+from feed import H_SEQ, SharedFeed, check_workers
+
+
+@pytest.fixture
+def shared():
+    feed = SharedFeed(f"test_feed_{os.getpid()}", intervals=["minute60"], bars=4, max_markets=8, create=True)
+    reader = SharedFeed(feed.name)
+    yield feed, reader
+    reader.close()
+    feed.close()
+
+
+def test_prices_and_candidates_reach_reader(shared):
+    feed, reader = shared
+    feed.publish_prices({"KRW-A": 100.0, "KRW-B": 200.0}, values={"KRW-A": 5e9, "KRW-B": 1e9})
+    feed.publish_candidates(["KRW-B", "KRW-A"])
+    assert reader.snapshot(["KRW-A", "KRW-B", "KRW-X"]) == {"KRW-A": 100.0, "KRW-B": 200.0}
+    top, values = reader.candidates()
+    assert top == ["KRW-B", "KRW-A"] and values == {"KRW-A": 5e9, "KRW-B": 1e9}
+
+    feed.publish_prices({"KRW-C": 300.0})      # 새 마켓은 뒤에 추가 → 리더가 이름표 다시 읽음
+    assert reader.snapshot(["KRW-C"]) == {"KRW-C": 300.0}
+
+
+def test_candles_keep_last_bars(shared):
+    feed, reader = shared
+    bar = int(time.time() // 3600) * 3600
+    rows = [{"start": bar - 3600 * i, "open": i, "high": i, "low": i, "close": i, "volume": i} for i in range(6, -1, -1)]
+    feed.publish_prices({"KRW-A": 1.0})
+    feed.publish_candles(0, bar, {"KRW-A": rows})
+    got = reader.candles("KRW-A", "minute60", count=10)
+    assert [c["start"] for c in got] == [r["start"] for r in rows[-4:]]     # bars=4 개까지만
+
+
+def test_stale_feed_gives_no_prices_or_candidates(shared, monkeypatch):
+    feed, reader = shared
+    feed.publish_prices({"KRW-A": 100.0}, values={"KRW-A": 5e9})
+    feed.publish_candidates(["KRW-A"])
+    bar = int(time.time() // 3600) * 3600
+    feed.publish_candles(0, bar, {"KRW-A": [{"start": bar, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}]})
+    fetched = []
+    monkeypatch.setattr(feed_mod, "get_candles", lambda m, iv, count: fetched.append(m) or [])
+
+    reader.max_age = -1
+    assert reader.snapshot(["KRW-A"]) == {}
+    assert reader.candidates() == ([], {})
+    assert reader.candles("KRW-A", "minute60") == [] and fetched == ["KRW-A"]     # 멈춘 피드 대신 직접 조회
+
+
+def test_seqlock_read_waits_for_writer(shared):
+    feed, reader = shared
+    feed.publish_prices({"KRW-A": 1.0})
+    header = feed._v["header"]
+    header[H_SEQ] += 1                      # 쓰는 중 (홀수)
+    feed._v["prices"][0] = 2.0
+
+    def finish():
+        time.sleep(0.05)
+        header[H_SEQ] += 1
+
+    threading.Thread(target=finish).start()
+    t0 = time.perf_counter()
+    assert reader.snapshot(["KRW-A"]) == {"KRW-A": 2.0}
+    assert time.perf_counter() - t0 >= 0.04
+
+
+def test_read_gives_up_when_writer_died_mid_write(shared, monkeypatch):
+    feed, reader = shared
+    feed.publish_prices({"KRW-A": 1.0})
+    bar = int(time.time() // 3600) * 3600
+    feed.publish_candles(0, bar, {"KRW-A": [{"start": bar, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}]})
+    feed.publish_candidates(["KRW-A"])
+    feed._v["header"][H_SEQ] += 1          # 쓰다가 죽음 → 홀수로 남음
+    monkeypatch.setattr(feed_mod, "get_candles", lambda m, iv, count: [{"start": 0}])
+    reader.read_timeout = 0.05
+
+    t0 = time.perf_counter()
+    assert reader.snapshot(["KRW-A"]) == {}
+    assert reader.candidates() == ([], {})
+    assert reader.candles("KRW-A", "minute60") == [{"start": 0}]
+    assert time.perf_counter() - t0 < 1.0
+
+
+def test_check_workers_rejects_shared_paths():
+    a = engine_mod.EngineConfig(state_dir="sa", journal_path="a.db", metrics_port=0, record_dir="rec_a")
+    b = engine_mod.EngineConfig(state_dir="sb", journal_path="b.db", metrics_port=0, record_dir="rec_b")
+    assert check_workers({"a.toml": a, "b.toml": b}) is None
+    b.record_dir = "rec_a"
+    assert "record_dir" in check_workers({"a.toml": a, "b.toml": b})
+    b.record_dir = ""
+    b.journal_path = "a.db"
+    assert "journal_path" in check_workers({"a.toml": a, "b.toml": b})
@@ -0,0 +1,42 @@
+import sqlite3
+
+from journal import TradeJournal
+
+
+def test_pending_rows_visible_before_flush_and_ids_stable(tmp_path):
+    journal = TradeJournal(str(tmp_path / "t.db"), flush_interval=60)
+    try:
+        ids = [journal.add_trade("BUY", "KRW-A", price=100.0, amount_krw=5000, ts=float(i)) for i in range(3)]
+        assert ids == [1, 2, 3]
+        assert [t["id"] for t in journal.trades_since(0)] == ids     # 아직 안 썼어도 조회됨
+        assert journal.flush()
+        assert [t["id"] for t in journal.trades_since(0)] == ids     # 쓴 뒤에도 중복 없음
+        assert [t["id"] for t in journal.trades_since(1.0)] == [2, 3]
+    finally:
+        journal.close()
+
+
+def test_batch_written_in_one_pass(tmp_path):
+    path = str(tmp_path / "t.db")
+    journal = TradeJournal(path, flush_interval=60, batch_size=1000)
+    try:
+        for i in range(250):
+            journal.add_buy(f"KRW-{i % 5}", float(i), 5000, 100.0)
+        assert journal.flush()
+        assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM buys").fetchone()[0] == 250
+        assert len(journal.buys_since(0, coins=["KRW-1"])) == 50
+    finally:
+        journal.close()
+
+
+def test_ids_continue_after_reopen(tmp_path):
+    path = str(tmp_path / "t.db")
+    journal = TradeJournal(path)
+    journal.add_trade("BUY", "KRW-A", price=1.0, ts=1.0)
+    journal.flush()
+    journal.close()
+    journal = TradeJournal(path)
+    try:
+        assert journal.add_trade("BUY", "KRW-B", price=1.0, ts=2.0) == 2
+    finally:
+        journal.close()
@@ -0,0 +1,62 @@
+from conftest import hold
+from notifier import HIGH
+
+
+def reject_asks(exchange, market: str):
+    """market 매도만 거절하는 place_order (되돌릴 원래 함수 반환)"""
+    place = exchange.place_order
+
+    def patched(body):
+        if body.get("market") == market and body.get("side") == "ask":
+            return exchange._reject("insufficient_funds_ask", "주문가능한 금액(코인)이 부족합니다.")
+        return place(body)
+
+    exchange.place_order = patched
+    return place
+
+
+def test_sell_all_with_rejected_ask_reports_leftover(exchange, engine):
+    stuck, ok = exchange.markets[:2]
+    hold(exchange, stuck)
+    hold(exchange, ok)
+    place = reject_asks(exchange, stuck)
+
+    left = engine.sell_all()
+
+    assert list(left) == [stuck]
+    assert "insufficient_funds_ask" in left[stuck]
+    assert exchange.accounts[ok.split("-")[1]]["balance"] == 0.0
+    messages = [m for m, _ in engine.sent]
+    assert not any("전량 매도 완료" in m for m in messages)
+    alert = [(m, p) for m, p in engine.sent if "전량 매도 미완료" in m]
+    assert alert and stuck in alert[0][0] and alert[0][1] == HIGH
+
+    exchange.place_order = place
+    engine.sent.clear()
+    assert engine.sell_all() == {}
+    assert any("전량 매도 완료" in m for m, _ in engine.sent)
+
+
+def test_staged_sell_all_retries_with_fresh_orders(exchange, engine):
+    market = exchange.markets[0]
+    hold(exchange, market)
+    engine.portfolio.refresh(force=True)
+    staged = engine.liquidation_orders()
+    hold(exchange, market, krw=30_000)      # 청산 주문을 만든 뒤 더 산 경우
+
+    assert engine.sell_all(staged) == {}
+    assert exchange.accounts[market.split("-")[1]]["balance"] == 0.0
+
+
+def test_retry_liquidation_until_flat(exchange, engine):
+    stuck = exchange.markets[0]
+    hold(exchange, stuck)
+    place = reject_asks(exchange, stuck)
+    engine._liquidation = {"since": 0.0, "next": 0.0}
+
+    engine.retry_liquidation(1.0)
+    assert engine._liquidation is not None and engine._liquidation["next"] > 1.0
+
+    exchange.place_order = place
+    engine.retry_liquidation(engine._liquidation["next"])
+    assert engine._liquidation is None
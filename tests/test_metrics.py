@@ -0,0 +1,44 @@
+import urllib.request
+
+import pytest
+
+from metrics import Histogram, Registry, serve_metrics
+
+
+def test_histogram_quantile_within_buckets():
+    h = Histogram(buckets=(0.01, 0.1, 1.0))
+    for v in [0.005] * 50 + [0.05] * 49 + [0.5]:
+        h.observe(v)
+    assert h.counts == [50, 49, 1, 0] and h.count == 100
+    assert 0.0 < h.quantile(0.5) <= 0.01
+    assert 0.01 < h.quantile(0.99) <= 0.1
+    assert h.quantile(1.0) == pytest.approx(0.5)      # 최댓값을 넘지 않음
+
+
+def test_timer_laps_and_error_count():
+    reg = Registry()
+    with pytest.raises(ValueError):
+        with reg.timer("engine_stage_seconds", stage="sells"):
+            raise ValueError
+    lap = reg.laps()
+    lap("prices")
+    lap("buys")
+    snap = reg.snapshot()
+    assert {h["labels"] for h in snap["histograms"]} == {"stage=sells", "stage=prices", "stage=buys"}
+    assert snap["counters"] == [{"name": "engine_errors_total", "labels": "stage=sells", "value": 1}]
+
+
+def test_prometheus_text_served():
+    reg = Registry()
+    reg.inc("orders_total", side="bid", result="done")
+    reg.observe("order_fill_seconds", 0.2, side="bid")
+    server = serve_metrics(0, registry=reg)
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5).read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'orders_total{result="done",side="bid"} 1' in body
+    assert 'order_fill_seconds_bucket{side="bid",le="+Inf"} 1' in body
+    assert 'order_fill_seconds_count{side="bid"} 1' in body
+    assert "# TYPE order_fill_seconds histogram" in body
@@ -0,0 +1,73 @@
+from candles import bar_start
+from mock_upbit import MockExchange, PricePath, quantize_volume
+from upbit_api import get_candles
+
+
+def make_exchange(**kw):
+    return MockExchange(n_markets=3, latency=0, rate_limit=0, path=PricePath(seed=0), **kw)
+
+
+def reported_balance(ex, currency: str):
+    """account_rows 가 보고하는 잔고 (엔진이 매도 수량으로 쓰는 값)"""
+    for row in ex.account_rows():
+        if row["currency"] == currency:
+            return row["balance"]
+    return "0"
+
+
+def test_quantize_volume_floors_to_8_decimals():
+    assert quantize_volume(1.123456789) == 1.12345678
+    assert quantize_volume(0.1 + 0.2) == 0.3      # 부동소수 오차로 한 단위 내려가지 않음
+
+
+def test_buy_then_sell_reported_balance_round_trip():
+    ex = make_exchange(fee=0.0005)
+    market = ex.markets[0]
+    status, bid = ex.place_order({"market": market, "side": "bid", "ord_type": "price", "price": "10000"})
+    assert status == 201
+
+    volume = reported_balance(ex, "C000")
+    status, ask = ex.place_order({"market": market, "side": "ask", "ord_type": "market", "volume": volume})
+    assert status == 201, ask
+    assert ex.accounts["C000"]["balance"] == 0.0
+    assert ex.rejected == {}
+    # 같은 가격에 사고팔았으니 수수료(양쪽 0.05%)만큼만 줄어듦
+    assert abs(ex.accounts["KRW"]["balance"] - (1_000_000 - 10000 * 0.0005 * 2)) < 1.0
+
+
+def test_repeated_buys_sell_in_full():
+    ex = make_exchange()
+    market = ex.markets[1]
+    for _ in range(7):
+        ex.path.next(market)
+        ex.place_order({"market": market, "side": "bid", "ord_type": "price", "price": "3333"})
+    status, _ = ex.place_order({"market": market, "side": "ask", "ord_type": "market",
+                                "volume": reported_balance(ex, "C001")})
+    assert status == 201
+    assert ex.accounts["C001"]["balance"] == 0.0
+
+
+def test_oversell_rejected_and_counted():
+    ex = make_exchange()
+    market = ex.markets[2]
+    ex.place_order({"market": market, "side": "bid", "ord_type": "price", "price": "5000"})
+    volume = float(reported_balance(ex, "C002")) * 2
+    status, resp = ex.place_order({"market": market, "side": "ask", "ord_type": "market", "volume": str(volume)})
+    assert status == 400
+    assert resp["error"]["name"] == "insufficient_funds_ask"
+    assert ex.rejected == {"insufficient_funds_ask": 1}
+
+
+def test_order_state_after_fill_delay():
+    ex = make_exchange(fill_delay=60)
+    _, resp = ex.place_order({"market": ex.markets[0], "side": "bid", "ord_type": "price", "price": "5000"})
+    assert ex.order(resp["uuid"])["state"] == "wait"
+    ex.fill_delay = 0
+    order = ex.order(resp["uuid"])
+    assert order["state"] == "cancel" and order["trades"]
+
+
+def test_week_candles_aligned_with_engine_bars(exchange):
+    rows = get_candles(exchange.markets[0], "week", count=2)
+    assert rows[-1]["start"] == bar_start("week")
+    assert rows[-1]["start"] - rows[0]["start"] == 7 * 86400
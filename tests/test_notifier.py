@@ -0,0 +1,82 @@
+from notifier import DISCORD_MAX_LEN, HIGH, LOW, DiscordNotifier
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return {}
+
+
+class Recorder:
+    """post 대신 넣어 본문을 모음 (statuses 순서대로 응답, 다 쓰면 204)"""
+
+    def __init__(self, statuses=()):
+        self.contents = []
+        self.statuses = list(statuses)
+
+    def __call__(self, url, json=None, timeout=None):
+        self.contents.append(json["content"])
+        status = self.statuses.pop(0) if self.statuses else 204
+        return FakeResponse(status, {"Retry-After": "0"} if status == 429 else None)
+
+
+def notifier(post, **kw):
+    kw.setdefault("batch_window", 0.5)      # 보내는 동안 모이고, 남은 건 stop() 이 한 번에 보냄
+    return DiscordNotifier("http://discord.test/webhook", min_interval=0, post=post, **kw)
+
+
+def test_messages_coalesced_into_one_post():
+    post = Recorder()
+    n = notifier(post)
+    for i in range(5):
+        n.send(f"매수 {i}")
+    n.stop()
+    assert post.contents == ["\n".join(f"매수 {i}" for i in range(5))]
+    assert n.sent == 5 and n.posts == 1
+
+
+def test_batches_split_at_discord_limit():
+    post = Recorder()
+    n = notifier(post)
+    for i in range(3):
+        n.send(str(i) * 900)
+    n.send("x" * (DISCORD_MAX_LEN + 10))
+    n.stop()
+    assert all(len(c) <= DISCORD_MAX_LEN for c in post.contents)
+    assert "".join(post.contents).replace("\n", "") == "".join(str(i) * 900 for i in range(3)) + "x" * (DISCORD_MAX_LEN + 10)
+
+
+def test_backlog_summarizes_low_priority():
+    post = Recorder()
+    n = notifier(post, backlog=3)
+    n.send("매도 KRW-A", HIGH)
+    for i in range(5):
+        n.send(f"리포트 {i}", LOW)
+    n.stop()
+    (content,) = post.contents
+    assert content.startswith("매도 KRW-A\n")
+    assert "5건 생략" in content and "리포트 4" in content and "리포트 0" not in content
+    assert n.summarized == 4
+
+
+def test_full_queue_high_evicts_low():
+    n = notifier(Recorder(), maxsize=2)
+    n.send("low", LOW)
+    n.send("high 1", HIGH)
+    n.send("high 2", HIGH)          # LOW 를 밀어냄
+    n.send("low 2", LOW)            # 자리 없음 → 버림
+    assert list(n._q) == [(HIGH, "high 1"), (HIGH, "high 2")]
+    assert n.dropped == 2
+    n.stop()
+
+
+def test_throttled_post_retried():
+    post = Recorder(statuses=[429])
+    n = notifier(post)
+    n.send("에러")
+    n.stop()
+    assert post.contents == ["에러", "에러"]
+    assert n.throttled == 1 and n.sent == 1
@@ -0,0 +1,54 @@
+from portfolio import PortfolioState
+
+
+class FakeUpbit:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def get_balances(self):
+        self.calls += 1
+        return [dict(r) for r in self.rows] if isinstance(self.rows, list) else self.rows
+
+
+def rows():
+    return [{"currency": "KRW", "balance": "100000", "avg_buy_price": "0"},
+            {"currency": "A", "balance": "2", "avg_buy_price": "5000"},
+            {"currency": "B", "balance": "0.0001", "avg_buy_price": "100"}]
+
+
+def test_one_fetch_shared_until_invalidated():
+    upbit = FakeUpbit(rows())
+    pf = PortfolioState(upbit, ttl=3600)
+    assert pf.krw_balance() == 100000.0
+    assert pf.quantity("KRW-A") == 2.0 and pf.avg_buy_price("KRW-A") == 5000.0
+    assert pf.holdings() == ["KRW-A"]                   # B 는 최소 주문금액 미만
+    assert sorted(pf.coins()) == ["KRW-A", "KRW-B"]
+    assert upbit.calls == 1
+
+    pf.invalidate()
+    pf.quantity("KRW-A")
+    assert upbit.calls == 2
+
+
+def test_failed_fetch_keeps_last_snapshot():
+    upbit = FakeUpbit(rows())
+    pf = PortfolioState(upbit, ttl=0)
+    pf.refresh()
+    upbit.rows = {"error": "timeout"}
+    assert not pf.refresh()
+    assert pf.quantity("KRW-A") == 2.0
+
+
+def test_apply_fill_updates_snapshot_without_fetch():
+    upbit = FakeUpbit(rows())
+    pf = PortfolioState(upbit, ttl=3600)
+    pf.refresh()
+    pf.apply_fill("KRW-A", "bid", 2.0, 14000.0, fee=7.0)      # 2개 @ 5000 + 2개 @ 7000
+    assert pf.quantity("KRW-A") == 4.0 and pf.avg_buy_price("KRW-A") == 6000.0
+    assert pf.krw_balance() == 100000 - 14000 - 7
+
+    pf.apply_fill("KRW-A", "ask", 5.0, 30000.0, fee=15.0)     # 보유보다 많이 팔려도 0 아래로 안 감
+    assert pf.quantity("KRW-A") == 0.0
+    assert pf.krw_balance() == 100000 - 14007 + 30000 - 15
+    assert upbit.calls == 1
@@ -0,0 +1,38 @@
+import upbit_api
+from upbit_api import get_price_snapshot
+
+from conftest import hold
+from engine import NO_SELL_ORDER, liquidation_done
+
+
+def test_unknown_code_filtered_before_request(exchange):
+    a, b = exchange.markets[:2]
+    prices = get_price_snapshot([a, b, "KRW-NOPE"])
+    assert set(prices) == {a, b}
+    assert exchange.calls.get("/v1/ticker", 0) <= 1
+
+
+def test_rejected_code_dropped_others_priced(exchange):
+    upbit_api.known_krw_markets()              # 목록 캐시 후 상장폐지 → 캐시에는 아직 있음
+    gone = exchange.markets[2]
+    exchange.markets.remove(gone)
+
+    prices = get_price_snapshot(exchange.markets + [gone])
+    assert set(prices) == set(exchange.markets)
+    assert gone not in upbit_api.known_krw_markets()      # 다음 틱부터는 요청 전에 뺌
+
+
+def test_delisted_holding_does_not_block_liquidation(exchange, engine):
+    ok, gone = exchange.markets[:2]
+    hold(exchange, ok)
+    hold(exchange, gone)
+    upbit_api.known_krw_markets()
+    exchange.markets.remove(gone)
+
+    engine.portfolio.refresh(force=True)
+    assert [o.market for o in engine.liquidation_orders()] == [ok]
+
+    left = engine.sell_all()
+    assert left == {gone: NO_SELL_ORDER}
+    assert exchange.accounts[ok.split("-")[1]]["balance"] == 0.0
+    assert liquidation_done(left)              # 팔 수 없는 종목 때문에 새 세션을 막지 않음
@@ -0,0 +1,90 @@
+import os
+import time
+
+from mock_upbit import MockExchange
+from recorder import TICK_DTYPE, MarketRecorder, RecordedDay, day_key, list_days
+from replay import PaperAccount, ReplayFeed, ReplayUniverse
+
+TS = 1_760_000_000.0        # 2025-10-09 17:53 KST
+
+
+def bar(start, c):
+    return {"start": start, "open": c, "high": c, "low": c, "close": c, "volume": 1.0}
+
+
+def test_round_trip_and_batches(tmp_path):
+    rec = MarketRecorder(str(tmp_path))
+    rec.record_prices(TS, {"KRW-A": 100.0, "KRW-B": 200.0})
+    rec.record_prices(TS + 2, {"KRW-B": 201.0})
+    rec.record_candles(TS, {"KRW-A": [bar(TS - 3600, 99.0), bar(TS, 100.0)]})
+    rec.record_event(TS, "candidates", markets=["KRW-A", "KRW-B"])
+    rec.close()
+
+    (day,) = list_days(str(tmp_path))
+    rd = RecordedDay(str(tmp_path), day)
+    assert rd.markets == ["KRW-A", "KRW-B"]
+    assert rd.batches() == [(TS, 0, 2), (TS + 2, 2, 3)]
+    assert rd.ticks["price"].tolist() == [100.0, 200.0, 201.0]
+    assert rd.candles["close"].tolist() == [99.0, 100.0]
+    assert rd.events == [{"ts": TS, "kind": "candidates", "markets": ["KRW-A", "KRW-B"]}]
+
+
+def test_truncated_tail_ignored_and_ids_kept_after_restart(tmp_path):
+    rec = MarketRecorder(str(tmp_path))
+    rec.record_prices(TS, {"KRW-A": 1.0})
+    rec.close()
+    path = os.path.join(str(tmp_path), day_key(TS))
+    with open(os.path.join(path, "ticks.bin"), "ab") as fp:
+        fp.write(b"\0" * (TICK_DTYPE.itemsize // 2))         # 기록 중 죽어서 잘린 레코드
+    with open(os.path.join(path, "events.jsonl"), "a", encoding="utf-8") as fp:
+        fp.write('{"ts": 1, "kind": "cand')
+
+    rec = MarketRecorder(str(tmp_path))                      # 재시작: 기존 market id 이어서
+    rec.record_prices(TS + 1, {"KRW-B": 2.0, "KRW-A": 3.0})
+    rec.record_event(TS + 1, "candidates", markets=["KRW-B"])
+    rec.close()
+    rd = RecordedDay(str(tmp_path), day_key(TS))
+    assert rd.markets == ["KRW-A", "KRW-B"]
+    assert rd.ticks["price"].tolist() == [1.0, 2.0, 3.0]       # 잘린 꼬리는 버리고 그 자리부터 이어 씀
+    assert rd.ticks["market"].tolist() == [0, 1, 0]
+    assert [e["markets"] for e in rd.events] == [["KRW-B"]]
+
+
+def test_day_partition_switches_at_kst_midnight(tmp_path):
+    midnight = 1_760_022_000.0      # 2025-10-10 00:00 KST
+    rec = MarketRecorder(str(tmp_path))
+    rec.record_prices(midnight - 1, {"KRW-A": 1.0})
+    rec.record_prices(midnight, {"KRW-A": 2.0})
+    rec.close()
+    assert list_days(str(tmp_path)) == ["20251009", "20251010"]
+
+
+def test_replay_feed_candles_follow_virtual_clock(monkeypatch):
+    feed = ReplayFeed()
+    feed._candles["KRW-A"] = [(TS, bar(TS - 3600, 1.0)), (TS + 10, bar(TS, 2.0)), (TS + 20, bar(TS, 3.0))]
+    monkeypatch.setattr(time, "time", lambda: TS + 15)
+    assert [c["close"] for c in feed.candles("KRW-A", count=5)] == [1.0, 2.0]
+    monkeypatch.setattr(time, "time", lambda: TS + 20)
+    assert [c["close"] for c in feed.candles("KRW-A", count=1)] == [3.0]     # 같은 봉은 마지막 기록값
+
+
+def test_paper_account_fills_at_feed_price():
+    feed = ReplayFeed()
+    feed.latest["KRW-A"] = 250.0
+    ex = MockExchange(n_markets=0, latency=0, rate_limit=0, path=feed, krw=10_000, fee=0.0)
+    ex.markets = ["KRW-A"]
+    acct = PaperAccount(ex)
+    order = acct.buy_market_order("KRW-A", 5000)
+    assert acct.get_order(order["uuid"])["state"] == "cancel"
+    assert {r["currency"]: float(r["balance"]) for r in acct.get_balances()}["A"] == 20.0
+    assert acct.sell_market_order("KRW-A", 100.0)["error"].startswith("insufficient_funds_ask")
+
+
+def test_replay_universe_bumps_version_on_set_change_only():
+    universe = ReplayUniverse(3)
+    universe.set_candidates(["KRW-A", "KRW-B"])
+    version = universe.version
+    universe.set_candidates(["KRW-B", "KRW-A"])
+    assert universe.version == version and universe.top() == ["KRW-B", "KRW-A"]
+    universe.set_candidates(["KRW-B", "KRW-C"])
+    assert universe.version == version + 1
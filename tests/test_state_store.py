@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from conftest import hold
+from state_store import StateStore, fcntl
+
+
+def test_publish_read_round_trip(tmp_path):
+    store = StateStore(str(tmp_path / "state"))
+    assert store.read() is None
+    store.publish({"krw": 1000.0, "coins": ["KRW-A"]})
+    state = store.read()
+    assert state["krw"] == 1000.0 and state["coins"] == ["KRW-A"] and "ts" in state
+    assert [n for n in os.listdir(store.root) if n.endswith(".tmp")] == []
+
+
+def test_commands_popped_in_order_once(tmp_path):
+    store = StateStore(str(tmp_path / "state"))
+    store.push_command("sell_all")
+    store.push_command("stop", reason="test")
+    assert [(c["name"], c["args"]) for c in store.pop_commands()] == [("sell_all", {}), ("stop", {"reason": "test"})]
+    assert store.pop_commands() == []
+
+
+@pytest.mark.skipif(fcntl is None, reason="flock 없음")
+def test_engine_lock_is_exclusive(tmp_path):
+    a, b = StateStore(str(tmp_path / "state")), StateStore(str(tmp_path / "state"))
+    assert a.acquire_engine_lock()
+    assert not b.acquire_engine_lock()
+    assert b.engine_running()
+    a.release_engine_lock()
+    assert not b.engine_running()
+    assert b.acquire_engine_lock()
+    b.release_engine_lock()
+
+
+def test_engine_runs_dashboard_commands(exchange, engine):
+    market = exchange.markets[0]
+    hold(exchange, market)
+    engine.store.push_command("sell_all")
+    engine.store.push_command("stop")
+    engine.running = True
+    engine.handle_commands()
+    assert exchange.accounts[market.split("-")[1]]["balance"] == 0.0
+    assert engine.running is False
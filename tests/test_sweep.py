@@ -0,0 +1,37 @@
+import json
+
+from backtest import synthetic_dataset
+from sweep import combo_key, grid_size, iter_grid, load_checkpoint, rank_results, run_sweep, sample_grid
+
+GRID = {"k": [0.1, 0.2, 0.3], "tp": [0.01, 0.02], "max_holdings": [3, 5]}
+
+
+def test_sample_grid_distinct_and_inside_grid():
+    combos = list(sample_grid(GRID, 5, seed=3))
+    assert len(combos) == 5 and len({combo_key(c) for c in combos}) == 5
+    full = {combo_key(c) for c in iter_grid(GRID)}
+    assert len(full) == grid_size(GRID) == 12
+    assert all(combo_key(c) in full for c in combos)
+    assert len(list(sample_grid(GRID, 100))) == 12
+
+
+def test_load_checkpoint_skips_truncated_line(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    rec = {"params": {"k": 0.1}, "stats": {"sharpe": 1.0}}
+    path.write_text(json.dumps(rec) + "\n" + '{"params": {"k": 0.2}, "sta', encoding="utf-8")
+    assert load_checkpoint(str(path)) == {combo_key({"k": 0.1}): rec}
+
+
+def test_run_sweep_resumes_from_checkpoint(tmp_path):
+    data = str(tmp_path / "cols")
+    synthetic_dataset(n_markets=4, n_bars=72, seed=2).save_columnar(data)
+    cp = str(tmp_path / "sweep.jsonl")
+    grid = {"k": [0.1, 0.5], "tp": [0.02]}
+
+    first = run_sweep(data, grid, workers=1, checkpoint=cp, progress=False)
+    assert len(first) == 2 and len(load_checkpoint(cp)) == 2
+    again = run_sweep(data, grid, workers=1, checkpoint=cp, progress=False)     # 전부 체크포인트에서
+    assert sorted(map(combo_key, (r["params"] for r in again))) == sorted(map(combo_key, (r["params"] for r in first)))
+
+    ranked = rank_results(again, "total_return")
+    assert ranked[0]["stats"]["total_return"] >= ranked[1]["stats"]["total_return"]
@@ -0,0 +1,41 @@
+import time
+
+from trade_window import RecordWindow
+
+
+def test_evict_drops_expired_rows_and_aggregates():
+    now = time.time()
+    win = RecordWindow(100, sum_fields=("amount",))
+    for i, coin in enumerate(["KRW-A", "KRW-B", "KRW-A", "KRW-A"]):
+        win.add(now - 90 + i * 10, {"coin": coin, "amount": 1000 * (i + 1)})
+    assert win.aggregates() == {"KRW-A": {"count": 3, "amount": 8000.0}, "KRW-B": {"count": 1, "amount": 2000.0}}
+
+    version = win.version
+    assert win.evict(now + 25) == 2                 # -90, -80 만료
+    assert len(win) == 2 and win.version == version + 1
+    assert win.aggregates() == {"KRW-A": {"count": 2, "amount": 7000.0}}
+    assert win.coins() == ["KRW-A"]
+    assert win.evict(now + 25) == 0 and win.version == version + 1
+
+
+def test_out_of_order_add_and_range_query():
+    now = time.time()
+    win = RecordWindow(3600)
+    win.add(now - 10, {"coin": "KRW-A", "n": 1})
+    win.add(now - 30, {"coin": "KRW-B", "n": 2})      # 늦게 도착한 과거 기록
+    win.add(now - 20, {"coin": "KRW-A", "n": 3})
+    win.add(now - 7200, {"coin": "KRW-A", "n": 4})    # 이미 구간 밖 → 무시
+    assert [r["n"] for r in win.rows()] == [2, 3, 1]
+    assert [r["n"] for r in win.rows(since=now - 25)] == [3, 1]
+    assert [r["n"] for r in win.rows(coins=["KRW-B"])] == [2]
+
+
+def test_compaction_keeps_rows():
+    now = time.time()
+    win = RecordWindow(1000)
+    for i in range(10):
+        win.add(now - 900 + i * 100, {"coin": "KRW-A", "n": i})
+    win.evict(now + 650)                             # 앞 6개 만료 → 절반 넘음 → 압축
+    assert win._start == 0 and len(win._ts) == 4
+    assert [r["n"] for r in win.rows()] == [6, 7, 8, 9]
+    assert win.aggregates()["KRW-A"]["count"] == 4
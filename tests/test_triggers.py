@@ -0,0 +1,40 @@
+from triggers import DOWN, TriggerBook
+
+
+def test_scan_fires_crossed_levels_strongest_first():
+    book = TriggerBook()
+    book.replace("BUY", {"KRW-A": 100.0, "KRW-B": 200.0, "KRW-C": 300.0})
+    fired = book.scan({"KRW-A": 110.0, "KRW-B": 202.0, "KRW-C": 299.0})
+    assert [t.market for t in fired] == ["KRW-A", "KRW-B"]
+    assert fired[0].price == 110.0 and fired[0].kind == "BUY"
+
+
+def test_down_trigger_and_levels():
+    book = TriggerBook()
+    book.arm("KRW-A", "STOP_LOSS", 95.0, DOWN)
+    book.arm("KRW-A", "TAKE_PROFIT", 110.0)
+    assert book.check("KRW-A", 100.0) == []
+    assert [t.kind for t in book.check("KRW-A", 94.0)] == ["STOP_LOSS"]
+    assert book.levels() == {"KRW-A": (95.0, 110.0)}
+    assert book.levels(kinds=("STOP_LOSS",)) == {"KRW-A": (95.0, None)}
+    assert book.levels(skip={"KRW-A"}) == {}
+
+
+def test_replace_keeps_unchanged_and_drops_missing():
+    book = TriggerBook()
+    book.replace("BUY", {"KRW-A": 100.0, "KRW-B": 200.0})
+    kept = book.get("KRW-A", "BUY")
+    book.replace("BUY", {"KRW-A": 100.0, "KRW-C": 50.0})
+    assert book.get("KRW-A", "BUY") is kept
+    assert book.get("KRW-B", "BUY") is None
+    assert sorted(book.markets("BUY")) == ["KRW-A", "KRW-C"]
+    assert book.scan({"KRW-B": 1000.0}) == []
+
+
+def test_disarm_market():
+    book = TriggerBook()
+    book.arm("KRW-A", "BUY", 100.0)
+    book.arm("KRW-A", "STOP_LOSS", 90.0, DOWN)
+    book.disarm("KRW-A")
+    assert len(book) == 0
+    assert book.check("KRW-A", 1000.0) == [] and book.check("KRW-A", 1.0) == []
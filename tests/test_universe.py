@@ -0,0 +1,47 @@
+import universe
+from universe import UniverseScanner
+
+
+def fake_market(monkeypatch, values: dict):
+    """values{market: 24h 거래대금} 을 돌려주는 마켓 목록/ticker 로 교체 (values 를 바꾸면 다음 scan 에 반영)"""
+    monkeypatch.setattr(universe, "get_krw_markets", lambda: list(values))
+    monkeypatch.setattr(universe, "get_ticker_rows", lambda markets, timeout=5: [
+        {"market": m, "acc_trade_price_24h": values[m]} for m in markets if m in values])
+
+
+def test_top_n_by_value_in_chunks(monkeypatch):
+    values = {f"KRW-{i:02d}": float(i) for i in range(25)}
+    fake_market(monkeypatch, values)
+    scanner = UniverseScanner(size=3, chunk=4)
+    assert scanner.scan() == ["KRW-24", "KRW-23", "KRW-22"]
+    assert scanner.value("KRW-10") == 10.0 and scanner.value("KRW-XX") == 0.0
+    assert scanner.poll_changes() == (["KRW-24", "KRW-23", "KRW-22"], ["KRW-24", "KRW-23", "KRW-22"], [])
+    assert scanner.poll_changes() is None
+
+
+def test_version_bumps_only_when_set_changes(monkeypatch):
+    values = {"KRW-A": 3.0, "KRW-B": 2.0, "KRW-C": 1.0}
+    fake_market(monkeypatch, values)
+    scanner = UniverseScanner(size=0)           # 0 = 전체 → 거래대금 순위만 매분 바뀜
+    scanner.scan()
+    scanner.mark_seen(scanner.top())
+    version = scanner.version
+
+    values.update({"KRW-A": 1.0, "KRW-C": 3.0})
+    assert scanner.scan() == ["KRW-C", "KRW-B", "KRW-A"]
+    assert scanner.version == version and scanner.poll_changes() is None
+
+    values["KRW-D"] = 0.5                       # 신규 상장 → 구성 변경
+    scanner.markets(force=True)
+    scanner.scan()
+    assert scanner.version == version + 1
+    assert scanner.poll_changes() == (["KRW-C", "KRW-B", "KRW-A", "KRW-D"], ["KRW-D"], [])
+
+
+def test_failed_scan_keeps_previous_top(monkeypatch):
+    values = {"KRW-A": 2.0, "KRW-B": 1.0}
+    fake_market(monkeypatch, values)
+    scanner = UniverseScanner(size=1)
+    scanner.scan()
+    monkeypatch.setattr(universe, "get_ticker_rows", lambda markets, timeout=5: [])
+    assert scanner.scan() == ["KRW-A"]
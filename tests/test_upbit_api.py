@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import upbit_api
+from upbit_api import TokenBucket, UpbitAPIError, UpbitPrivate
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeHttp:
+    def __init__(self, resp):
+        self.resp = resp
+
+    def request(self, *args, **kw):
+        return self.resp
+
+
+def private(status_code: int, text: str):
+    return UpbitPrivate("access", "secret-" + "0" * 32, http=FakeHttp(FakeResponse(status_code, text)))
+
+
+def test_token_bucket_capacity_and_drain():
+    bucket = TokenBucket(1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    bucket = TokenBucket(1000, capacity=5)
+    bucket.drain()
+    assert not bucket.try_acquire(5)
+
+
+def test_token_bucket_observe_remaining():
+    bucket = TokenBucket(1, capacity=10)
+    bucket.observe_remaining(1)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_call_raises_exchange_error_name():
+    body = '{"error": {"name": "insufficient_funds_ask", "message": "부족"}}'
+    with pytest.raises(UpbitAPIError) as e:
+        private(400, body)._call("POST", "/v1/orders", {})
+    assert e.value.status == 400 and "insufficient_funds_ask" in str(e.value)
+
+
+@pytest.mark.parametrize("status, text", [(502, "<html>Bad Gateway</html>"), (200, "not json")])
+def test_call_non_json_body(status, text):
+    with pytest.raises(UpbitAPIError) as e:
+        private(status, text)._call("GET", "/v1/accounts")
+    assert e.value.status == status
+
+
+def test_order_methods_return_error_dict():
+    body = '{"error": {"name": "insufficient_funds_bid", "message": "부족"}}'
+    api = private(400, body)
+    assert api.buy_market_order("KRW-BTC", 5000) == {"error": "insufficient_funds_bid: 부족"}
+    assert api.sell_market_order("KRW-BTC", 1.0)["error"].startswith("insufficient_funds_bid")
+    assert "error" in api.get_order("uuid")
+
+
+def test_endpoint_group():
+    base = upbit_api.API_URL
+    assert upbit_api.endpoint_group(f"{base}/v1/candles/minutes/60") == "candles"
+    assert upbit_api.endpoint_group(f"{base}/v1/orders", "POST") == "order"
+    assert upbit_api.endpoint_group(f"{base}/v1/order", "GET") == "default"
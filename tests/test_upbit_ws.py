@@ -0,0 +1,47 @@
+import json
+
+from upbit_ws import TickerStream
+
+
+def tick(stream, market: str, price: float):
+    stream._on_message(None, json.dumps({"type": "ticker", "code": market, "trade_price": price}))
+
+
+def test_fires_when_already_outside_levels():
+    stream = TickerStream()
+    tick(stream, "KRW-A", 105.0)
+    stream.set_levels({"KRW-A": (None, 100.0)})     # 등록 시점에 이미 넘어 있음
+    assert stream.wait(0) == {"KRW-A"}
+    assert stream.crossed_at("KRW-A") is not None
+
+
+def test_same_levels_wake_once_until_back_inside():
+    stream = TickerStream()
+    stream.set_levels({"KRW-A": (90.0, 100.0)})
+    tick(stream, "KRW-A", 101.0)
+    assert stream.wait(0) == {"KRW-A"}
+    tick(stream, "KRW-A", 102.0)                    # 같은 레벨 밖에 머무름 → 다시 안 깨움
+    stream.set_levels({"KRW-A": (90.0, 100.0)})
+    assert stream.wait(0) == set()
+
+    tick(stream, "KRW-A", 95.0)                     # 안으로 돌아왔다가
+    tick(stream, "KRW-A", 89.0)                     # 반대쪽으로 나감 → 다시 깨움
+    assert stream.wait(0) == {"KRW-A"}
+
+
+def test_changed_levels_wake_again():
+    stream = TickerStream()
+    stream.set_levels({"KRW-A": (None, 100.0)})
+    tick(stream, "KRW-A", 110.0)
+    assert stream.wait(0) == {"KRW-A"}
+    stream.set_levels({"KRW-A": (None, 105.0)})     # 레벨이 바뀌면 지금 가격으로 다시 판단
+    assert stream.wait(0) == {"KRW-A"}
+
+
+def test_trade_messages_feed_on_trade():
+    seen = []
+    stream = TickerStream(on_trade=lambda *a: seen.append(a))
+    stream._on_message(None, json.dumps({"type": "trade", "code": "KRW-A", "trade_price": 10.0,
+                                         "trade_volume": 2.0, "trade_timestamp": 1_700_000_000_000}))
+    assert seen == [("KRW-A", 10.0, 2.0, 1_700_000_000.0)]
+    assert stream.snapshot(["KRW-A"]) == {"KRW-A": 10.0}
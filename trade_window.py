@@ -0,0 +1,90 @@
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class RecordWindow:
+    """
+    ✅ 최근 span 초 이내 기록만 유지하는 메모리 인덱스
+    - 타임스탬프는 array('d') 로 정렬 유지 → bisect 로 구간 조회
+    - 만료 기록은 evict() 가 앞에서부터 잘라냄(가끔 한 번에 압축)
+    - 종목별 합계(sum_fields)는 추가/만료 때만 증감 → 틱마다 전체 재계산 없음
+    - version: 구간 내용이 바뀔 때마다 증가 (화면 재렌더 판단용)
+    """
+
+    def __init__(self, span_seconds: float, sum_fields=()):
+        self.span = span_seconds
+        self.sum_fields = tuple(sum_fields)
+
+        self._ts = array("d")
+        self._rows = []
+        self._start = 0
+        self._agg = {}          # coin -> {"count": n, field: 합계, ...}
+        self.version = 0
+
+    def __len__(self):
+        return len(self._ts) - self._start
+
+    # ------------------------------------------
+    # 추가 / 만료
+    # ------------------------------------------
+    def add(self, ts: float, row: dict):
+        if ts < time.time() - self.span:
+            return
+        if not len(self) or ts >= self._ts[-1]:
+            self._ts.append(ts)
+            self._rows.append(row)
+        else:
+            i = bisect_right(self._ts, ts, lo=self._start)
+            self._ts.insert(i, ts)
+            self._rows.insert(i, row)
+        self._apply(row, +1)
+        self.version += 1
+
+    def evict(self, now: float = None):
+        now = time.time() if now is None else now
+        cut = bisect_left(self._ts, now - self.span, lo=self._start)
+        if cut == self._start:
+            return 0
+        for row in self._rows[self._start:cut]:
+            self._apply(row, -1)
+        n = cut - self._start
+        self._start = cut
+        self.version += 1
+
+        # 앞쪽 빈 공간이 절반을 넘으면 압축
+        if self._start > len(self._ts) // 2:
+            del self._ts[:self._start]
+            del self._rows[:self._start]
+            self._start = 0
+        return n
+
+    def _apply(self, row: dict, sign: int):
+        coin = row.get("coin")
+        agg = self._agg.get(coin)
+        if agg is None:
+            agg = self._agg[coin] = {"count": 0, **{f: 0.0 for f in self.sum_fields}}
+        agg["count"] += sign
+        for f in self.sum_fields:
+            agg[f] += sign * float(row.get(f) or 0)
+        if agg["count"] <= 0:
+            del self._agg[coin]
+
+    # ------------------------------------------
+    # 조회
+    # ------------------------------------------
+    def rows(self, since: float = None, coins=None):
+        """since 이후(기본: 전체 구간) 기록, 시간순"""
+        lo = self._start if since is None else bisect_left(self._ts, since, lo=self._start)
+        out = self._rows[lo:]
+        if coins is not None:
+            coins = set(coins)
+            out = [r for r in out if r.get("coin") in coins]
+        return out
+
+    def coins(self):
+        return list(self._agg)
+
+    def aggregates(self):
+        """{coin: {"count": n, <sum_fields>...}} (복사본)"""
+        return {c: dict(a) for c, a in self._agg.items()}
@@ -0,0 +1,192 @@
+import threading
+import dataclasses
+from bisect import bisect_left, bisect_right
+
+UP = "up"        # 가격 >= level 이면 발동 (돌파 매수, 익절)
+DOWN = "down"    # 가격 <= level 이면 발동 (손절)
+
+
+@dataclasses.dataclass
+class Trigger:
+    market: str
+    kind: str                  # "BUY" / "TAKE_PROFIT" / "STOP_LOSS"
+    level: float
+    direction: str = UP
+    price: float = None        # 발동 시 가격
+    meta: dict = dataclasses.field(default_factory=dict)
+
+
+def breakout_strength(t: Trigger):
+    """레벨을 얼마나 넘었는지 (상향: 현재가/레벨-1, 하향: 1-현재가/레벨)"""
+    if not t.level or t.price is None:
+        return 0.0
+    r = t.price / t.level - 1
+    return r if t.direction == UP else -r
+
+
+class _Side:
+    """한 마켓 한 방향의 레벨 정렬 리스트 (levels 와 triggers 는 같은 순서)"""
+    __slots__ = ("levels", "triggers")
+
+    def __init__(self):
+        self.levels = []
+        self.triggers = []
+
+    def add(self, t: Trigger):
+        i = bisect_right(self.levels, t.level)
+        self.levels.insert(i, t.level)
+        self.triggers.insert(i, t)
+
+    def remove(self, t: Trigger):
+        i = bisect_left(self.levels, t.level)
+        while i < len(self.triggers) and self.triggers[i] is not t:
+            i += 1
+        if i < len(self.triggers):
+            del self.levels[i]
+            del self.triggers[i]
+
+
+class TriggerBook:
+    """
+    ✅ 가격 임계값 인덱스 (전 마켓 돌파 매수/익절/손절 트리거)
+    - 마켓마다 상향/하향 레벨을 정렬 리스트로 보관 → 가격 한 번에 bisect 한 번,
+      넘은 트리거만 꺼냄 (전 후보를 매 틱 비교하지 않음)
+    - (market, kind) 당 트리거 하나, replace() 는 레벨이 바뀐 마켓만 다시 등록
+    - 한 번에 여러 개 발동하면 score(기본: 돌파 강도) 높은 순
+    - 발동은 레벨 기준(넘어 있는 동안 계속) → 쿨다운/보유 여부 판단은 엔진이 함
+    """
+
+    def __init__(self, score=None):
+        self.score = score or breakout_strength
+        self._lock = threading.Lock()
+        self._up = {}           # market -> _Side
+        self._down = {}
+        self._by_key = {}       # (market, kind) -> Trigger
+        self.checks = 0
+
+    def __len__(self):
+        return len(self._by_key)
+
+    # ------------------------------------------
+    # 등록 / 해제
+    # ------------------------------------------
+    def _index(self, direction: str):
+        return self._up if direction == UP else self._down
+
+    def _arm(self, t: Trigger):
+        self._disarm(t.market, t.kind)
+        side = self._index(t.direction).get(t.market)
+        if side is None:
+            side = self._index(t.direction)[t.market] = _Side()
+        side.add(t)
+        self._by_key[(t.market, t.kind)] = t
+
+    def _disarm(self, market: str, kind: str):
+        t = self._by_key.pop((market, kind), None)
+        if t is None:
+            return
+        index = self._index(t.direction)
+        side = index.get(market)
+        if side is not None:
+            side.remove(t)
+            if not side.levels:
+                del index[market]
+
+    def arm(self, market: str, kind: str, level: float, direction: str = UP, **meta):
+        with self._lock:
+            self._arm(Trigger(market, kind, float(level), direction, meta=meta))
+
+    def disarm(self, market: str, kind: str = None):
+        """kind 없으면 그 마켓 트리거 전부"""
+        with self._lock:
+            kinds = [kind] if kind else [k for m, k in self._by_key if m == market]
+            for k in kinds:
+                self._disarm(market, k)
+
+    def replace(self, kind: str, levels: dict, direction: str = UP, meta: dict = None):
+        """
+        kind 트리거 전체를 levels{market: level} 로 교체
+        (레벨/메타가 같은 마켓은 그대로 두고, 빠진 마켓은 해제)
+        """
+        meta = meta or {}
+        with self._lock:
+            for market in [m for m, k in self._by_key if k == kind and m not in levels]:
+                self._disarm(market, kind)
+            for market, level in levels.items():
+                if not level:
+                    self._disarm(market, kind)
+                    continue
+                m_meta = meta.get(market, {})
+                t = self._by_key.get((market, kind))
+                if t is not None and t.level == level and t.direction == direction and t.meta == m_meta:
+                    continue
+                self._arm(Trigger(market, kind, float(level), direction, meta=dict(m_meta)))
+
+    def clear(self):
+        with self._lock:
+            self._up, self._down, self._by_key = {}, {}, {}
+
+    def get(self, market: str, kind: str):
+        return self._by_key.get((market, kind))
+
+    def markets(self, kind: str = None):
+        return [m for m, k in list(self._by_key) if kind is None or k == kind]
+
+    # ------------------------------------------
+    # 가격 확인
+    # ------------------------------------------
+    def _check(self, market: str, price: float, out: list):
+        side = self._up.get(market)
+        if side is not None:
+            for t in side.triggers[:bisect_right(side.levels, price)]:
+                out.append(dataclasses.replace(t, price=price))
+        side = self._down.get(market)
+        if side is not None:
+            for t in side.triggers[bisect_left(side.levels, price):]:
+                out.append(dataclasses.replace(t, price=price))
+
+    def check(self, market: str, price: float):
+        """가격 하나 → 이번 가격이 넘어 있는 트리거 (발동 가격 채운 복사본)"""
+        out = []
+        with self._lock:
+            self.checks += 1
+            self._check(market, price, out)
+        return out
+
+    def scan(self, price_map: dict):
+        """
+        틱 스냅샷 전체 → 발동 트리거를 score 높은 순으로
+        (트리거 있는 마켓과 스냅샷 중 작은 쪽만 순회)
+        """
+        out = []
+        with self._lock:
+            armed = set(self._up) | set(self._down)
+            if len(armed) < len(price_map):
+                markets = [m for m in armed if m in price_map]
+            else:
+                markets = [m for m in price_map if m in armed]
+            for m in markets:
+                price = price_map[m]
+                if price:
+                    self._check(m, price, out)
+            self.checks += len(markets)
+        out.sort(key=self.score, reverse=True)
+        return out
+
+    def levels(self, skip=(), kinds=None):
+        """
+        스트림 깨우기용 {market: (하향 레벨 최대, 상향 레벨 최소)}
+        skip: 제외할 마켓(쿨다운 등), kinds: 포함할 kind (기본 전부)
+        """
+        out = {}
+        with self._lock:
+            for (m, kind), t in self._by_key.items():
+                if m in skip or (kinds is not None and kind not in kinds):
+                    continue
+                low, high = out.get(m, (None, None))
+                if t.direction == UP:
+                    high = t.level if high is None else min(high, t.level)
+                else:
+                    low = t.level if low is None else max(low, t.level)
+                out[m] = (low, high)
+        return out
@@ -0,0 +1,144 @@
+import time
+import heapq
+import threading
+
+from upbit_api import get_krw_markets, get_ticker_rows, fetch_concurrently
+
+
+class UniverseScanner:
+    """
+    ✅ 전체 KRW 마켓 24h 거래대금 상위 N 후보 (백그라운드 갱신, N=0 이면 전체)
+    - 마켓 목록은 market_ttl 동안 캐시 (/v1/market/all 은 가끔만)
+    - interval 마다 전 마켓 ticker 를 chunk 개씩 묶어 병렬 조회 → 거래대금 갱신
+    - 상위 N 은 heapq.nlargest (전체 정렬 없이 O(M log N))
+    - 후보 구성이 바뀌면 version 증가 (순위만 바뀐 건 무시 → 체크포인트/후보 기록이 매분 다시 써지지 않음),
+      매매 루프는 poll_changes() 로 추가/제외 종목만 받아감
+    """
+
+    def __init__(self, size: int = 20, interval: float = 60.0, market_ttl: float = 3600.0,
+                 chunk: int = 100, max_workers: int = 4):
+        self.size = size
+        self.interval = interval
+        self.market_ttl = market_ttl
+        self.chunk = chunk
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._markets = []
+        self._markets_at = 0.0
+        self._values = {}           # market -> acc_trade_price_24h
+        self._top = []
+        self._seen_version = 0
+        self._seen_top = []
+        self.version = 0
+        self.scanned_at = 0.0
+        self.scan_count = 0
+        self.last_error = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------
+    # 조회
+    # ------------------------------------------
+    def markets(self, force: bool = False):
+        """KRW 마켓 목록 (TTL 캐시, 실패 시 직전 목록)"""
+        if force or not self._markets or time.time() - self._markets_at >= self.market_ttl:
+            try:
+                markets = get_krw_markets()
+                if markets:
+                    self._markets = markets
+                    self._markets_at = time.time()
+            except Exception as e:
+                self.last_error = f"market/all: {e}"
+        return self._markets
+
+    def scan(self):
+        """
+        전 마켓 거래대금 갱신 후 상위 N 재계산.
+        반환: 현재 상위 N 리스트 (전부 실패하면 직전 상위 유지)
+        """
+        markets = self.markets()
+        chunks = [tuple(markets[i:i + self.chunk]) for i in range(0, len(markets), self.chunk)]
+        results, errors = fetch_concurrently(chunks, lambda c: get_ticker_rows(c, timeout=7), self.max_workers)
+
+        values = {}
+        for rows in results.values():
+            for r in rows:
+                m = r.get("market")
+                if m:
+                    values[m] = float(r.get("acc_trade_price_24h") or 0)
+        self.scan_count += 1
+        if errors:
+            self.last_error = f"ticker: {len(errors)}개 묶음 실패"
+        if not values:
+            return self.top()
+
+        with self._lock:
+            self._values.update(values)
+            # 상장폐지 등으로 목록에서 빠진 마켓 정리
+            live = set(markets)
+            for m in [m for m in self._values if m not in live]:
+                del self._values[m]
+            size = self.size or len(self._values)     # 0 = 전체 마켓
+            self._set_top([m for _, m in heapq.nlargest(size, ((v, m) for m, v in self._values.items()))])
+            self.scanned_at = time.time()
+            return list(self._top)
+
+    def _set_top(self, top):
+        """_lock 안에서 호출: 순위는 항상 반영, version 은 후보 구성이 바뀔 때만 증가"""
+        if set(top) != set(self._top):
+            self.version += 1
+        self._top = list(top)
+
+    def top(self):
+        with self._lock:
+            return list(self._top)
+
+    def value(self, market: str):
+        """최근 조회한 24h 거래대금 (없으면 0)"""
+        with self._lock:
+            return self._values.get(market, 0.0)
+
+    def poll_changes(self):
+        """
+        마지막 poll 이후 후보가 바뀌었으면 (candidates, added, removed), 아니면 None
+        (순위만 바뀐 경우는 None - 새 순위는 다음 구성 변경이나 리셋 때 반영)
+        """
+        with self._lock:
+            if self.version == self._seen_version:
+                return None
+            top = list(self._top)
+            self._seen_version = self.version
+        prev = set(self._seen_top)
+        added = [m for m in top if m not in prev]
+        removed = [m for m in self._seen_top if m not in set(top)]
+        self._seen_top = top
+        return top, added, removed
+
+    def mark_seen(self, candidates):
+        """루프가 직접 정한 후보(시작/리셋 시)를 기준으로 이후 변경분 계산"""
+        with self._lock:
+            self._seen_version = self.version
+        self._seen_top = list(candidates)
+
+    # ------------------------------------------
+    # 백그라운드
+    # ------------------------------------------
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except Exception as e:
+                self.last_error = str(e)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="universe-scanner", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
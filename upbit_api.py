@@ -0,0 +1,488 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import calendar
+import threading
+from urllib.parse import urlencode, urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ==========================================
+# 업비트 API 공용 클라이언트
+# - 모든 HTTP 호출(업비트 시세/주문, 디스코드, IP 확인)이 같은 세션(keep-alive 풀)을 공유
+# - 엔드포인트 그룹별 토큰 버킷 + 응답 Remaining-Req 헤더로 남은 한도 동기화
+# - 429/418 은 버킷 비우고 백오프 후 재시도
+# - 엔드포인트별 호출 수/오류/지연시간 집계
+# ==========================================
+# ✅ 기본은 실서버, 로컬 테스트 시 UPBIT_API_URL 로 교체
+API_URL = os.environ.get("UPBIT_API_URL", "https://api.upbit.com")
+
+# 업비트 요청 한도 (그룹별 초당)
+GROUP_RATES = {
+    "market": 10,
+    "candles": 10,
+    "ticker": 10,
+    "orderbook": 10,
+    "trades": 10,
+    "order": 8,
+    "default": 30,      # 주문 외 Exchange API (계좌/주문조회 등)
+    "discord": 2,       # 디스코드 웹훅 (채널당 5회/2초)
+    "external": 5,      # 그 외 외부 호출 (IP 확인 등)
+}
+MAX_RETRIES = 3
+RETRY_BASE_SECONDS = 0.2
+POOL_SIZE = 16
+MARKET_TTL_SECONDS = 600    # 현재가 조회 전 걸러낼 KRW 마켓 목록 캐시
+
+REMAINING_RE = re.compile(r"group=([a-z\-]+);.*?sec=([0-9]+)")
+
+
+class UpbitAPIError(Exception):
+    def __init__(self, msg: str, status: int = None):
+        super().__init__(msg)
+        self.status = status
+
+
+class TokenBucket:
+    """
+    초당 rate 개 토큰, 최대 capacity 개까지 적립.
+    acquire()는 토큰이 생길 때까지 대기 (스레드 안전)
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, n: float = 1):
+        with self._lock:
+            self._refill()
+            if self._tokens >= n:
+                self._tokens -= n
+                return True
+            return False
+
+    def acquire(self, n: float = 1):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                wait = (n - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        """429 를 받았을 때: 남은 토큰을 비워서 다음 요청들을 자연스럽게 늦춤"""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+    def observe_remaining(self, remaining: int):
+        """서버가 알려준 이번 초 남은 요청 수보다 토큰이 많으면 맞춰서 줄임"""
+        with self._lock:
+            self._refill()
+            if remaining < self._tokens:
+                self._tokens = float(remaining)
+
+
+def endpoint_group(url: str, method: str = "GET"):
+    """URL → 업비트 요청 한도 그룹 (Remaining-Req 헤더가 오기 전 기본값)"""
+    parsed = urlparse(url)
+    if "discord" in parsed.netloc:
+        return "discord"
+    if not url.startswith(API_URL):
+        return "external"
+    path = parsed.path
+    if path.startswith("/v1/candles"):
+        return "candles"
+    if path.startswith("/v1/ticker"):
+        return "ticker"
+    if path.startswith("/v1/market"):
+        return "market"
+    if path.startswith("/v1/orderbook"):
+        return "orderbook"
+    if path.startswith("/v1/trades"):
+        return "trades"
+    if path in ("/v1/orders", "/v1/order") and method in ("POST", "DELETE"):
+        return "order"
+    return "default"
+
+
+def endpoint_name(url: str, method: str = "GET"):
+    """집계용 이름: 'GET /v1/candles/minutes/60' (쿼리 제외)"""
+    parsed = urlparse(url)
+    host = "" if url.startswith(API_URL) else parsed.netloc
+    path = parsed.path if "discord" not in parsed.netloc else "/webhook"
+    return f"{method} {host}{path}"
+
+
+class HttpClient:
+    """
+    ✅ 프로세스 공용 HTTP 클라이언트 (module 전역 client 사용)
+    """
+
+    def __init__(self, rates: dict = None, pool_size: int = POOL_SIZE):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # ✅ 버스트 없이(capacity=1) 한도보다 살짝 낮게 → 어떤 1초 창에서도 한도를 넘지 않음
+        self.buckets = {
+            g: TokenBucket(max(r - 1, 1), capacity=1) for g, r in (rates or GROUP_RATES).items()
+        }
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.observers = []     # fn(endpoint, seconds, status) - 계측 훅
+
+    # ------------------------------------------
+    # 집계
+    # ------------------------------------------
+    def _record(self, name: str, seconds: float, status):
+        with self._lock:
+            s = self._stats.get(name)
+            if s is None:
+                s = self._stats[name] = {"calls": 0, "errors": 0, "throttled": 0, "total_s": 0.0, "max_s": 0.0}
+            s["calls"] += 1
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+            if status is None or status >= 400:
+                s["errors"] += 1
+            if status in (418, 429):
+                s["throttled"] += 1
+        for fn in self.observers:
+            try:
+                fn(name, seconds, status)
+            except:
+                pass
+
+    def stats(self):
+        """{endpoint: {calls, errors, throttled, total_s, max_s, avg_ms}}"""
+        with self._lock:
+            out = {k: dict(v) for k, v in self._stats.items()}
+        for v in out.values():
+            v["avg_ms"] = (v["total_s"] / v["calls"] * 1000) if v["calls"] else 0.0
+        return out
+
+    # ------------------------------------------
+    # 요청
+    # ------------------------------------------
+    def request(self, method: str, url: str, group: str = None, retries: int = MAX_RETRIES, **kwargs):
+        """
+        레이트리밋 준수 요청 → requests.Response (429/418 은 재시도 후에도 실패면 그대로 반환)
+        """
+        group = group or endpoint_group(url, method)
+        bucket = self.buckets.get(group) or self.buckets["default"]
+        name = endpoint_name(url, method)
+        kwargs.setdefault("timeout", 5)
+
+        resp = None
+        for attempt in range(retries + 1):
+            bucket.acquire()
+            t0 = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                self._record(name, time.perf_counter() - t0, None)
+                if attempt < retries:
+                    time.sleep(RETRY_BASE_SECONDS * (2 ** attempt))
+                    continue
+                raise
+            self._record(name, time.perf_counter() - t0, resp.status_code)
+
+            remaining = REMAINING_RE.search(resp.headers.get("Remaining-Req", ""))
+            if remaining:
+                b = self.buckets.get(remaining.group(1))
+                if b is not None:
+                    b.observe_remaining(int(remaining.group(2)))
+
+            if resp.status_code in (418, 429):
+                bucket.drain()
+                if attempt < retries:
+                    retry_after = resp.headers.get("Retry-After")
+                    try:
+                        delay = float(retry_after) if retry_after else RETRY_BASE_SECONDS * (2 ** attempt)
+                    except ValueError:
+                        delay = RETRY_BASE_SECONDS * (2 ** attempt)
+                    time.sleep(min(delay, 10))
+                    continue
+            return resp
+        return resp
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+client = HttpClient()
+
+
+def _get_json(path: str, params: dict, timeout: float = 5):
+    """
+    시세 API GET → JSON. 429 는 client 가 재시도, 그 외 HTTP 오류는 UpbitAPIError
+    """
+    resp = client.get(f"{API_URL}{path}", params=params, timeout=timeout)
+    if resp.status_code == 429:
+        raise UpbitAPIError("429 Too Many Requests", status=429)
+    if resp.status_code >= 400:
+        raise UpbitAPIError(f"HTTP {resp.status_code}: {resp.text[:200]}", status=resp.status_code)
+    return resp.json()
+
+
+def get_krw_markets():
+    """KRW 마켓 코드 목록 (pyupbit.get_tickers('KRW') 대체)"""
+    rows = _get_json("/v1/market/all", {"isDetails": "false"})
+    return [r["market"] for r in rows if r.get("market", "").startswith("KRW-")]
+
+
+_market_lock = threading.Lock()
+_market_cache = {"markets": None, "at": 0.0, "bad": set()}
+
+
+def known_krw_markets(ttl: float = MARKET_TTL_SECONDS):
+    """
+    거래 가능한 KRW 마켓 set (ttl 동안 캐시, 갱신 실패 시 직전 목록, 한 번도 못 받았으면 None)
+    /v1/ticker 에서 거절된 코드(상장폐지 등)는 다음 갱신 전까지 빠짐
+    """
+    with _market_lock:
+        cache = _market_cache
+        if cache["markets"] is None or time.time() - cache["at"] >= ttl:
+            try:
+                cache["markets"] = set(get_krw_markets())
+                cache["bad"] = set()
+            except:
+                pass
+            cache["at"] = time.time()
+        if cache["markets"] is None:
+            return None
+        return cache["markets"] - cache["bad"]
+
+
+def _forget_market(market: str):
+    with _market_lock:
+        _market_cache["bad"].add(market)
+
+
+def _ticker_rows(markets, timeout):
+    """
+    ✅ 한 번에 조회, 4xx(없는/상장폐지 코드가 섞이면 업비트가 요청 전체를 거절)면 반으로 나눠 다시
+    → 문제 코드 하나만 빠지고 나머지 시세는 그대로
+    """
+    try:
+        resp = _get_json("/v1/ticker", {"markets": ",".join(markets)}, timeout=timeout)
+        return resp if isinstance(resp, list) else []
+    except UpbitAPIError as e:
+        if e.status is None or not 400 <= e.status < 500 or e.status in (418, 429):
+            raise
+        if len(markets) == 1:
+            _forget_market(markets[0])
+            return []
+        mid = len(markets) // 2
+        return _ticker_rows(markets[:mid], timeout) + _ticker_rows(markets[mid:], timeout)
+
+
+def get_ticker_rows(markets, timeout=5):
+    """
+    /v1/ticker 를 여러 마켓 한 번에 조회해서 원본 row 리스트 반환.
+    KRW 마켓 목록에 없는 코드는 요청 전에 빼고, 거절된 코드만 빠짐. 그 외 실패 시 빈 리스트
+    """
+    markets = sorted({m for m in markets if m})
+    known = known_krw_markets()
+    if known is not None:
+        markets = [m for m in markets if m in known]
+    if not markets:
+        return []
+    try:
+        return _ticker_rows(markets, timeout)
+    except:
+        return []
+
+
+def get_price_snapshot(markets, timeout=5):
+    """
+    ✅ 틱당 1회: 필요한 모든 마켓의 현재가를 한 번의 요청으로 조회
+    반환: {market: trade_price}  (조회 실패한 마켓은 빠짐)
+    """
+    snapshot = {}
+    for row in get_ticker_rows(markets, timeout=timeout):
+        market = row.get("market")
+        price = row.get("trade_price")
+        if market and price is not None:
+            snapshot[market] = float(price)
+    return snapshot
+
+
+# ==========================================
+# 캔들
+# ==========================================
+def candle_path(interval: str):
+    """
+    pyupbit 식 interval 이름 → 업비트 캔들 경로
+    minute1/3/5/10/15/30/60/240, day, week, month
+    """
+    if interval.startswith("minute"):
+        return f"/v1/candles/minutes/{int(interval[len('minute'):])}"
+    if interval in ("day", "days"):
+        return "/v1/candles/days"
+    if interval in ("week", "weeks"):
+        return "/v1/candles/weeks"
+    if interval in ("month", "months"):
+        return "/v1/candles/months"
+    raise ValueError(f"지원하지 않는 interval: {interval}")
+
+
+def candle_start_epoch(utc_str: str):
+    """'2024-01-01T00:00:00' (UTC) → epoch 초"""
+    if not utc_str:
+        return None
+    return calendar.timegm(time.strptime(utc_str[:19], "%Y-%m-%dT%H:%M:%S"))
+
+
+def get_candles(market: str, interval: str = "minute60", count: int = 2, to: str = None, timeout: float = 5):
+    """
+    캔들 조회 → 오래된 것부터 정렬된 dict 리스트
+    각 항목: start(봉 시작 epoch 초), time(KST 문자열), timestamp(ms), open, high, low, close, volume, value
+    """
+    params = {"market": market, "count": count}
+    if to:
+        params["to"] = to
+    rows = _get_json(candle_path(interval), params, timeout=timeout)
+    if not isinstance(rows, list):
+        raise UpbitAPIError(f"unexpected candle response: {str(rows)[:200]}")
+
+    out = []
+    for r in reversed(rows):
+        out.append({
+            "start": candle_start_epoch(r.get("candle_date_time_utc")),
+            "time": r.get("candle_date_time_kst"),
+            "timestamp": r.get("timestamp"),
+            "open": float(r["opening_price"]),
+            "high": float(r["high_price"]),
+            "low": float(r["low_price"]),
+            "close": float(r["trade_price"]),
+            "volume": float(r.get("candle_acc_trade_volume", 0)),
+            "value": float(r.get("candle_acc_trade_price", 0)),
+        })
+    return out
+
+
+def fetch_concurrently(items, fn, max_workers: int = 8):
+    """
+    items 각각에 fn(item) 을 스레드풀로 실행 (요청 속도는 각 버킷이 제한)
+    반환: (results{item: 값}, errors{item: 에러문자열})  ← 일부 실패해도 나머지는 반환
+    """
+    items = list(dict.fromkeys(items))
+    results, errors = {}, {}
+    if not items:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = {item: pool.submit(fn, item) for item in items}
+        for item, fut in futures.items():
+            try:
+                results[item] = fut.result()
+            except Exception as e:
+                errors[item] = str(e) or e.__class__.__name__
+    return results, errors
+
+
+# ==========================================
+# Exchange(인증) API - pyupbit.Upbit 와 같은 메서드 이름/반환값
+# ==========================================
+class UpbitPrivate:
+    """
+    계좌/주문 API. pyupbit.Upbit 대신 공용 client(풀/버킷/집계)를 사용
+    """
+
+    def __init__(self, access: str, secret: str, http: HttpClient = None):
+        self.access = access
+        self.secret = secret
+        self.http = http or client
+
+    def _headers(self, query: dict = None):
+        import jwt  # PyJWT
+
+        payload = {"access_key": self.access, "nonce": str(uuid.uuid4())}
+        if query:
+            m = hashlib.sha512()
+            m.update(urlencode(query, doseq=True).replace("%5B%5D=", "[]=").encode())
+            payload["query_hash"] = m.hexdigest()
+            payload["query_hash_alg"] = "SHA512"
+        token = jwt.encode(payload, self.secret, algorithm="HS256")
+        return {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+
+    def _call(self, method: str, path: str, query: dict = None):
+        url = f"{API_URL}{path}"
+        headers = self._headers(query)
+        if method == "GET":
+            resp = self.http.request(method, url, params=query, headers=headers)
+        else:
+            # ✅ 주문은 재전송 시 중복 체결 위험 → 자동 재시도 안 함
+            resp = self.http.request(method, url, json=query, headers=headers, retries=0)
+        # ✅ 상태 코드 먼저 확인, 본문은 JSON 이 아닐 수도 있음 (게이트웨이 502 HTML 등)
+        try:
+            data = resp.json()
+        except ValueError:
+            data = None
+        if resp.status_code >= 400:
+            err = data.get("error") if isinstance(data, dict) else None
+            if isinstance(err, dict):
+                msg = f"{err.get('name', resp.status_code)}: {err.get('message', '')}"
+            else:
+                msg = f"HTTP {resp.status_code}: {resp.text[:200]}"
+            raise UpbitAPIError(msg, status=resp.status_code)
+        if data is None:
+            raise UpbitAPIError(f"invalid JSON response: {resp.text[:200]}", status=resp.status_code)
+        return data
+
+    def get_balances(self):
+        try:
+            return self._call("GET", "/v1/accounts")
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_balance(self, ticker: str = "KRW"):
+        cur = ticker.split("-")[-1]
+        balances = self.get_balances()
+        if not isinstance(balances, list):
+            return None
+        for b in balances:
+            if b.get("currency") == cur:
+                return float(b.get("balance", 0))
+        return 0.0
+
+    def get_order(self, order_uuid: str):
+        try:
+            return self._call("GET", "/v1/order", {"uuid": order_uuid})
+        except Exception as e:
+            return {"error": str(e)}
+
+    def buy_market_order(self, ticker: str, price: float):
+        try:
+            return self._call("POST", "/v1/orders", {
+                "market": ticker, "side": "bid", "price": str(price), "ord_type": "price",
+            })
+        except Exception as e:
+            return {"error": str(e)}
+
+    def sell_market_order(self, ticker: str, volume: float):
+        try:
+            return self._call("POST", "/v1/orders", {
+                "market": ticker, "side": "ask", "volume": str(volume), "ord_type": "market",
+            })
+        except Exception as e:
+            return {"error": str(e)}
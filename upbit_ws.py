@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import uuid
+import threading
+
+import websocket  # websocket-client
+
+# ==========================================
+# 업비트 WebSocket 실시간 시세 (ticker/trade)
+# ==========================================
+# ✅ 기본은 실서버, 로컬 모의서버 사용 시 UPBIT_WS_URL 로 교체
+WS_URL = os.environ.get("UPBIT_WS_URL", "wss://api.upbit.com/websocket/v1")
+
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+
+class TickerStream:
+    """
+    후보/보유 마켓의 ticker(+trade) 채널을 구독해서 최신가 테이블을 메모리에 유지.
+    - 끊기면 자동 재접속 후 현재 마켓 목록으로 재구독
+    - set_levels()로 등록한 가격(목표가/익절가/손절가) 밖에 있는 틱이 오면 wait()로 대기 중인
+      매매 루프를 즉시 깨움 (레벨 기준: 스트림 시작/목표가 재계산 시 이미 넘어 있어도 깨움)
+    - 같은 레벨로는 한 번만 깨움 → 루프가 처리하지 못한 마켓(주문 보류 등) 때문에 계속 깨지 않음,
+      가격이 레벨 안으로 돌아오거나 레벨이 바뀌면 다시 깨울 수 있음
+    - on_trade(market, price, volume, ts): 체결(trade) 메시지마다 호출 (캔들 직접 생성용)
+    """
+
+    def __init__(self, url: str = None, channels=("ticker", "trade"), on_trade=None):
+        self.url = url or WS_URL
+        self.channels = tuple(channels)
+        self.on_trade = on_trade
+
+        self._lock = threading.Lock()
+        self._markets = []
+        self._prices = {}       # market -> (price, recv_ts)
+        self._levels = {}       # market -> (low, high)
+        self._fired = set()     # 레벨 밖 틱이 온 마켓(루프가 가져갈 때까지)
+        self._acked = {}        # market -> 루프가 이미 가져간 (low, high) (같은 레벨로 다시 깨우지 않음)
+        self._crossed_at = {}   # market -> 레벨을 처음 가로지른 틱 수신 시각(지연 계측용)
+        self._wakeup = threading.Event()
+
+        self._ws = None
+        self._thread = None
+        self._running = False
+        self.connected = False
+        self.reconnects = 0
+
+    # ------------------------------------------
+    # 구독 관리
+    # ------------------------------------------
+    def set_markets(self, markets):
+        markets = sorted({m for m in markets if m})
+        with self._lock:
+            if markets == self._markets:
+                return
+            self._markets = markets
+        self._subscribe()
+
+    def set_levels(self, levels: dict):
+        """
+        levels: {market: (low, high)}
+        - 가격이 high 이상이거나 low 이하이면 루프를 깨움 (지금 가격이 이미 밖이어도 바로)
+        - low/high 는 None 가능
+        """
+        fired = False
+        with self._lock:
+            self._levels = dict(levels)
+            # 루프가 처리하지 않은 예전 돌파 시각은 버림 (대기 중인 돌파만 유지)
+            self._crossed_at = {m: t for m, t in self._crossed_at.items() if m in self._fired}
+            self._acked = {m: lv for m, lv in self._acked.items() if self._levels.get(m) == lv}
+            for m in self._levels:
+                p = self._prices.get(m)
+                if p and self._check(m, p[0], p[1]):
+                    fired = True
+        if fired:
+            self._wakeup.set()
+
+    @staticmethod
+    def _outside(price: float, low, high):
+        return (high is not None and price >= high) or (low is not None and price <= low)
+
+    def _check(self, market: str, price: float, recv_ts: float):
+        """(락 안에서) 가격이 레벨 밖이고 이 레벨로 아직 안 깨웠으면 발동 표시 후 True"""
+        levels = self._levels.get(market)
+        if levels is None:
+            return False
+        if not self._outside(price, *levels):
+            self._acked.pop(market, None)       # 레벨 안으로 돌아옴 → 다시 나가면 또 깨움
+            return False
+        if self._acked.get(market) == levels or market in self._fired:
+            return False
+        self._fired.add(market)
+        self._crossed_at.setdefault(market, recv_ts)
+        return True
+
+    def _subscribe(self):
+        ws = self._ws
+        with self._lock:
+            markets = list(self._markets)
+        if ws is None or not self.connected or not markets:
+            return
+        req = [{"ticket": str(uuid.uuid4())}]
+        for ch in self.channels:
+            req.append({"type": ch, "codes": markets})
+        req.append({"format": "DEFAULT"})
+        try:
+            ws.send(json.dumps(req))
+        except:
+            pass
+
+    # ------------------------------------------
+    # 수신 처리
+    # ------------------------------------------
+    def _on_open(self, ws):
+        self.connected = True
+        self._subscribe()
+
+    def _on_close(self, ws, *args):
+        self.connected = False
+
+    def _on_error(self, ws, err):
+        self.connected = False
+
+    def _on_message(self, ws, message):
+        try:
+            if isinstance(message, bytes):
+                message = message.decode("utf-8")
+            data = json.loads(message)
+        except:
+            return
+
+        market = data.get("code") or data.get("cd")
+        price = data.get("trade_price", data.get("tp"))
+        if not market or price is None:
+            return
+        price = float(price)
+
+        if self.on_trade and (data.get("type") or data.get("ty")) == "trade":
+            ts = data.get("trade_timestamp", data.get("ttms", data.get("timestamp")))
+            try:
+                self.on_trade(
+                    market, price,
+                    float(data.get("trade_volume", data.get("tv", 0)) or 0),
+                    (ts / 1000.0) if ts else None,
+                )
+            except:
+                pass
+
+        with self._lock:
+            now = time.time()
+            self._prices[market] = (price, now)
+            crossed = self._check(market, price, now)
+
+        if crossed:
+            self._wakeup.set()
+
+    # ------------------------------------------
+    # 루프에서 사용하는 API
+    # ------------------------------------------
+    def wait(self, timeout: float):
+        """
+        관련 틱(레벨 밖 가격)이 오거나 timeout 이 지나면 반환.
+        반환: 이번 대기 동안 레벨 밖 틱이 온 마켓 set (그 레벨로는 다시 깨우지 않음)
+        """
+        self._wakeup.wait(timeout)
+        with self._lock:
+            fired = self._fired
+            self._fired = set()
+            for m in fired:
+                if m in self._levels:
+                    self._acked[m] = self._levels[m]
+            self._wakeup.clear()
+        return fired
+
+    def crossed_at(self, market: str):
+        """레벨 돌파 틱을 받은 시각(없으면 None) - 꺼내면 지워짐"""
+        with self._lock:
+            return self._crossed_at.pop(market, None)
+
+    def snapshot(self, markets, max_age: float = 10.0):
+        """
+        수신한 최신가 중 max_age 초 이내인 것만 {market: price} 로 반환
+        """
+        now = time.time()
+        out = {}
+        with self._lock:
+            for m in markets:
+                p = self._prices.get(m)
+                if p and now - p[1] <= max_age:
+                    out[m] = p[0]
+        return out
+
+    def is_fresh(self, max_age: float = 10.0):
+        return self.connected and bool(self.snapshot(self._markets, max_age))
+
+    # ------------------------------------------
+    # 스레드 실행 / 재접속
+    # ------------------------------------------
+    def _run(self):
+        backoff = RECONNECT_MIN_SECONDS
+        while self._running:
+            started = time.time()
+            try:
+                self._ws = websocket.WebSocketApp(
+                    self.url,
+                    on_open=self._on_open,
+                    on_message=self._on_message,
+                    on_error=self._on_error,
+                    on_close=self._on_close,
+                )
+                self._ws.run_forever(ping_interval=60, ping_timeout=10)
+            except:
+                pass
+            self.connected = False
+            if not self._running:
+                break
+
+            # 오래 붙어 있었으면 백오프 초기화
+            if time.time() - started > RECONNECT_MAX_SECONDS:
+                backoff = RECONNECT_MIN_SECONDS
+            self.reconnects += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="upbit-ws", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except:
+                pass
+        self._wakeup.set()